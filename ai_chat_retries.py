@@ -1,42 +1,16 @@
 """
 Eén gebruikerbericht naar de AI (Gemini, OpenAI of Ollama) en antwoord terug.
 Wordt o.a. door telegram_bridge gebruikt.
-Volgorde: Gemini (gratis tier) → OpenAI → Ollama.
-Retries bij tijdelijke fouten (rate limit, timeout).
+Volgorde: Gemini (gratis tier) → OpenAI → Ollama (llm_engine, chain "chat").
+Retries bij tijdelijke fouten (rate limit, timeout) met backoff + jitter uit llm_engine; een Retry-After gaat voor.
 """
-import os
 import logging
-import time
-from pathlib import Path
+from contextlib import contextmanager
+
+import llm_engine
 
 logger = logging.getLogger(__name__)
-GEMINI_RETRIES = 3
-GEMINI_RETRY_DELAY = 3.0
-OLLAMA_RETRIES = 3
-OLLAMA_RETRY_DELAY = 2.0
-OLLAMA_TIMEOUT = 120  # grote taken kunnen lang duren
-
-# Laad .env voor AI-keys als ze nog ontbreken of leeg zijn (voorkomt "soms wel, soms niet")
-def _ensure_env_loaded():
-    root = Path(__file__).resolve().parent
-    env_file = root / ".env"
-    if not env_file.exists():
-        return
-    want = ("GOOGLE_API_KEY", "GEMINI_API_KEY", "OPENAI_API_KEY", "GEMINI_MODEL", "OLLAMA_HOST", "OLLAMA_MODEL")
-    with open(env_file) as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith("#") and "=" in line:
-                k, _, v = line.partition("=")
-                k, v = k.strip(), v.strip()
-                if k not in want:
-                    continue
-                if len(v) >= 2 and v[0] in "'\"" and v[0] == v[-1]:
-                    v = v[1:-1]
-                # Alleen invullen als key ontbreekt of leeg (zo blijft .env altijd de bron)
-                cur = (os.environ.get(k) or "").strip()
-                if not cur and v:
-                    os.environ[k] = v
+ATTEMPTS = 3  # pogingen per provider bij tijdelijke fouten
 
 SYSTEM = (
     "Je bent een behulpzame assistent van de Omega AI-Holding en werkt samen met Omega (bridge, scripts, NUC). "
@@ -48,168 +22,130 @@ SYSTEM = (
     "Voor handelingen die Omega of de omgeving wijzigen (herstarten, sync, scripts die iets stoppen of starten) moet je EERST toestemming vragen: roep request_user_approval(omschrijving, script_name) aan en zeg tegen de gebruiker dat hij 'ja' of 'goedkeuren' moet zeggen; voer run_safe_script dan niet direct uit. Alleen check_zwartehand en check_telegram_token_env mag je direct met run_safe_script doen. "
     "Voor marketingvragen kun je get_soul_context(agent_id) aanroepen met trend_hunter, copy_architect, visual_strategist, seo_analyst of lead_gen om de specialist-context in te laden. "
     "Gebruik update_evomap_state(agent_id, new_task, status) om het Evomap-dashboard live bij te werken wanneer een agent van taak of status verandert (agent_id: omega, trend_hunter, copy_architect, visual_strategist, seo_analyst, lead_gen). "
-    "Gebruik query_memory(vraag) voor het lange-termijngeheugen. "
+    "Gebruik query_memory(vraag) voor het lange-termijngeheugen en search_everything(zoekterm) om notities, taken en missies op trefwoord te vinden. "
     "Voor een nieuwe afdeling: eerst request_user_approval('Nieuwe afdeling: <naam>', 'spawn_new_agent', agent_name=..., role=..., parent_node='omega'); na 'ja' wordt spawn_new_agent uitgevoerd. "
     "Nieuwe of gewijzigde scripts eerst audit_code(pad) aanroepen; bij ernstige bevindingen run_in_sandbox(script_path, timeout_sec) voor een veilige test. Alleen na goedkeuring in productie draaien. "
-    "Tools: git_commit, save_task, complete_task, list_tasks, write_note, list_notes, read_note, run_ollama, system_status, request_user_approval, run_safe_script, audit_code, run_in_sandbox, get_soul_context, update_evomap_state, query_memory, spawn_new_agent, container_list, container_logs, container_restart, create_subdomain."
+    "Tools: git_commit, save_task, complete_task, list_tasks, write_note, list_notes, read_note, search_everything, run_ollama, system_status, request_user_approval, run_safe_script, audit_code, run_in_sandbox, get_soul_context, update_evomap_state, query_memory, spawn_new_agent, container_list, container_logs, container_restart, create_subdomain."
+)
+
+
+def _circuit_breaker_message() -> str | None:
+    """Circuit Breaker (Supremacy): melding als de daglimiet API-kosten bereikt is, anders None."""
+    try:
+        from mission_control import circuit_breaker_ok, get_daily_spend
+        if not circuit_breaker_ok():
+            spend, limit = get_daily_spend()
+            return f"⛔ Circuit breaker: daglimiet bereikt (€{spend:.2f} / €{limit:.0f}). Stel mission_control state.spend_limit_eur hoger of wacht tot morgen."
+    except ImportError:
+        pass
+    return None
+
+
+@contextmanager
+def _approval_context(chat_id: int | None):
+    """Context voor toestemming (Omega-handelingen): request_user_approval weet zo naar welke chat."""
+    from ai_tools import approval_chat_id
+
+    token = approval_chat_id.set(str(chat_id)) if chat_id is not None else None
+    try:
+        yield
+    finally:
+        if token is not None:
+            approval_chat_id.reset(token)
+
+
+def _request(messages: list[dict], tools: bool = True, max_tokens: int = 1024) -> llm_engine.Request:
+    import gemini_tools
+    return llm_engine.Request(messages, max_tokens=max_tokens, tools=gemini_tools.OMEGA_TOOLS if tools else ())
+
+
+NO_REPLY = (
+    "AI reageert niet na meerdere pogingen (Gemini + Ollama). "
+    "Probeer het over een minuut opnieuw, of stel een kortere vraag. "
+    "Controleer .env: GOOGLE_API_KEY; Ollama: ollama run llama3:8b"
 )
 
 
 def get_ai_reply(user_message: str, max_length: int = 3500, chat_id: int | None = None) -> str:
     """
     Stuur user_message naar de AI en geef het antwoord terug.
-    chat_id: optioneel Telegram chat-id voor toestemmingsflow (Omega-handelingen).
+    chat_id: optioneel Telegram chat-id voor toestemmingsflow (Omega-handelingen) en conversatiegeheugen (chat_memory).
     Volgorde: Gemini (GOOGLE_API_KEY) → OpenAI → Ollama.
     """
     if not user_message or not user_message.strip():
         return "Stuur een bericht om een antwoord te krijgen."
 
     msg = user_message.strip()
-    _ensure_env_loaded()
+    llm_engine.ensure_env()
 
-    # Circuit Breaker (Supremacy): daglimiet API-kosten
-    try:
-        from mission_control import circuit_breaker_ok, record_spend, get_daily_spend
-        if not circuit_breaker_ok():
-            spend, limit = get_daily_spend()
-            return f"⛔ Circuit breaker: daglimiet bereikt (€{spend:.2f} / €{limit:.0f}). Stel mission_control state.spend_limit_eur hoger of wacht tot morgen."
-    except ImportError:
-        pass
+    blocked = _circuit_breaker_message()
+    if blocked:
+        return blocked
+
+    import chat_memory
+    ctx = chat_memory.load(chat_id)
+    with _approval_context(chat_id):
+        result = llm_engine.complete(llm_engine.chain("chat"), _request(chat_memory.messages(SYSTEM, ctx, msg)),
+                                     attempts=ATTEMPTS, agent_id="telegram")
+    if not result["ok"]:
+        return NO_REPLY
+    out = result["content"]
+    chat_memory.remember(chat_id, msg, out)
+    return out[:max_length] if len(out) > max_length else out
+
+
+def stream_ai_reply(user_message: str, max_length: int = 3500, chat_id: int | None = None):
+    """
+    Streaming-variant van get_ai_reply: levert tekst-delta's zodra de provider ze stuurt.
+    Zelfde volgorde (Gemini → OpenAI → Ollama) en hetzelfde conversatiegeheugen; retries alleen vóór de eerste delta.
+    Valt een provider halverwege weg, dan volgt llm_stream.RESET en begint de volgende provider opnieuw.
+    Wil Gemini een tool aanroepen, dan wordt die beurt niet-streamend afgehandeld (zelfde pad als get_ai_reply).
+    Blokkerend: bedoeld om in een thread te consumeren (zie telegram_stream.render).
+    """
+    import chat_memory
+    import llm_stream
 
-    # 1. Gemini (gratis tier, goede kwaliteit — GOOGLE_API_KEY van aistudio.google.com)
-    api_key = (os.environ.get("GOOGLE_API_KEY") or os.environ.get("GEMINI_API_KEY") or "").strip()
-    if api_key:
-        try:
-            import google.generativeai as genai
-            from ai_tools import (
-                git_commit, save_task, write_note, run_ollama,
-                list_tasks, complete_task, list_notes, read_note,
-                system_status, run_safe_script, request_user_approval,
-                audit_code, run_in_sandbox,
-                get_soul_context, update_evomap_state, query_memory,
-                spawn_new_agent,
-                container_list, container_logs, container_restart,
-                create_subdomain,
-                approval_chat_id,
-            )
-
-            genai.configure(api_key=api_key)
-            model_name = os.environ.get("GEMINI_MODEL", "gemini-2.0-flash")
-            # Context voor toestemming (Omega-handelingen)
-            token = None
-            if chat_id is not None:
-                token = approval_chat_id.set(str(chat_id))
-            try:
-                decls = [
-                    genai.types.FunctionDeclaration.from_function(git_commit),
-                    genai.types.FunctionDeclaration.from_function(save_task),
-                    genai.types.FunctionDeclaration.from_function(list_tasks),
-                    genai.types.FunctionDeclaration.from_function(complete_task),
-                    genai.types.FunctionDeclaration.from_function(write_note),
-                    genai.types.FunctionDeclaration.from_function(list_notes),
-                    genai.types.FunctionDeclaration.from_function(read_note),
-                    genai.types.FunctionDeclaration.from_function(run_ollama),
-                    genai.types.FunctionDeclaration.from_function(system_status),
-                    genai.types.FunctionDeclaration.from_function(request_user_approval),
-                    genai.types.FunctionDeclaration.from_function(run_safe_script),
-                    genai.types.FunctionDeclaration.from_function(get_soul_context),
-                    genai.types.FunctionDeclaration.from_function(update_evomap_state),
-                    genai.types.FunctionDeclaration.from_function(query_memory),
-                    genai.types.FunctionDeclaration.from_function(spawn_new_agent),
-                    genai.types.FunctionDeclaration.from_function(audit_code),
-                    genai.types.FunctionDeclaration.from_function(run_in_sandbox),
-                    genai.types.FunctionDeclaration.from_function(container_list),
-                    genai.types.FunctionDeclaration.from_function(container_logs),
-                    genai.types.FunctionDeclaration.from_function(container_restart),
-                    genai.types.FunctionDeclaration.from_function(create_subdomain),
-                ]
-                tool = genai.types.Tool(function_declarations=decls)
-                model = genai.GenerativeModel(
-                    model_name,
-                    tools=[tool],
-                    system_instruction=SYSTEM,
-                    generation_config=genai.types.GenerationConfig(max_output_tokens=1024),
-                )
-                chat = model.start_chat(enable_automatic_function_calling=True)
-                r = None
-                for _ in range(GEMINI_RETRIES):
-                    try:
-                        r = chat.send_message(msg)
-                        if r and r.text:
-                            break
-                    except Exception as e:
-                        logger.warning("Gemini attempt failed: %s", e)
-                        time.sleep(GEMINI_RETRY_DELAY)
-                if r and r.text:
-                    try:
-                        record_spend(0.001)  # ~€0.001 per Gemini call (gratis tier)
-                    except Exception:
-                        pass
-                    out = r.text.strip()
-                    return out[:max_length] if len(out) > max_length else out
-            finally:
-                if token is not None:
-                    approval_chat_id.reset(token)
-        except ImportError:
-            logger.warning("Gemini: pip install google-generativeai")
-        except Exception as e:
-            logger.warning("Gemini call failed: %s", e)
-
-    # 2. OpenAI (als OPENAI_API_KEY gezet is)
-    api_key = os.environ.get("OPENAI_API_KEY", "").strip()
-    if api_key and not api_key.startswith("sk-xxx"):
-        try:
-            from openai import OpenAI
-            client = OpenAI(api_key=api_key)
-            r = client.chat.completions.create(
-                model=os.environ.get("OPENAI_MODEL", "gpt-4o-mini"),
-                messages=[
-                    {"role": "system", "content": SYSTEM},
-                    {"role": "user", "content": msg},
-                ],
-                max_tokens=1024,
-            )
-            if r.choices and r.choices[0].message and r.choices[0].message.content:
-                try:
-                    from mission_control import record_spend
-                    record_spend(0.01)  # ~€0.01 per OpenAI call
-                except Exception:
-                    pass
-                out = r.choices[0].message.content.strip()
-                return out[:max_length] if len(out) > max_length else out
-        except Exception as e:
-            logger.warning("OpenAI call failed: %s", e)
-
-    # 3. Ollama (fallback, met retry)
-    import requests
-    url = os.environ.get("OLLAMA_HOST", "http://localhost:11434").rstrip("/")
-    model = os.environ.get("OLLAMA_MODEL", "llama3.2:3b")
-    if ":" not in model:
-        model = "llama3.2:3b"
-    for _ in range(OLLAMA_RETRIES):
-        try:
-            resp = requests.post(
-                f"{url}/api/chat",
-                json={
-                    "model": model,
-                    "messages": [
-                        {"role": "system", "content": SYSTEM},
-                        {"role": "user", "content": msg},
-                    ],
-                    "stream": False,
-                },
-                timeout=OLLAMA_TIMEOUT,
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            content = (data.get("message") or {}).get("content") or ""
-            out = content.strip()
-            return out[:max_length] if len(out) > max_length else out
-        except Exception as e:
-            logger.warning("Ollama call failed: %s", e)
-            time.sleep(OLLAMA_RETRY_DELAY)
-    return (
-        "AI reageert niet na meerdere pogingen (Gemini + Ollama). "
-        "Probeer het over een minuut opnieuw, of stel een kortere vraag. "
-        "Controleer .env: GOOGLE_API_KEY; Ollama: ollama run llama3:8b"
-    )
+    if not user_message or not user_message.strip():
+        yield "Stuur een bericht om een antwoord te krijgen."
+        return
+    msg = user_message.strip()
+    llm_engine.ensure_env()
+    blocked = _circuit_breaker_message()
+    if blocked:
+        yield blocked
+        return
+
+    ctx = chat_memory.load(chat_id)
+    req = _request(chat_memory.messages(SYSTEM, ctx, msg))
+    parts: list[str] = []
+    emitted = 0
+    with _approval_context(chat_id):
+        for delta in llm_engine.stream(llm_engine.chain("chat"), req, attempts=ATTEMPTS, agent_id="telegram"):
+            if delta is llm_stream.RESET:
+                if emitted:
+                    yield delta
+                parts, emitted = [], 0
+                continue
+            parts.append(delta)
+            delta = delta[:max_length - emitted]
+            if delta:
+                emitted += len(delta)
+                yield delta
+    if not emitted:
+        yield NO_REPLY
+        return
+    chat_memory.remember(chat_id, msg, "".join(parts).strip())
+
+
+def complete(system: str, prompt: str, max_tokens: int = 512) -> str | None:
+    """
+    Eenvoudige completion zonder tools en zonder geheugen (bijv. samenvattingen voor chat_memory).
+    Zelfde providervolgorde, één poging per provider; None als geen enkele provider antwoordt.
+    """
+    llm_engine.ensure_env()
+    if _circuit_breaker_message():
+        return None
+    messages = [{"role": "system", "content": system}, {"role": "user", "content": prompt}]
+    result = llm_engine.complete(llm_engine.chain("chat"), _request(messages, tools=False, max_tokens=max_tokens),
+                                 agent_id="chat_memory")
+    return result["content"] if result["ok"] else None
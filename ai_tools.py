@@ -46,15 +46,15 @@ def write_note(titel: str, inhoud: str) -> dict:
 def run_ollama(opdracht: str) -> dict:
     """Voer een opdracht uit via Ollama (lokaal model). Gebruik voor rekenen, code, of taken die de AI zelf moet uitvoeren."""
     try:
-        import requests
+        import omega_http
         url = os.environ.get("OLLAMA_HOST", "http://localhost:11434").rstrip("/")
         model = os.environ.get("OLLAMA_MODEL", "llama3.2:3b")
         if ":" not in model:
             model = "llama3.2:3b"
-        r = requests.post(
+        r = omega_http.post(
             f"{url}/api/chat",
+            read_timeout=90,
             json={"model": model, "messages": [{"role": "user", "content": opdracht}], "stream": False},
-            timeout=90,
         )
         r.raise_for_status()
         out = (r.json().get("message") or {}).get("content") or ""
@@ -113,11 +113,30 @@ def read_note(filename: str) -> dict:
             if q in nid or q in ntitle or q_norm in nid or q_norm in ntitle:
                 n = note
                 break
+    if not n:
+        # Oudere notities: beste FTS5-treffer op de titel (id's als 20250211_123456_titel.txt worden woorden via _)
+        hits = omega_db.search(filename.replace("_", " ").removesuffix(".txt"), kinds=("note",), limit=1,
+                               title_only=True)
+        if hits:
+            n = omega_db.note_get(hits[0]["id"])
     if not n:
         return {"ok": False, "error": "Notitie niet gevonden of ongeldig id."}
     return {"ok": True, "content": (n.get("content") or "")[:4000], "filename": n.get("id", filename)}
 
 
+def search_everything(query: str, kinds: str = "", limit: int = 10) -> dict:
+    """
+    Zoek full-text in notities, taken, missies (titel + resultaat) en holding-taken. Gebruik als de gebruiker
+    iets zoekt of vraagt waar iets stond. kinds: komma-gescheiden subset van note, task, mission, holding_task (leeg = alles).
+    """
+    import omega_db
+    omega_db.init_schema()
+    kind_list = [k.strip() for k in (kinds or "").split(",") if k.strip()]
+    hits = omega_db.search(query, kinds=kind_list, limit=max(1, min(int(limit or 10), 50)))
+    return {"ok": True, "results": hits, "count": len(hits),
+            "message": f"{len(hits)} resultaat/resultaten" if hits else "Niets gevonden."}
+
+
 # --- Status en scripts (NUC / 24/7) ---
 
 def system_status() -> dict:
@@ -649,11 +668,13 @@ def get_soul_context(agent_id: str) -> dict:
     if not safe_id:
         return {"ok": False, "error": "Ongeldige agent_id."}
     # 1) data/souls (marketing swarm)
+    # Inhoud via omega_cache: alleen opnieuw lezen als mtime/grootte van het bestand verandert
+    import omega_cache
     souls_dir = ROOT / "data" / "souls"
     path = (souls_dir / f"{safe_id}_SOUL.md").resolve()
     if path.is_file() and str(path).startswith(str(souls_dir.resolve())):
         try:
-            content = path.read_text(encoding="utf-8")
+            content = omega_cache.read_text(path) or ""
             return {"ok": True, "content": content[:8000], "agent_id": safe_id}
         except Exception as e:
             return {"ok": False, "error": str(e)}
@@ -661,7 +682,7 @@ def get_soul_context(agent_id: str) -> dict:
     dept_soul = (ROOT / "holding" / "departments" / safe_id / "SOUL.md").resolve()
     if dept_soul.is_file() and str(dept_soul).startswith(str((ROOT / "holding" / "departments").resolve())):
         try:
-            content = dept_soul.read_text(encoding="utf-8")
+            content = omega_cache.read_text(dept_soul) or ""
             return {"ok": True, "content": content[:8000], "agent_id": safe_id}
         except Exception as e:
             return {"ok": False, "error": str(e)}
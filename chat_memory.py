@@ -0,0 +1,170 @@
+"""
+Omega AI-Holding — Conversatiegeheugen per Telegram chat_id (omega_db.chat_turns / chat_summaries).
+Context per bericht = samenvatting van oudere beurten + de nieuwste beurten binnen CONTEXT_TOKENS
+(hooguit MAX_TURNS), zodat prompts begrensd blijven en de gebruiker zich niet hoeft te herhalen.
+Loopt het opgeslagen gesprek over het venster heen, dan vat een achtergrondthread de oudste beurten samen
+(via ai_chat_retries.complete, zonder tools) tot er een half venster over is; één samenvatting tegelijk per chat.
+Werkt voor alle providers: messages() levert OpenAI-formaat; llm_engine zet dat zo nodig om (Gemini-history).
+Tokens zijn geschat (≈ 4 tekens per token), net als in llm_engine.
+"""
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+import omega_db
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("OMEGA_CHAT_MEMORY", "1").strip().lower() not in ("0", "false", "no")
+CONTEXT_TOKENS = int(os.environ.get("OMEGA_CHAT_CONTEXT_TOKENS", "1500") or 1500)
+MAX_TURNS = int(os.environ.get("OMEGA_CHAT_MAX_TURNS", "12") or 12)
+SUMMARY_TOKENS = int(os.environ.get("OMEGA_CHAT_SUMMARY_TOKENS", "300") or 300)
+TURN_CHARS_IN_SUMMARY = 2000  # per beurt max. zoveel tekens naar de samenvatter
+
+SUMMARY_SYSTEM = (
+    "Je vat een lopend gesprek tussen een gebruiker en de Omega-assistent samen, in het Nederlands. "
+    "Bewaar feiten, besluiten, namen, open vragen en voorkeuren van de gebruiker; laat beleefdheden weg. "
+    f"Maximaal {SUMMARY_TOKENS * 3} tekens, geen inleiding."
+)
+
+
+@dataclass
+class Context:
+    summary: str = ""
+    turns: list[dict] = field(default_factory=list)  # oudste eerst: {"id", "role", "content", "tokens"}
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def _window(turns: list[dict], budget: int, max_turns: int) -> list[dict]:
+    """Nieuwste beurten die samen binnen budget passen, oudste eerst; begint altijd bij een user-beurt."""
+    window: list[dict] = []
+    for turn in reversed(turns[-max_turns:] if max_turns > 0 else []):
+        if turn["tokens"] > budget:
+            break
+        budget -= turn["tokens"]
+        window.append(turn)
+    window.reverse()
+    while window and window[0]["role"] != "user":
+        window.pop(0)
+    return window
+
+
+def load(chat_id: Any) -> Context:
+    """Samenvatting + venster voor deze chat; lege Context zonder chat_id, bij uitgeschakeld geheugen of DB-fout."""
+    if not ENABLED or chat_id is None:
+        return Context()
+    try:
+        omega_db.init_schema()
+        summary = omega_db.chat_summary_get(str(chat_id))
+        turns = omega_db.chat_turns_recent(str(chat_id), MAX_TURNS)
+    except Exception as e:
+        logger.debug("chat memory load: %s", e)
+        return Context()
+    budget = CONTEXT_TOKENS - (summary["tokens"] if summary else 0)
+    return Context(summary=summary["summary"] if summary else "", turns=_window(turns, budget, MAX_TURNS))
+
+
+def messages(system: str, ctx: Context, user_message: str) -> list[dict]:
+    """Chat-messages (OpenAI/Ollama-formaat): system, samenvatting, venster, nieuw bericht."""
+    out = [{"role": "system", "content": system}]
+    if ctx.summary:
+        out.append({"role": "system", "content": f"Samenvatting van het eerdere gesprek:\n{ctx.summary}"})
+    out.extend({"role": t["role"], "content": t["content"]} for t in ctx.turns)
+    out.append({"role": "user", "content": user_message})
+    return out
+
+
+def remember(chat_id: Any, user_message: str, reply: str) -> None:
+    """Sla vraag + antwoord op en start zo nodig een samenvatting op de achtergrond."""
+    if not ENABLED or chat_id is None or not reply:
+        return
+    try:
+        omega_db.init_schema()
+        omega_db.chat_turns_append(str(chat_id), [
+            ("user", user_message, estimate_tokens(user_message)),
+            ("assistant", reply, estimate_tokens(reply)),
+        ])
+        stats = omega_db.chat_turns_stats(str(chat_id))
+        summary = omega_db.chat_summary_get(str(chat_id))
+    except Exception as e:
+        logger.debug("chat memory remember: %s", e)
+        return
+    if stats["turns"] > MAX_TURNS or stats["tokens"] + (summary["tokens"] if summary else 0) > CONTEXT_TOKENS:
+        _start_summary(str(chat_id))
+
+
+def forget(chat_id: Any) -> int:
+    """Wis het geheugen van deze chat (/vergeet). Retourneert het aantal verwijderde beurten."""
+    omega_db.init_schema()
+    return omega_db.chat_forget(str(chat_id))
+
+
+# ——— Samenvatten (achtergrond) ———
+
+_running: set[str] = set()
+_running_lock = threading.Lock()
+
+
+def _default_summarizer(prompt: str) -> Optional[str]:
+    from ai_chat_retries import complete
+    return complete(SUMMARY_SYSTEM, prompt, max_tokens=SUMMARY_TOKENS * 2)
+
+
+summarizer: Callable[[str], Optional[str]] = _default_summarizer
+
+
+def _start_summary(chat_id: str) -> None:
+    with _running_lock:
+        if chat_id in _running:
+            return
+        _running.add(chat_id)
+    threading.Thread(target=_summarize, args=(chat_id,), name=f"chat-summary-{chat_id}", daemon=True).start()
+
+
+def _summary_prompt(previous: str, turns: list[dict]) -> str:
+    lines = []
+    if previous:
+        lines += ["Bestaande samenvatting:", previous, ""]
+    lines.append("Nieuwe gespreksbeurten:")
+    for t in turns:
+        who = "Gebruiker" if t["role"] == "user" else "Assistent"
+        lines.append(f"{who}: {t['content'][:TURN_CHARS_IN_SUMMARY]}")
+    lines += ["", "Schrijf één bijgewerkte samenvatting die de bestaande en de nieuwe beurten samenneemt."]
+    return "\n".join(lines)
+
+
+def summarize_now(chat_id: str) -> bool:
+    """Vat alle beurten buiten een half venster samen (blokkerend). True als er een samenvatting is opgeslagen."""
+    summary = omega_db.chat_summary_get(chat_id)
+    turns = omega_db.chat_turns_recent(chat_id, MAX_TURNS * 4)
+    keep = _window(turns, CONTEXT_TOKENS // 2 - (summary["tokens"] if summary else 0), MAX_TURNS // 2)
+    keep_from = keep[0]["id"] if keep else (turns[-1]["id"] + 1 if turns else 0)
+    old = omega_db.chat_turns_before(chat_id, keep_from, limit=500)
+    if not old:
+        return False
+    text = (summarizer(_summary_prompt(summary["summary"] if summary else "", old)) or "").strip()
+    if not text:
+        return False
+    text = text[:SUMMARY_TOKENS * 4]
+    removed = omega_db.chat_summary_set(chat_id, text, estimate_tokens(text), old[-1]["id"])
+    if not removed:
+        # Chat is tijdens het samenvatten gewist (/vergeet): samenvatting weggooien
+        logger.info("Chat %s: gewist tijdens samenvatten, samenvatting niet opgeslagen", chat_id)
+        return False
+    logger.info("Chat %s: %d beurten samengevat (%d tokens)", chat_id, removed, estimate_tokens(text))
+    return True
+
+
+def _summarize(chat_id: str) -> None:
+    try:
+        summarize_now(chat_id)
+    except Exception as e:
+        logger.warning("Chat-samenvatting %s mislukt: %s", chat_id, e)
+    finally:
+        with _running_lock:
+            _running.discard(chat_id)
@@ -34,34 +34,39 @@ try:
 except Exception:
     pass
 
-def _read_mission_control_fresh():
-    """Lees mission state uit omega_db (geen cache)."""
-    try:
-        from mission_control import load_state
-        return load_state()
-    except Exception:
-        return {"missions": [], "state": {}}
+# ——— OpenClaw mission_control (geen @st.cache — cache uit voor live data) ———
+# Kanban: filteren + sorteren in SQL (omega_db indexes), niet alle missies laden
+KANBAN_LIMIT = 50
 
+def _mc_queued(limit=KANBAN_LIMIT):
+    from mission_control import get_queued_missions
+    return get_queued_missions(limit=limit)
 
-# ——— OpenClaw mission_control (geen @st.cache — cache uit voor live data) ———
-def _load_mc_state():
-    return _read_mission_control_fresh()
+def _mc_in_progress(limit=KANBAN_LIMIT):
+    from mission_control import get_in_progress_missions
+    return get_in_progress_missions(limit=limit)
 
-def _mc_queued(): return [m for m in _load_mc_state().get("missions", []) if m.get("status") == "QUEUED"]
-def _mc_in_progress(): return [m for m in _load_mc_state().get("missions", []) if m.get("status") == "IN_PROGRESS"]
-def _mc_completed(limit=20): return sorted([m for m in _load_mc_state().get("missions", []) if m.get("status") == "COMPLETED"], key=lambda x: x.get("updated_at") or "", reverse=True)[:limit]
+def _mc_completed(limit=20):
+    from mission_control import get_completed_missions
+    return get_completed_missions(limit=limit)
+
+def _mc_kanban(completed_limit=15):
+    """Queue / in progress / completed uit omega_db; None als er niets is (of omega_db faalt)."""
+    try:
+        kanban = {
+            "queue": _mc_queued(),
+            "in_progress": _mc_in_progress(),
+            "completed": _mc_completed(completed_limit),
+        }
+    except Exception:
+        return None
+    return kanban if any(kanban.values()) else None
 
 # ——— Legacy missions (fallback) ———
 def _load_missions():
-    mc = _load_mc_state()
-    missions = mc.get("missions", [])
-    if missions:
-        q = (lambda s: (s or "").upper() in ("QUEUED", "PENDING"))
-        return {
-            "queue": [m for m in missions if q(m.get("status"))],
-            "in_progress": [m for m in missions if (m.get("status") or "").upper() in ("IN_PROGRESS", "DOING")],
-            "completed": [m for m in missions if (m.get("status") or "").upper() == "COMPLETED"],
-        }
+    kanban = _mc_kanban()
+    if kanban:
+        return kanban
     if not MISSIONS_FILE.exists():
         return {"queue": [], "in_progress": [], "completed": []}
     try:
@@ -392,15 +397,12 @@ if page == "Mission Control":
     st.title("Mission Control")
     st.caption("Agent Orchestration — Deep Space Obsidian")
 
-    # Live sync: elke refresh (5s) JSON VERS inlezen — GEEN cache, pad = /app/data in container
+    # Live sync: elke refresh (5s) vers uit omega_db — GEEN cache; filter/sortering in SQL
     with st.spinner("Missions laden…"):
-        tasks_data = _read_mission_control_fresh()
-    missions_list = tasks_data.get("missions", [])
-    q = lambda s: (s or "").upper() in ("QUEUED", "PENDING")
-    queue = [m for m in missions_list if q(m.get("status"))]
-    in_progress = [m for m in missions_list if (m.get("status") or "").upper() in ("IN_PROGRESS", "DOING")]
-    completed = sorted([m for m in missions_list if (m.get("status") or "").upper() == "COMPLETED"], key=lambda x: x.get("updated_at") or "", reverse=True)[:10]
-    use_mc = bool(missions_list)
+        kanban = _mc_kanban(completed_limit=10)
+    use_mc = kanban is not None
+    kanban = kanban or {"queue": [], "in_progress": [], "completed": []}
+    queue, in_progress, completed = kanban["queue"], kanban["in_progress"], kanban["completed"]
 
     col_q, col_ip, col_done = st.columns(3)
     place_q = col_q.empty()
@@ -477,15 +479,16 @@ if page == "Mission Control":
     try:
         import omega_db
         omega_db.init_schema()
-        points = omega_db.heartbeat_list(limit=24 * 60)
+        cutoff = int((datetime.now(timezone.utc) - timedelta(hours=24)).timestamp())
+        points = omega_db.heartbeat_list(limit=24 * 60, since=cutoff)
         if points:
-            cutoff = (datetime.now(timezone.utc) - timedelta(hours=24)).timestamp()
-            points = [p for p in points if p.get("ts", 0) >= cutoff]
-            if points:
-                import pandas as pd
-                df = pd.DataFrame(points)
-                df["time"] = pd.to_datetime(df["ts"], unit="s")
-                st.line_chart(df.set_index("time")[["ok"]])
+            import pandas as pd
+            df = pd.DataFrame(points)
+            df["time"] = pd.to_datetime(df["ts"], unit="s")
+            st.line_chart(df.set_index("time")[["ok"]])
+        uptime = omega_db.heartbeat_uptime(days=30)
+        if uptime["uptime_pct"] is not None:
+            st.metric("Uptime (30 dagen)", f"{uptime['uptime_pct']:.2f}%")
     except Exception:
         pass
 
@@ -0,0 +1,79 @@
+"""
+Omega AI-Holding — Procesbrede registry voor Gemini function calling (ai_chat, ai_chat_retries).
+FunctionDeclaration.from_function introspecteert elke tool (signature + docstring); dat gebeurt nu één keer
+per proces per toolset in plaats van per bericht. Het GenerativeModel is een configuratie-object
+(de chat-sessie komt per bericht uit start_chat) en wordt hergebruikt per (model, hash van de system prompt, toolset).
+genai.configure draait alleen opnieuw als de API key verandert.
+"""
+import hashlib
+import threading
+from typing import Any
+
+OMEGA_TOOLS = (
+    "git_commit", "save_task", "list_tasks", "complete_task", "write_note", "list_notes", "read_note",
+    "search_everything", "run_ollama", "system_status", "request_user_approval", "run_safe_script",
+    "get_soul_context", "update_evomap_state", "query_memory", "spawn_new_agent", "audit_code",
+    "run_in_sandbox", "container_list", "container_logs", "container_restart", "create_subdomain",
+)
+HOLDING_TOOLS = ("create_holding_task", "get_holding_status", "review_holding_task")
+
+_lock = threading.Lock()
+_tools: dict[tuple, Any] = {}
+_models: dict[tuple, Any] = {}
+_configured_key: str | None = None
+
+
+def _system_hash(system: str) -> str:
+    return hashlib.sha256(system.encode("utf-8")).hexdigest()[:16]
+
+
+def configure(genai: Any, api_key: str) -> None:
+    """genai.configure, maar alleen bij de eerste aanroep of een andere key."""
+    global _configured_key
+    if api_key == _configured_key:
+        return
+    with _lock:
+        if api_key != _configured_key:
+            genai.configure(api_key=api_key)
+            _configured_key = api_key
+
+
+def tool(genai: Any, names: tuple = OMEGA_TOOLS) -> Any:
+    """genai Tool met de FunctionDeclarations van ai_tools.<naam> voor elke naam (gecachet per toolset)."""
+    t = _tools.get(names)
+    if t is None:
+        import ai_tools
+        with _lock:
+            t = _tools.get(names)
+            if t is None:
+                decls = [genai.types.FunctionDeclaration.from_function(getattr(ai_tools, name)) for name in names]
+                t = _tools[names] = genai.types.Tool(function_declarations=decls)
+    return t
+
+
+def model(genai: Any, model_name: str, system: str, names: tuple = OMEGA_TOOLS,
+          max_output_tokens: int = 1024) -> Any:
+    """Gecachet GenerativeModel met tools (names=() → zonder tools) en system prompt; per bericht alleen nog start_chat()."""
+    key = (model_name, _system_hash(system), names, max_output_tokens)
+    m = _models.get(key)
+    if m is None:
+        tools = [tool(genai, names)] if names else None
+        with _lock:
+            m = _models.get(key)
+            if m is None:
+                m = _models[key] = genai.GenerativeModel(
+                    model_name,
+                    tools=tools,
+                    system_instruction=system,
+                    generation_config=genai.types.GenerationConfig(max_output_tokens=max_output_tokens),
+                )
+    return m
+
+
+def clear() -> None:
+    """Vergeet alle gecachte declaraties, modellen en de geconfigureerde key (tests/benchmarks)."""
+    global _configured_key
+    with _lock:
+        _tools.clear()
+        _models.clear()
+        _configured_key = None
@@ -1,19 +1,33 @@
 """
 Agent Registry — beheer van holding agents (DB + config).
 Seed 6 agents (3 per tenant) bij eerste run.
+Tenants, agents per tenant en agents per skill komen uit een read-through cache (omega_cache);
+omega_db invalideert die bij inserts; een statuswissel invalideert alleen de agentlijst van die tenant.
+refresh_prompts invalideert hier.
 """
 from __future__ import annotations
 
 import logging
+import threading
 from pathlib import Path
 from typing import Optional
 
+import omega_cache
 import omega_db
 from holding.src.tenant_context import load_tenant_configs
 
 logger = logging.getLogger(__name__)
 PROMPTS_DIR = Path(__file__).resolve().parent / "prompts"
 
+_tenant_cache = omega_cache.cache("tenants")
+_agent_cache = omega_cache.cache("holding_agents")
+_skill_cache = omega_cache.cache("holding_agent_skills")
+_load_cache = omega_cache.cache(omega_db.LOAD_CACHE, ttl=omega_db.LOAD_CACHE_TTL)
+
+# Scoring bij toewijzing (zie get_agent_for_task)
+OPEN_TASK_PENALTY = 0.25
+BUSY_PENALTY = 0.5
+
 SEED_AGENTS = [
     # ── Lunchroom ──
     dict(id="lr_manager", tenant_id="lunchroom", name="Lunchroom Marketing Director",
@@ -71,41 +85,44 @@ def _load_prompt(agent_id: str) -> str:
 
 
 def seed_tenants_and_agents() -> dict:
-    """Seed tenants + agents als ze nog niet bestaan. Idempotent."""
+    """Seed tenants + agents als ze nog niet bestaan. Idempotent; alles in één batch-transactie."""
     omega_db.init_schema()
     tenants_cfg = load_tenant_configs()
+    existing_tenants = {t["id"] for t in omega_db.tenant_list()}
+    existing_agents = {a["id"] for a in omega_db.holding_agent_list()}
 
     seeded_tenants = 0
-    for tid, cfg in tenants_cfg.items():
-        if not omega_db.tenant_get(tid):
-            omega_db.tenant_insert(
-                tenant_id=cfg["id"], name=cfg["name"], tenant_type=cfg["type"],
-                brand_voice=cfg.get("brand_voice", ""),
-                target_audience=cfg.get("target_audience", ""),
-                industry=cfg.get("industry", ""),
-            )
-            seeded_tenants += 1
-
     seeded_agents = 0
-    for agent_def in SEED_AGENTS:
-        if not omega_db.holding_agent_get(agent_def["id"]):
-            prompt = _load_prompt(agent_def["id"])
-            omega_db.holding_agent_insert(
-                agent_id=agent_def["id"],
-                tenant_id=agent_def["tenant_id"],
-                name=agent_def["name"],
-                role=agent_def["role"],
-                specialization=agent_def.get("specialization", ""),
-                skills=agent_def.get("skills"),
-                model=agent_def.get("model", "gemini"),
-                parent_agent_id=agent_def.get("parent_agent_id"),
-                confidence_threshold=agent_def.get("confidence_threshold", 0.8),
-                system_prompt=prompt,
-            )
-            seeded_agents += 1
-
-    omega_db.holding_audit_log("seed", details={
-        "tenants_created": seeded_tenants, "agents_created": seeded_agents})
+    with omega_db.batch() as b:
+        for tid, cfg in tenants_cfg.items():
+            if tid not in existing_tenants:
+                b.tenant_insert(
+                    tenant_id=cfg["id"], name=cfg["name"], tenant_type=cfg["type"],
+                    brand_voice=cfg.get("brand_voice", ""),
+                    target_audience=cfg.get("target_audience", ""),
+                    industry=cfg.get("industry", ""),
+                )
+                seeded_tenants += 1
+
+        for agent_def in SEED_AGENTS:
+            if agent_def["id"] not in existing_agents:
+                prompt = _load_prompt(agent_def["id"])
+                b.holding_agent_insert(
+                    agent_id=agent_def["id"],
+                    tenant_id=agent_def["tenant_id"],
+                    name=agent_def["name"],
+                    role=agent_def["role"],
+                    specialization=agent_def.get("specialization", ""),
+                    skills=agent_def.get("skills"),
+                    model=agent_def.get("model", "gemini"),
+                    parent_agent_id=agent_def.get("parent_agent_id"),
+                    confidence_threshold=agent_def.get("confidence_threshold", 0.8),
+                    system_prompt=prompt,
+                )
+                seeded_agents += 1
+
+        b.holding_audit_log("seed", details={
+            "tenants_created": seeded_tenants, "agents_created": seeded_agents})
     return {"tenants": seeded_tenants, "agents": seeded_agents}
 
 
@@ -124,28 +141,103 @@ def refresh_prompts() -> int:
                     "UPDATE holding_agents SET system_prompt = ? WHERE id = ?",
                     (prompt, agent_def["id"]))
             updated += 1
+    if updated:
+        omega_cache.invalidate(*omega_db.AGENT_CACHES)
     return updated
 
 
-def get_agent_for_task(tenant_id: str, task_type: str) -> Optional[dict]:
-    """Vind de beste beschikbare werker-agent voor een taaktype."""
-    agents = omega_db.holding_agent_list(tenant_id)
-    for agent in agents:
-        if agent["role"] not in ("werker",):
-            continue
-        if agent["status"] == "offline":
-            continue
-        skills = agent.get("skills") or []
-        if task_type in skills or any(task_type in s for s in skills):
+def get_tenant(tenant_id: str) -> Optional[dict]:
+    """Tenant-rij (gecachet)."""
+    return _tenant_cache.get(tenant_id, lambda: omega_db.tenant_get(tenant_id))
+
+
+def list_agents(tenant_id: str) -> list[dict]:
+    """Alle agents van een tenant, skills al JSON-gedecodeerd (gecachet)."""
+    return _agent_cache.get(tenant_id, lambda: omega_db.holding_agent_list(tenant_id))
+
+
+def get_agent(agent_id: str, tenant_id: str) -> Optional[dict]:
+    """Agent op id binnen een tenant (gecachet)."""
+    for agent in list_agents(tenant_id):
+        if agent["id"] == agent_id:
             return agent
-    workers = [a for a in agents if a["role"] == "werker" and a["status"] != "offline"]
-    return workers[0] if workers else None
+    return None
+
+
+class SkillIndex:
+    """
+    Inverted index skill → werker-id's voor één tenant. Exacte match is een dict-lookup;
+    deelmatches (task_type als substring van een skill) worden per task_type één keer berekend en onthouden
+    (onder een lock: de index zelf is gedeeld via de cache).
+    Bevat alleen id's: de actuele status komt uit list_agents, zodat een statuswissel de index niet ongeldig maakt.
+    """
+
+    def __init__(self, agents: list[dict]):
+        workers = [a for a in agents if a["role"] == "werker"]
+        self.workers = [a["id"] for a in workers]
+        self.skills = {a["id"]: list(a.get("skills") or []) for a in workers}
+        self.exact: dict[str, list[str]] = {}
+        for agent in workers:
+            for skill in agent.get("skills") or []:
+                self.exact.setdefault(skill, []).append(agent["id"])
+        self._partial: dict[str, list[str]] = {}
+        self._lock = threading.Lock()
+
+    def candidates(self, task_type: str) -> list[str]:
+        """Id's van werkers met exact deze skill, anders met een deelmatch, anders alle werkers."""
+        if task_type in self.exact:
+            return self.exact[task_type]
+        with self._lock:
+            partial = self._partial.get(task_type)
+            if partial is None:
+                partial = [aid for aid in self.workers if any(task_type in s for s in self.skills[aid])]
+                self._partial[task_type] = partial
+        return partial or self.workers
+
+
+def agents_by_skill(tenant_id: str) -> SkillIndex:
+    """Skill-index van een tenant (gecachet; opnieuw opgebouwd bij nieuwe agents of prompts, niet bij een statuswissel)."""
+    return _skill_cache.get(tenant_id, lambda: SkillIndex(list_agents(tenant_id)))
+
+
+def agent_load(tenant_id: str) -> dict[str, dict]:
+    """Open taken + approved/rejected per agent (kort gecachet; holding_task_insert invalideert de tenant). Niet muteren."""
+    return _load_cache.get(tenant_id, lambda: omega_db.holding_agent_load(tenant_id))
+
+
+def _score(agent: dict, load: dict[str, dict]) -> float:
+    """Hoger is beter: goedkeuringsratio (Laplace-gladgestreken) minus straf voor drukte."""
+    stats = load.get(agent["id"]) or {}
+    approved = stats.get("approved", 0)
+    reviewed = approved + stats.get("rejected", 0)
+    approval_rate = (approved + 1) / (reviewed + 2)
+    busy = BUSY_PENALTY if agent.get("status") == "busy" else 0.0
+    return approval_rate - OPEN_TASK_PENALTY * stats.get("open", 0) - busy
+
+
+def get_agent_for_task(tenant_id: str, task_type: str) -> Optional[dict]:
+    """
+    Vind de beste beschikbare werker-agent voor een taaktype.
+    Kandidaten uit de skill-index (exact > deelmatch > alle werkers); daarbinnen de hoogste
+    score op goedkeuringsratio, open taken en busy-status, zodat werk over agents verdeeld wordt.
+    """
+    index = agents_by_skill(tenant_id)
+    current = {a["id"]: a for a in list_agents(tenant_id)}
+
+    def online(ids: list[str]) -> list[dict]:
+        return [current[aid] for aid in ids if aid in current and current[aid]["status"] != "offline"]
+
+    available = online(index.candidates(task_type)) or online(index.workers)
+    if not available:
+        return None
+    load = agent_load(tenant_id)
+    # Een nieuwe taak invalideert agent_load van de tenant, zodat een burst niet allemaal op dezelfde agent landt
+    return max(available, key=lambda a: _score(a, load))
 
 
 def get_auditor(tenant_id: str) -> Optional[dict]:
     """Vind de auditor voor een tenant."""
-    agents = omega_db.holding_agent_list(tenant_id)
-    for agent in agents:
+    for agent in list_agents(tenant_id):
         if agent["role"] == "auditor":
             return agent
     return None
@@ -12,6 +12,7 @@ from typing import Any
 import yaml
 
 import omega_db
+import omega_telemetry
 from holding.src import llm_router
 
 logger = logging.getLogger(__name__)
@@ -33,7 +34,7 @@ def _load_rules() -> dict:
     return _rules
 
 
-async def audit(auditor: dict, task: dict, output: str) -> dict:
+async def audit(auditor: dict, task: dict, output: str, interactive: bool = False) -> dict:
     """
     Laat de auditor-agent de output beoordelen.
     Retourneert: {"confidence": float, "verdict": str, "feedback": str, "severity": str, "issues": list}
@@ -50,7 +51,9 @@ async def audit(auditor: dict, task: dict, output: str) -> dict:
         "Antwoord ALLEEN met geldige JSON."
     )
 
-    raw = await llm_router.generate(auditor, prompt, task["tenant_id"])
+    raw = await llm_router.generate(auditor, prompt, task["tenant_id"],
+                                    priority=task.get("priority") or 5,
+                                    interactive=interactive, task_id=task.get("id"))
     return _parse_review(raw)
 
 
@@ -97,20 +100,20 @@ def apply_review(task_id: str, task: dict, auditor: dict, review: dict) -> dict:
             original_output=str((task.get("output_data") or {}).get("content", ""))[:1000],
             correction="", reason=review.get("feedback", ""),
             severity=review.get("severity", "critical"))
-        omega_db.holding_audit_log("task_escalated", tenant_id=task["tenant_id"],
-                                   agent_id=auditor["id"], details={"task_id": task_id, "review": review})
+        omega_telemetry.log_audit("task_escalated", tenant_id=task["tenant_id"],
+                                  agent_id=auditor["id"], details={"task_id": task_id, "review": review})
         return {"ok": True, "action": "escalated", "review": review}
 
     if confidence >= 0.9 and verdict == "pass":
         omega_db.holding_task_update_status(task_id, "approved", confidence_score=confidence)
-        omega_db.holding_audit_log("task_auto_approved", tenant_id=task["tenant_id"],
-                                   agent_id=auditor["id"], details={"task_id": task_id})
+        omega_telemetry.log_audit("task_auto_approved", tenant_id=task["tenant_id"],
+                                  agent_id=auditor["id"], details={"task_id": task_id})
         return {"ok": True, "action": "approved", "review": review}
 
     if verdict == "pass" and task_type in auto_types:
         omega_db.holding_task_update_status(task_id, "approved", confidence_score=confidence)
-        omega_db.holding_audit_log("task_auto_approved", tenant_id=task["tenant_id"],
-                                   agent_id=auditor["id"], details={"task_id": task_id})
+        omega_telemetry.log_audit("task_auto_approved", tenant_id=task["tenant_id"],
+                                  agent_id=auditor["id"], details={"task_id": task_id})
         return {"ok": True, "action": "approved", "review": review}
 
     omega_db.holding_task_increment_revision(
@@ -121,7 +124,7 @@ def apply_review(task_id: str, task: dict, auditor: dict, review: dict) -> dict:
         original_output=str((task.get("output_data") or {}).get("content", ""))[:1000],
         correction="", reason=review.get("feedback", ""),
         severity=review.get("severity", "minor"))
-    omega_db.holding_audit_log("task_sent_back", tenant_id=task["tenant_id"],
-                               agent_id=auditor["id"],
-                               details={"task_id": task_id, "revision": revision_count + 1})
+    omega_telemetry.log_audit("task_sent_back", tenant_id=task["tenant_id"],
+                              agent_id=auditor["id"],
+                              details={"task_id": task_id, "revision": revision_count + 1})
     return {"ok": True, "action": "sent_back", "review": review}
@@ -8,12 +8,14 @@ import logging
 from typing import Optional
 
 import omega_db
+import omega_telemetry
 
 logger = logging.getLogger(__name__)
 
 
 def summary(tenant_id: str | None = None) -> list[dict]:
-    """Geaggregeerde kosten per tenant/agent/model."""
+    """Geaggregeerde kosten per tenant/agent/model (eerst de write-behind queue leegschrijven)."""
+    omega_telemetry.flush(timeout=1.0)
     return omega_db.cost_log_summary(tenant_id)
 
 
@@ -27,3 +29,17 @@ def total_calls(tenant_id: str | None = None) -> int:
     """Totaal aantal LLM calls optioneel per tenant."""
     rows = summary(tenant_id)
     return sum(r.get("call_count", 0) for r in rows)
+
+
+def cache_savings(tenant_id: str | None = None) -> dict:
+    """Response-cache: hits (zero-token regels in cost_log) en bespaarde tokens volgens llm_cache."""
+    rows = summary(tenant_id)
+    hits = sum(r.get("call_count", 0) for r in rows if (r.get("model_used") or "").startswith("cache/"))
+    calls = sum(r.get("call_count", 0) for r in rows)
+    stats = omega_db.llm_cache_stats(tenant_id)
+    return {
+        "hits": hits,
+        "hit_rate": round(hits / calls, 3) if calls else None,
+        "entries": sum(s.get("entries") or 0 for s in stats),
+        "tokens_saved": sum(s.get("tokens_saved") or 0 for s in stats),
+    }
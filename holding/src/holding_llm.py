@@ -1,7 +1,10 @@
 """
 Holding LLM — multi-provider fallback chain voor holding agents.
 
-Provider volgorde:
+Provider-calls, health, cooldown, limiter en kostenboek zitten in llm_engine (chain "holding");
+hier zitten de holding-specifieke lagen: response-cache, hedging en de holding-audit.
+
+Vaste provider volgorde (startpunt; provider_health herordent op gemeten latency/succes):
   1. Cerebras   (primair)
   2. OpenRouter (secundair, breed)
   3. Gemini     (backup)
@@ -10,284 +13,278 @@ Provider volgorde:
 
 Lege API key → provider wordt automatisch overgeslagen.
 Bij 429/5xx/timeout → automatisch volgende provider.
+Health (EWMA-latency, p50/p95, succesratio, tokens/s, cooldown) staat in omega_db en wordt gedeeld tussen processen.
+Concurrency per provider via provider_limits (AIMD; Ollama met RAM-gate).
+generate() is synchroon (threads); agenerate() is async-native voor de event loop (llm_router).
 Alleen agent system_prompt als system instruction — geen Omega prompt.
 """
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
-import time
-from dataclasses import dataclass, field
-from pathlib import Path
+import threading
 from typing import Optional
 
-import requests
+import llm_engine
+from holding.src import provider_health, provider_limits, response_cache
 
 logger = logging.getLogger(__name__)
 
 CALL_TIMEOUT = 15
-COOLDOWN_SECONDS = 300
-COOLDOWN_FAILURES = 3
 MAX_OUTPUT_TOKENS = 1024
 
+# Hedging (agenerate(hedge=True), standaard voor interactieve Telegram-verzoeken)
+HEDGE_ENABLED = os.environ.get("OMEGA_LLM_HEDGE", "1").strip().lower() not in ("0", "false", "no")
+HEDGE_MAX_EXTRA = 1          # max extra providers per call
+HEDGE_RATIO = float(os.environ.get("OMEGA_LLM_HEDGE_RATIO", "0.1") or 0.1)  # max hedges per hedge-call (gemiddeld)
+HEDGE_BURST = 3.0            # zoveel hedges mogen kort achter elkaar
+HEDGE_MIN_DELAY = 0.5        # seconden
+HEDGE_DEFAULT_DELAY = 3.0    # zolang er te weinig metingen zijn voor een p95
+HEDGE_MIN_SAMPLES = 10
 
-@dataclass
-class Provider:
-    name: str
-    base_url: str
-    model: str
-    env_key: str
-    needs_key: bool = True
-
-
-PROVIDERS = [
-    Provider(name="cerebras", base_url="https://api.cerebras.ai/v1",
-             model="llama3.1-8b", env_key="CEREBRAS_API_KEY"),
-    Provider(name="openrouter", base_url="https://openrouter.ai/api/v1",
-             model="openrouter/auto", env_key="OPENROUTER_API_KEY"),
-    Provider(name="gemini", base_url="", model="", env_key="GOOGLE_API_KEY"),
-    Provider(name="ollama", base_url="http://localhost:11434/v1",
-             model="qwen3:4b", env_key="", needs_key=False),
-    # Groq: klaargezet, niet actief. Vul GROQ_API_KEY in .env om te activeren.
-    Provider(name="groq", base_url="https://api.groq.com/openai/v1",
-             model="llama-3.3-70b-versatile", env_key="GROQ_API_KEY"),
-]
-
-_health: dict[str, dict] = {}
-
-
-def _ensure_env():
-    env_file = Path(__file__).resolve().parent.parent.parent / ".env"
-    if not env_file.exists():
-        return
-    want = {p.env_key for p in PROVIDERS if p.env_key}
-    want.update(("GEMINI_API_KEY", "GEMINI_MODEL", "OLLAMA_HOST", "OLLAMA_MODEL"))
-    with open(env_file, encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith("#") or "=" not in line:
-                continue
-            k, _, v = line.partition("=")
-            k, v = k.strip(), v.strip()
-            if k not in want:
-                continue
-            if len(v) >= 2 and v[0] in "'\"" and v[0] == v[-1]:
-                v = v[1:-1]
-            if not (os.environ.get(k) or "").strip() and v:
-                os.environ[k] = v
 
+PROVIDERS = llm_engine.chain("holding")
 
-def _is_cooled_down(provider_name: str) -> bool:
-    state = _health.get(provider_name)
-    if not state:
-        return False
-    if state.get("failures", 0) < COOLDOWN_FAILURES:
-        return False
-    cooldown_until = state.get("cooldown_until", 0)
-    if time.time() >= cooldown_until:
-        _health[provider_name] = {"failures": 0, "cooldown_until": 0}
+_hedge_stats = {"fired": 0, "won": 0, "denied": 0}
+
+
+class _HedgeBudget:
+    """Token bucket: elke hedge-call verdient HEDGE_RATIO, elke hedge kost 1 → hedges ≤ HEDGE_RATIO van het verkeer."""
+
+    def __init__(self):
+        self.tokens = HEDGE_BURST
+        self._lock = threading.Lock()
+
+    def earn(self) -> None:
+        with self._lock:
+            self.tokens = min(HEDGE_BURST, self.tokens + HEDGE_RATIO)
+
+    def spend(self) -> bool:
+        with self._lock:
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return True
+        _hedge_stats["denied"] += 1
         return False
-    return True
 
 
-def _record_failure(provider_name: str) -> None:
-    state = _health.setdefault(provider_name, {"failures": 0, "cooldown_until": 0})
-    state["failures"] = state.get("failures", 0) + 1
-    if state["failures"] >= COOLDOWN_FAILURES:
-        state["cooldown_until"] = time.time() + COOLDOWN_SECONDS
-        logger.warning("Provider %s in cooldown voor %ds na %d failures",
-                       provider_name, COOLDOWN_SECONDS, state["failures"])
+_hedge_budget = _HedgeBudget()
 
 
-def _record_success(provider_name: str) -> None:
-    _health[provider_name] = {"failures": 0, "cooldown_until": 0}
+def hedge_delay(provider_name: str) -> float:
+    """Wachttijd voordat er gehedged wordt: p95 van de recente responstijden van deze provider (scorebord)."""
+    stats = provider_health.snapshot().get(provider_name) or {}
+    if (stats.get("samples") or 0) < HEDGE_MIN_SAMPLES or stats.get("p95_ms") is None:
+        return HEDGE_DEFAULT_DELAY
+    return min(float(CALL_TIMEOUT), max(HEDGE_MIN_DELAY, stats["p95_ms"] / 1000.0))
 
 
-def _openai_call(provider: Provider, system_prompt: str,
-                 user_prompt: str) -> dict:
-    """
-    OpenAI-compatible API call. Retourneert:
-    {"ok": True, "content": str, "tokens_in": int, "tokens_out": int}
-    of {"ok": False, "error": str, "retriable": bool}
-    """
-    api_key = (os.environ.get(provider.env_key) or "").strip() if provider.needs_key else "ollama"
-    if provider.needs_key and not api_key:
-        return {"ok": False, "error": f"Geen {provider.env_key}", "retriable": False}
-
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
-    if provider.name == "openrouter":
-        headers["HTTP-Referer"] = "https://omega-holding.local"
-        headers["X-Title"] = "Omega Holding"
-
-    body = {
-        "model": provider.model,
-        "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-        "max_tokens": MAX_OUTPUT_TOKENS,
-        "temperature": 0.7,
-    }
+def hedge_stats() -> dict:
+    return {**_hedge_stats, "budget": round(_hedge_budget.tokens, 2)}
 
-    try:
-        r = requests.post(
-            f"{provider.base_url}/chat/completions",
-            headers=headers, json=body, timeout=CALL_TIMEOUT)
-
-        if r.status_code == 429:
-            return {"ok": False, "error": "Rate limited (429)", "retriable": True}
-        if r.status_code >= 500:
-            return {"ok": False, "error": f"Server error ({r.status_code})", "retriable": True}
-        r.raise_for_status()
-
-        data = r.json()
-        choices = data.get("choices") or []
-        content = ""
-        if choices:
-            msg = choices[0].get("message") or {}
-            content = (msg.get("content") or "").strip()
-
-        usage = data.get("usage") or {}
-        return {
-            "ok": True,
-            "content": content,
-            "tokens_in": usage.get("prompt_tokens", len(user_prompt) // 4),
-            "tokens_out": usage.get("completion_tokens", len(content) // 4),
-        }
-
-    except requests.exceptions.Timeout:
-        return {"ok": False, "error": f"Timeout ({CALL_TIMEOUT}s)", "retriable": True}
-    except requests.exceptions.ConnectionError as e:
-        return {"ok": False, "error": f"Connection error: {e}", "retriable": True}
-    except Exception as e:
-        return {"ok": False, "error": str(e), "retriable": False}
-
-
-def _gemini_call(system_prompt: str, user_prompt: str) -> dict:
-    """Gemini via google-generativeai (niet OpenAI-compatible)."""
-    api_key = (os.environ.get("GOOGLE_API_KEY")
-               or os.environ.get("GEMINI_API_KEY") or "").strip()
-    if not api_key:
-        return {"ok": False, "error": "Geen GOOGLE_API_KEY", "retriable": False}
 
-    try:
-        import google.generativeai as genai
-    except ImportError:
-        return {"ok": False, "error": "google-generativeai niet geïnstalleerd", "retriable": False}
+# ——— Fallback chain (gedeeld door generate en agenerate) ———
+
+def _chain(prompt_tokens: int = 0):
+    """(provider, label) voor elke provider die nu bruikbaar is (met key, niet in cooldown), beste eerst."""
+    for idx, provider in enumerate(llm_engine.candidates(PROVIDERS, prompt_tokens, rank=True)):
+        yield provider, f"{provider.name} ({'primary' if idx == 0 else f'fallback {idx}'})"
+
+
+def _request(system_prompt: str, user_prompt: str) -> llm_engine.Request:
+    return llm_engine.Request([{"role": "system", "content": system_prompt},
+                               {"role": "user", "content": user_prompt}],
+                              max_tokens=MAX_OUTPUT_TOKENS, timeout=CALL_TIMEOUT, temperature=0.7)
 
-    genai.configure(api_key=api_key)
-    model_name = os.environ.get("GEMINI_MODEL", "gemini-2.0-flash")
 
-    model = genai.GenerativeModel(
-        model_name,
-        system_instruction=system_prompt,
-        generation_config=genai.types.GenerationConfig(
-            max_output_tokens=MAX_OUTPUT_TOKENS),
-    )
+def _finish(provider: llm_engine.Backend, label: str, result: dict, elapsed_ms: int,
+            errors: list, agent_id: str, tenant_id: str, max_length: int) -> Optional[str]:
+    """Kostenboek en audit na één (door llm_engine al in health geboekte) provider-call. Content bij succes, anders None."""
+    import omega_telemetry
 
+    if not result["ok"]:
+        errors.append(f"{label}: {result.get('error', 'unknown')} ({elapsed_ms}ms)")
+        logger.warning("LLM %s FAILED: %s (%dms)", label, result.get("error"), elapsed_ms)
+        return None
+
+    content = result["content"][:max_length]
+    result["model_tag"] = provider.tag
+    llm_engine.ledger(provider, result, tenant_id, agent_id)
     try:
-        r = model.generate_content(user_prompt)
-        if r and r.text:
-            content = r.text.strip()
-            return {
-                "ok": True,
-                "content": content,
-                "tokens_in": len(user_prompt) // 4,
-                "tokens_out": len(content) // 4,
-            }
-        return {"ok": False, "error": "Gemini: leeg antwoord", "retriable": True}
-    except Exception as e:
-        err = str(e)
-        retriable = "429" in err or "Resource exhausted" in err or "500" in err
-        return {"ok": False, "error": err, "retriable": retriable}
+        omega_telemetry.log_audit(
+            "llm_call", tenant_id=tenant_id, agent_id=agent_id,
+            details={
+                "provider": label,
+                "model": provider.tag,
+                "response_time_ms": elapsed_ms,
+                "tokens_in": result.get("tokens_in", 0),
+                "tokens_out": result.get("tokens_out", 0),
+            })
+    except Exception:
+        pass
+    logger.info("LLM %s OK: %dms, %d chars", label, elapsed_ms, len(content))
+    return content
 
 
-def generate(system_prompt: str, user_prompt: str,
-             agent_id: str = "unknown", tenant_id: str = "unknown",
-             max_length: int = 3500) -> str:
-    """
-    Multi-provider fallback: Groq → Cerebras → OpenRouter → Gemini → Ollama.
-    Logt naar cost_log en holding_audit. Retourneert gegenereerde tekst.
-    """
-    _ensure_env()
-    import omega_db
+def _cache_namespace() -> str:
+    """Model-config in de cache-key: andere modellen of limieten → andere entries."""
+    return f"{','.join(p.tag for p in PROVIDERS)}|{MAX_OUTPUT_TOKENS}"
 
-    errors = []
 
-    for idx, provider in enumerate(PROVIDERS):
-        if _is_cooled_down(provider.name):
-            logger.debug("Skip %s (cooldown)", provider.name)
-            continue
+def _cache_hit(probe: response_cache.Probe, agent_id: str, tenant_id: str, max_length: int) -> str:
+    """Gecachet antwoord teruggeven en als zero-token call loggen (cost_tracker telt de besparing)."""
+    import omega_telemetry
 
-        if provider.needs_key:
-            key = (os.environ.get(provider.env_key) or "").strip()
-            if not key:
-                continue
+    hit = probe.hit
+    try:
+        omega_telemetry.log_cost(tenant_id=tenant_id, agent_id=agent_id, model_used=f"cache/{probe.kind}",
+                                 tokens_in=0, tokens_out=0, cost_usd=0.0)
+        omega_telemetry.log_audit(
+            "llm_cache_hit", tenant_id=tenant_id, agent_id=agent_id,
+            details={"kind": probe.kind, "model": hit["model"],
+                     "tokens_saved": hit["tokens_in"] + hit["tokens_out"]})
+    except Exception:
+        pass
+    logger.info("LLM cache hit (%s) voor %s/%s", probe.kind, tenant_id, agent_id)
+    return hit["response"][:max_length]
 
-        label = f"{provider.name} ({'primary' if idx == 0 else f'fallback {idx}'})"
-        start = time.monotonic()
-
-        if provider.name == "gemini":
-            result = _gemini_call(system_prompt, user_prompt)
-        else:
-            result = _openai_call(provider, system_prompt, user_prompt)
-
-        elapsed_ms = int((time.monotonic() - start) * 1000)
-
-        content_raw = (result.get("content") or "").strip() if result["ok"] else ""
-        if result["ok"] and content_raw:
-            _record_success(provider.name)
-            content = content_raw
-            if len(content) > max_length:
-                content = content[:max_length]
-
-            model_tag = f"{provider.name}/{provider.model}" if provider.name != "gemini" else f"gemini/{os.environ.get('GEMINI_MODEL', 'gemini-2.0-flash')}"
-
-            try:
-                omega_db.cost_log_insert(
-                    tenant_id=tenant_id, agent_id=agent_id,
-                    model_used=model_tag,
-                    tokens_in=result.get("tokens_in", 0),
-                    tokens_out=result.get("tokens_out", 0),
-                    cost_usd=0.0)
-            except Exception:
-                pass
-
-            try:
-                omega_db.holding_audit_log(
-                    "llm_call", tenant_id=tenant_id, agent_id=agent_id,
-                    details={
-                        "provider": label,
-                        "model": model_tag,
-                        "response_time_ms": elapsed_ms,
-                        "tokens_in": result.get("tokens_in", 0),
-                        "tokens_out": result.get("tokens_out", 0),
-                    })
-            except Exception:
-                pass
-
-            logger.info("LLM %s OK: %dms, %d chars", label, elapsed_ms, len(content))
-            return content
 
-        _record_failure(provider.name)
-        if result["ok"] and not content_raw:
-            err_msg = "empty response"
-        else:
-            err_msg = result.get("error", "unknown")
-        errors.append(f"{label}: {err_msg} ({elapsed_ms}ms)")
-        logger.warning("LLM %s FAILED: %s (%dms)", label, err_msg, elapsed_ms)
+def _all_failed(errors: list, agent_id: str, tenant_id: str) -> str:
+    import omega_telemetry
 
     all_errors = "; ".join(errors)
     logger.error("Alle LLM providers gefaald: %s", all_errors)
 
     try:
-        omega_db.holding_audit_log(
+        omega_telemetry.log_audit(
             "llm_all_failed", tenant_id=tenant_id, agent_id=agent_id,
             details={"errors": errors})
     except Exception:
         pass
 
     return f"[LLM ERROR] Alle providers gefaald: {all_errors}"
+
+
+def generate(system_prompt: str, user_prompt: str,
+             agent_id: str = "unknown", tenant_id: str = "unknown",
+             max_length: int = 3500, cache: bool = True, semantic: bool = False) -> str:
+    """
+    Multi-provider fallback: Groq → Cerebras → OpenRouter → Gemini → Ollama.
+    Logt naar cost_log en holding_audit via de write-behind queue (omega_telemetry),
+    zodat de responstijd geen database-I/O bevat. Retourneert gegenereerde tekst.
+    cache: eerst response_cache (exact; semantic=True ook op betekenis), nieuwe antwoorden worden bewaard.
+    """
+    llm_engine.ensure_env()
+    errors = []
+    probe = response_cache.lookup(tenant_id, system_prompt, user_prompt, _cache_namespace(), semantic) if cache else None
+    if probe is not None and probe.hit:
+        return _cache_hit(probe, agent_id, tenant_id, max_length)
+
+    req = _request(system_prompt, user_prompt)
+    for provider, label in _chain(req.prompt_tokens):
+        result, elapsed_ms = llm_engine.call_one(provider, req)
+        if result.get("no_capacity"):
+            # Geen vrij slot binnen ACQUIRE_TIMEOUT (of te weinig RAM voor lokaal model)
+            errors.append(f"{label}: geen capaciteit")
+            logger.warning("LLM %s overgeslagen: geen capaciteit", label)
+            continue
+        content = _finish(provider, label, result, elapsed_ms, errors, agent_id, tenant_id, max_length)
+        if content is not None:
+            response_cache.store(probe, content, result["model_tag"],
+                                 result.get("tokens_in", 0), result.get("tokens_out", 0))
+            return content
+
+    return _all_failed(errors, agent_id, tenant_id)
+
+
+async def _attempt(provider: llm_engine.Backend, label: str, req: llm_engine.Request) -> tuple:
+    """Eén provider-call (llm_engine.acall_one). Retourneert (provider, label, result, elapsed_ms)."""
+    result, elapsed_ms = await llm_engine.acall_one(provider, req)
+    return provider, label, result, elapsed_ms
+
+
+async def agenerate(system_prompt: str, user_prompt: str,
+                    agent_id: str = "unknown", tenant_id: str = "unknown",
+                    max_length: int = 3500, hedge: bool = False,
+                    cache: bool = True, semantic: bool = False) -> str:
+    """
+    Async-native variant van generate(): zelfde chain, cooldown/health en telemetrie,
+    maar zonder thread per call (httpx.AsyncClient, generate_content_async).
+    hedge=True: duurt de lopende provider langer dan zijn p95, dan gaat dezelfde vraag ook naar
+    de volgende gezonde remote provider; het eerste goede antwoord wint, de rest wordt geannuleerd.
+    Annuleren (task.cancel()) breekt de lopende HTTP-call af; dat telt niet als provider-fout.
+    cache/semantic: zie generate(); de cache-I/O (en embedding) draait buiten de event loop.
+    """
+    llm_engine.ensure_env()
+    errors = []
+    loop = asyncio.get_running_loop()
+    probe = None
+    if cache:
+        probe = await loop.run_in_executor(None, response_cache.lookup, tenant_id, system_prompt,
+                                           user_prompt, _cache_namespace(), semantic)
+        if probe is not None and probe.hit:
+            return _cache_hit(probe, agent_id, tenant_id, max_length)
+    req = _request(system_prompt, user_prompt)
+    # Routing, cooldowns en hedge_delay lezen het scorebord; verversen gebeurt niet op de loop
+    await provider_health.arefresh()
+    candidates = list(_chain(req.prompt_tokens))
+    pending: set[asyncio.Task] = set()
+    hedges_left = HEDGE_MAX_EXTRA if hedge and HEDGE_ENABLED else 0
+    if hedges_left:
+        _hedge_budget.earn()
+
+    def launch() -> Optional[asyncio.Task]:
+        if not candidates:
+            return None
+        provider, label = candidates.pop(0)
+        task = asyncio.ensure_future(_attempt(provider, label, req))
+        pending.add(task)
+        running.append(provider)
+        return task
+
+    running: list[llm_engine.Backend] = []
+    hedged: set[asyncio.Task] = set()  # taken die als hedge gestart zijn (niet de gewone fallback)
+    try:
+        launch()
+        while pending:
+            delay = hedge_delay(running[-1].name) if hedges_left else None
+            done, _ = await asyncio.wait(pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                # Hedge: de lopende provider is trager dan zijn p95 → volgende remote provider erbij
+                # (nooit naar een lokaal model: dat kost NUC-RAM in plaats van alleen een socket)
+                hedges_left -= 1
+                if (candidates and candidates[0][0].name not in provider_limits.LOCAL_PROVIDERS
+                        and _hedge_budget.spend()):
+                    task = launch()
+                    if task is not None:
+                        hedged.add(task)
+                        _hedge_stats["fired"] += 1
+                        logger.info("LLM hedge: %s erbij na %.1fs", running[-1].name, delay)
+                continue
+            # Elke geslaagde call in deze ronde is betaald: allemaal via _finish ledgeren, de eerste wint
+            winner = None
+            for task in done:
+                pending.discard(task)
+                provider, label, result, elapsed_ms = task.result()
+                if result.get("no_capacity"):
+                    errors.append(f"{label}: geen capaciteit")
+                    logger.warning("LLM %s overgeslagen: geen capaciteit", label)
+                    continue
+                content = _finish(provider, label, result, elapsed_ms, errors, agent_id, tenant_id, max_length)
+                if content is not None and winner is None:
+                    winner = (task, content, result)
+            if winner is not None:
+                task, content, result = winner
+                if task in hedged:
+                    _hedge_stats["won"] += 1
+                loop.run_in_executor(None, response_cache.store, probe, content, result["model_tag"],
+                                     result.get("tokens_in", 0), result.get("tokens_out", 0))
+                return content
+            if not pending:
+                launch()
+    finally:
+        for task in pending:
+            task.cancel()
+
+    return _all_failed(errors, agent_id, tenant_id)
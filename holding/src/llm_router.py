@@ -1,38 +1,48 @@
 """
 LLM Router — route holding-taken via de multi-provider fallback chain.
 Groq → Cerebras → OpenRouter → Gemini → Ollama.
-Semaphore(1): max 1 concurrent LLM call (NUC RAM bescherming).
+Geen globale Semaphore meer: concurrency wordt per provider begrensd in provider_limits
+(AIMD voor remote providers, lage limiet + RAM-gate voor Ollama). Calls draaien async-native
+(holding_llm.agenerate) op de event loop: geen thread per lopende call.
+Volgorde bij drukte bepaalt llm_scheduler: interactive > auditor > werkers, eerlijk per tenant, dan priority.
+Interactieve verzoeken worden gehedged (holding_llm.agenerate(hedge=True)) voor een lage staartlatency.
 """
 from __future__ import annotations
 
-import asyncio
 import logging
 import time
 
 import omega_db
+from holding.src import llm_scheduler
 
 logger = logging.getLogger(__name__)
 
-_semaphore = asyncio.Semaphore(1)
 
-
-async def generate(agent: dict, prompt: str, tenant_id: str) -> str:
+async def generate(agent: dict, prompt: str, tenant_id: str,
+                   priority: int = llm_scheduler.DEFAULT_PRIORITY,
+                   interactive: bool = False, task_id: str | None = None,
+                   cache: bool = True) -> str:
     """
     Genereer output via de multi-provider fallback chain.
-    Gebruikt holding_llm.generate() met agent system_prompt als system instruction.
+    Gebruikt holding_llm.agenerate() met agent system_prompt als system instruction.
+    Wacht eerst op een beurt in de scheduler (priority: 1 = urgent; task_id maakt annuleren mogelijk).
+    cache=False slaat de response-cache over (bijv. bij een revisie: zelfde prompt, ander antwoord nodig).
     """
     system_prompt = agent.get("system_prompt", "")
     agent_id = agent.get("id", "unknown")
 
     start = time.monotonic()
 
-    async with _semaphore:
-        from holding.src.holding_llm import generate as holding_generate
-        result = await asyncio.to_thread(
-            holding_generate, system_prompt, prompt,
-            agent_id, tenant_id)
+    from holding.src.holding_llm import agenerate
+    lane = llm_scheduler.lane_for(agent, interactive)
+    async with llm_scheduler.get_scheduler().slot(tenant_id, lane, priority, task_id):
+        waited_ms = int((time.monotonic() - start) * 1000)
+        # Semantische cache alleen voor werkers: een review moet bij de exacte output horen
+        result = await agenerate(system_prompt, prompt, agent_id, tenant_id, hedge=interactive,
+                                 cache=cache, semantic=lane == "background")
 
     elapsed_ms = int((time.monotonic() - start) * 1000)
-    logger.info("LLM voor %s: %dms, %d chars", agent_id, elapsed_ms, len(result))
+    logger.info("LLM voor %s (%s): %dms (wachtrij %dms), %d chars",
+                agent_id, lane, elapsed_ms, waited_ms, len(result))
 
     return result
@@ -0,0 +1,217 @@
+"""
+LLM Scheduler — prioriteit en eerlijke verdeling vóór de holding-LLM calls.
+Maximaal MAX_IN_FLIGHT calls tegelijk; bij drukte bepaalt de wachtrij wie eerst gaat:
+1. lane: interactive (Telegram) → auditor (reviews) → background (werkers)
+2. binnen een lane: smooth weighted round robin over tenants (OMEGA_LLM_TENANT_WEIGHTS)
+3. binnen een tenant: holding_tasks.priority (1 = urgent, 10 = laag), dan volgorde van aankomst
+Wachtende aanvragen zijn te annuleren (cancel of task.cancel()); lopende calls niet.
+Thread-safe: wake-ups gaan via call_soon_threadsafe naar de loop van de wachtende coroutine.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_IN_FLIGHT = int(os.environ.get("OMEGA_LLM_MAX_INFLIGHT", "8") or 8)
+LANES = ("interactive", "auditor", "background")
+DEFAULT_PRIORITY = 5
+WAIT_SAMPLES = 500  # laatste N wachttijden voor gemiddelde/p95
+
+
+def _parse_weights(raw: str) -> dict[str, int]:
+    """'webshop=2,lunchroom=1' → {"webshop": 2, "lunchroom": 1}; ongeldige delen worden genegeerd."""
+    weights = {}
+    for part in raw.split(","):
+        name, _, value = part.partition("=")
+        try:
+            weights[name.strip()] = max(1, int(value))
+        except ValueError:
+            continue
+    return weights
+
+
+TENANT_WEIGHTS = _parse_weights(os.environ.get("OMEGA_LLM_TENANT_WEIGHTS", ""))
+
+
+class _Request:
+    __slots__ = ("tenant_id", "lane", "priority", "task_id", "enqueued", "loop", "future", "state")
+
+    def __init__(self, tenant_id: str, lane: str, priority: int, task_id: Optional[str]):
+        self.tenant_id = tenant_id
+        self.lane = lane
+        self.priority = priority
+        self.task_id = task_id
+        self.enqueued = time.monotonic()
+        self.loop = asyncio.get_running_loop()
+        self.future: asyncio.Future = self.loop.create_future()
+        self.state = "queued"  # queued → running | cancelled
+
+
+class LLMScheduler:
+    """Wachtrij per (lane, tenant) als heap op (priority, seq); dispatch zodra er capaciteit is."""
+
+    def __init__(self, max_in_flight: int = MAX_IN_FLIGHT, weights: dict[str, int] | None = None):
+        self.max_in_flight = max(1, max_in_flight)
+        self.weights = dict(TENANT_WEIGHTS if weights is None else weights)
+        self.in_flight = 0
+        self._queues: dict[str, dict[str, list]] = {lane: {} for lane in LANES}
+        self._current: dict[str, dict[str, int]] = {lane: {} for lane in LANES}  # SWRR-stand per lane
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._waits: deque = deque(maxlen=WAIT_SAMPLES)
+        self.dispatched = 0
+        self.cancelled = 0
+
+    # ——— wachtrij ———
+
+    def _push(self, req: _Request) -> None:
+        heap = self._queues[req.lane].setdefault(req.tenant_id, [])
+        heapq.heappush(heap, (req.priority, next(self._seq), req))
+
+    def _pop_next(self) -> Optional[_Request]:
+        """Hoogste lane met werk; daarin SWRR over tenants; daarin laagste priority."""
+        for lane in LANES:
+            queues = self._queues[lane]
+            for tenant_id in list(queues):
+                heap = queues[tenant_id]
+                while heap and heap[0][2].state != "queued":
+                    heapq.heappop(heap)  # geannuleerd: lazy verwijderen
+                if not heap:
+                    del queues[tenant_id]
+                    self._current[lane].pop(tenant_id, None)
+            if not queues:
+                continue
+            current = self._current[lane]
+            total = 0
+            for tenant_id in queues:
+                w = self.weights.get(tenant_id, 1)
+                current[tenant_id] = current.get(tenant_id, 0) + w
+                total += w
+            chosen = max(queues, key=lambda t: current[t])
+            current[chosen] -= total
+            return heapq.heappop(queues[chosen])[2]
+        return None
+
+    def _dispatch(self) -> None:
+        """Start wachtenden zolang er capaciteit is. Aanroepen met self._lock vast."""
+        while self.in_flight < self.max_in_flight:
+            req = self._pop_next()
+            if req is None:
+                return
+            req.state = "running"
+            self.in_flight += 1
+            self.dispatched += 1
+            self._waits.append(time.monotonic() - req.enqueued)
+            req.loop.call_soon_threadsafe(_wake, req.future)
+
+    def _release(self) -> None:
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, tenant_id: str, lane: str = "background",
+                   priority: int = DEFAULT_PRIORITY, task_id: str | None = None):
+        """async with scheduler.slot(...): wacht op een beurt; annuleren tijdens het wachten haalt de aanvraag uit de rij."""
+        if lane not in LANES:
+            raise ValueError(f"Onbekende lane: {lane}")
+        req = _Request(tenant_id or "", lane, int(priority if priority is not None else DEFAULT_PRIORITY), task_id)
+        with self._lock:
+            self._push(req)
+            self._dispatch()
+        try:
+            await req.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if req.state == "queued":
+                    req.state = "cancelled"
+                    self.cancelled += 1
+                running = req.state == "running"
+            if running:
+                # Race: net gedispatcht terwijl we geannuleerd werden → slot teruggeven
+                self._release()
+            raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def cancel(self, task_id: str | None = None, tenant_id: str | None = None) -> int:
+        """Annuleer wachtende aanvragen voor een taak en/of tenant. Retourneert het aantal."""
+        if task_id is None and tenant_id is None:
+            return 0
+        count = 0
+        with self._lock:
+            for queues in self._queues.values():
+                for tid, heap in queues.items():
+                    if tenant_id is not None and tid != tenant_id:
+                        continue
+                    for _, _, req in heap:
+                        if req.state != "queued" or (task_id is not None and req.task_id != task_id):
+                            continue
+                        req.state = "cancelled"
+                        count += 1
+                        req.loop.call_soon_threadsafe(_cancel, req.future)
+            self.cancelled += count
+        return count
+
+    def stats(self) -> dict:
+        with self._lock:
+            depth = {lane: {t: sum(1 for _, _, r in heap if r.state == "queued") for t, heap in queues.items()}
+                     for lane, queues in self._queues.items()}
+            waits = sorted(self._waits)
+        return {
+            "in_flight": self.in_flight, "max_in_flight": self.max_in_flight,
+            "queued": sum(n for lane in depth.values() for n in lane.values()),
+            "depth": {lane: {t: n for t, n in d.items() if n} for lane, d in depth.items()},
+            "dispatched": self.dispatched, "cancelled": self.cancelled,
+            "wait_avg_ms": int(sum(waits) / len(waits) * 1000) if waits else 0,
+            "wait_p95_ms": int(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000) if waits else 0,
+        }
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def _cancel(future: asyncio.Future) -> None:
+    if not future.done():
+        future.cancel()
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = LLMScheduler()
+    return _scheduler
+
+
+def lane_for(agent: dict, interactive: bool = False) -> str:
+    if interactive:
+        return "interactive"
+    return "auditor" if agent.get("role") == "auditor" else "background"
+
+
+def cancel(task_id: str | None = None, tenant_id: str | None = None) -> int:
+    return get_scheduler().cancel(task_id=task_id, tenant_id=tenant_id)
+
+
+def stats() -> dict:
+    return get_scheduler().stats()
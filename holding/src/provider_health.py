@@ -0,0 +1,141 @@
+"""
+Provider Health — gedeeld scorebord van de holding LLM-providers (omega_db.provider_health).
+Schrijven gaat write-behind via omega_telemetry; lezen via een korte read-through cache (SNAPSHOT_TTL),
+zodat routing geen database-I/O per call kost en bridge, workers en pipeline dezelfde cijfers zien.
+Op een event loop leest snapshot() alleen de laatst geladen stand; verversen gebeurt dan in een
+executor-thread (of vooraf met await arefresh()), nooit met een SQLite-read op de loop zelf.
+Routing: kleine prompts → laagste p50-latency, grote prompts → hoogste tokens/s, beide gedeeld door de
+recente succesratio (EWMA). Providers met te weinig metingen houden hun vaste plek in de chain;
+lokale modellen (Ollama) blijven achteraan.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+import omega_cache
+import omega_db
+import omega_telemetry
+from holding.src import provider_limits
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_TTL = 5.0
+MIN_CALLS = 5
+MIN_SUCCESS = 0.05
+LARGE_PROMPT_TOKENS = int(os.environ.get("OMEGA_LLM_LARGE_PROMPT_TOKENS", "2000") or 2000)
+
+_snapshot_cache = omega_cache.cache("provider_health", ttl=SNAPSHOT_TTL)
+
+
+def record(provider: str, ok: bool, latency_ms: int, tokens_out: int = 0, error: str = "",
+           cooldown_failures: int = 3, cooldown_seconds: float = 300) -> None:
+    """Eén call-uitkomst naar het scorebord (write-behind)."""
+    omega_telemetry.log_provider_health(
+        provider=provider, ok=bool(ok), latency_ms=int(latency_ms), tokens_out=int(tokens_out or 0),
+        error=error, now=time.time(), cooldown_failures=cooldown_failures,
+        cooldown_seconds=cooldown_seconds)
+
+
+# Laatst geladen stand (ook na verlopen TTL) voor lezers op de event loop
+_latest: dict[str, dict] = {}
+_loaded_at = float("-inf")
+_refreshing = threading.Lock()
+
+
+def _load() -> dict[str, dict]:
+    global _latest, _loaded_at
+    try:
+        omega_db.init_schema()
+        rows = {r["provider"]: r for r in omega_db.provider_health_list()}
+    except Exception as e:
+        logger.debug("provider_health niet leesbaar: %s", e)
+        rows = {}
+    _latest, _loaded_at = rows, time.monotonic()
+    return rows
+
+
+def _stale() -> bool:
+    return time.monotonic() - _loaded_at >= SNAPSHOT_TTL
+
+
+def _refresh() -> None:
+    """Laad het scorebord opnieuw; een tweede gelijktijdige refresh wordt overgeslagen."""
+    if not _refreshing.acquire(blocking=False):
+        return
+    try:
+        _snapshot_cache.get("all", _load)
+    finally:
+        _refreshing.release()
+
+
+def snapshot() -> dict[str, dict]:
+    """
+    provider → rij uit provider_health_list (hooguit SNAPSHOT_TTL oud). Niet muteren.
+    Op een event loop: de laatst geladen stand zonder database-I/O; is die verlopen, dan ververst
+    een executor-thread hem voor de volgende lezer.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return _snapshot_cache.get("all", _load)
+    if _stale():
+        loop.run_in_executor(None, _refresh)
+    return _latest
+
+
+async def arefresh() -> None:
+    """Ververs een verlopen snapshot buiten de event loop (vóór routing in async aanroepers)."""
+    if _stale():
+        await asyncio.to_thread(_refresh)
+
+
+def cooldown_remaining(provider: str) -> float:
+    """Seconden cooldown volgens het gedeelde scorebord (0 = beschikbaar)."""
+    stats = snapshot().get(provider)
+    if not stats:
+        return 0.0
+    return max(0.0, (stats.get("cooldown_until") or 0) - time.time())
+
+
+def _cost(stats: dict | None, large: bool) -> Optional[float]:
+    """Verwachte kosten in ms (klein) of ms per output-token (groot); None = te weinig metingen."""
+    if not stats or (stats.get("calls") or 0) < MIN_CALLS:
+        return None
+    success = max(MIN_SUCCESS, stats.get("ewma_success") or 0.0)
+    if large and stats.get("ewma_tokens_per_sec"):
+        return 1000.0 / stats["ewma_tokens_per_sec"] / success
+    latency = stats.get("p50_ms") or stats.get("ewma_latency_ms")
+    if latency is None:
+        # Alleen fouten gemeten: achteraan bij de bekende providers
+        return float("inf")
+    return latency / success
+
+
+def rank(providers: list, prompt_tokens: int = 0) -> list:
+    """
+    Herorden providers voor deze request. Alleen providers met genoeg metingen wisselen onderling
+    van plek (op kosten); de rest houdt zijn vaste positie. Lokale providers altijd achteraan.
+    """
+    snap = snapshot()
+    large = prompt_tokens >= LARGE_PROMPT_TOKENS
+    remote = [p for p in providers if p.name not in provider_limits.LOCAL_PROVIDERS]
+    local = [p for p in providers if p.name in provider_limits.LOCAL_PROVIDERS]
+    costs = {p.name: _cost(snap.get(p.name), large) for p in remote}
+    known_slots = [i for i, p in enumerate(remote) if costs[p.name] is not None]
+    known = sorted((remote[i] for i in known_slots), key=lambda p: costs[p.name])
+    ordered = list(remote)
+    for slot, provider in zip(known_slots, known):
+        ordered[slot] = provider
+    return ordered + local
+
+
+def scoreboard() -> list[dict]:
+    """Actueel scorebord voor /holding providers (eerst de write-behind queue leegschrijven)."""
+    omega_telemetry.flush(timeout=1.0)
+    _snapshot_cache.invalidate()
+    return list(snapshot().values())
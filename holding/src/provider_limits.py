@@ -0,0 +1,191 @@
+"""
+Provider Limits — adaptieve concurrency per LLM-provider (AIMD).
+Remote providers (Cerebras, OpenRouter, Groq, Gemini) beginnen ruim en groeien bij succes;
+een 429/timeout halveert de limiet. Ollama draait lokaal: lage limiet plus RAM-gate.
+Werkt vanuit threads (slot, holding_llm.generate) én vanuit asyncio (aslot, holding_llm.agenerate):
+wachtende coroutines worden bij release via call_soon_threadsafe gewekt en blokkeren de loop niet.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+ACQUIRE_TIMEOUT = 30.0  # seconden wachten op een slot; daarna door naar de volgende provider
+OLLAMA_MIN_FREE_MB = int(os.environ.get("OLLAMA_MIN_FREE_MB", "1500") or 1500)
+
+
+@dataclass
+class LimitConfig:
+    initial: float
+    minimum: float
+    maximum: float
+
+
+REMOTE_LIMITS = LimitConfig(initial=4, minimum=1,
+                            maximum=float(os.environ.get("OMEGA_LLM_REMOTE_MAX", "16") or 16))
+LOCAL_LIMITS = LimitConfig(initial=1, minimum=1,
+                           maximum=float(os.environ.get("OMEGA_LLM_LOCAL_MAX", "2") or 2))
+LOCAL_PROVIDERS = ("ollama",)
+
+
+class AdaptiveLimiter:
+    """
+    AIMD-limiet: bij succes limit += 1/limit (≈ +1 per volle ronde), bij overbelasting limit *= 0.5.
+    acquire() blokkeert zolang in_flight >= floor(limit).
+    """
+
+    def __init__(self, name: str, config: LimitConfig):
+        self.name = name
+        self.config = config
+        self.limit = float(config.initial)
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self._async_waiters: list[asyncio.Future] = []
+        self.successes = 0
+        self.backoffs = 0
+
+    def acquire(self, timeout: float = ACQUIRE_TIMEOUT) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            self.in_flight += 1
+            return True
+
+    async def aacquire(self, timeout: float = ACQUIRE_TIMEOUT) -> bool:
+        """Async variant van acquire: wacht zonder de event loop te blokkeren."""
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._cond:
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return True
+                fut = loop.create_future()
+                self._async_waiters.append(fut)
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    return False
+                await asyncio.wait_for(fut, remaining)
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                with self._cond:
+                    if fut in self._async_waiters:
+                        self._async_waiters.remove(fut)
+
+    def release(self, outcome: str = "ok") -> None:
+        """outcome: 'ok' (groei), 'overload' (429/timeout → halveren) of 'error' (neutraal)."""
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            if outcome == "ok":
+                self.successes += 1
+                self.limit = min(self.config.maximum, self.limit + 1.0 / self.limit)
+            elif outcome == "overload":
+                self.backoffs += 1
+                old = self.limit
+                self.limit = max(self.config.minimum, self.limit * 0.5)
+                if int(old) != int(self.limit):
+                    logger.info("Provider %s: concurrency %d → %d", self.name, int(old), int(self.limit))
+            self._cond.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for fut in waiters:
+            fut.get_loop().call_soon_threadsafe(_wake, fut)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"provider": self.name, "limit": round(self.limit, 2), "in_flight": self.in_flight,
+                    "successes": self.successes, "backoffs": self.backoffs}
+
+
+_limiters: dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter(provider_name: str) -> AdaptiveLimiter:
+    lim = _limiters.get(provider_name)
+    if lim is None:
+        with _limiters_lock:
+            lim = _limiters.get(provider_name)
+            if lim is None:
+                config = LOCAL_LIMITS if provider_name in LOCAL_PROVIDERS else REMOTE_LIMITS
+                lim = _limiters[provider_name] = AdaptiveLimiter(provider_name, config)
+    return lim
+
+
+def ram_ok(provider_name: str) -> bool:
+    """RAM-gate, alleen voor lokale modellen: genoeg vrij geheugen voor nog een Ollama-call?"""
+    if provider_name not in LOCAL_PROVIDERS:
+        return True
+    try:
+        import psutil
+    except ImportError:
+        return True
+    return psutil.virtual_memory().available >= OLLAMA_MIN_FREE_MB * 1024 * 1024
+
+
+def classify(result: dict) -> str:
+    """Vertaal een holding_llm-resultaat naar een limiter-outcome."""
+    if result.get("ok"):
+        return "ok"
+    err = str(result.get("error", ""))
+    if "429" in err or "Rate limit" in err or "Resource exhausted" in err or "Timeout" in err:
+        return "overload"
+    return "error"
+
+
+@contextmanager
+def slot(provider_name: str, timeout: float = ACQUIRE_TIMEOUT):
+    """
+    with slot("cerebras") as s: ...; s["outcome"] = classify(result)
+    Levert None op als er binnen timeout geen slot (of RAM) vrijkomt.
+    """
+    if not ram_ok(provider_name):
+        yield None
+        return
+    lim = limiter(provider_name)
+    if not lim.acquire(timeout):
+        yield None
+        return
+    state = {"outcome": "error"}
+    try:
+        yield state
+    finally:
+        lim.release(state["outcome"])
+
+
+@asynccontextmanager
+async def aslot(provider_name: str, timeout: float = ACQUIRE_TIMEOUT):
+    """Async variant van slot(); bij annulering wordt het slot neutraal ('error') teruggegeven."""
+    if not ram_ok(provider_name):
+        yield None
+        return
+    lim = limiter(provider_name)
+    if not await lim.aacquire(timeout):
+        yield None
+        return
+    state = {"outcome": "error"}
+    try:
+        yield state
+    finally:
+        lim.release(state["outcome"])
+
+
+def _wake(fut: asyncio.Future) -> None:
+    if not fut.done():
+        fut.set_result(None)
+
+
+def stats() -> list[dict]:
+    return [lim.stats() for lim in list(_limiters.values())]
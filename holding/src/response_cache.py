@@ -0,0 +1,119 @@
+"""
+Response Cache — twee-laags cache voor holding LLM-antwoorden (omega_db.llm_cache).
+1. Exact: sha256 van (tenant, model-config, system_prompt, user_prompt), TTL + LRU-eviction.
+2. Semantisch (optioneel, OMEGA_LLM_CACHE_SEMANTIC=1): embedding van de user_prompt via de rag-embedder;
+   hit bij cosine ≥ THRESHOLD, alleen binnen dezelfde tenant en dezelfde system prompt (agent).
+Zonder echte embedder (sentence-transformers ontbreekt) is de semantische laag uit.
+Tenant-isolatie: tenant_id zit in de key én in het filter van de semantische zoektocht.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+from array import array
+from dataclasses import dataclass
+from typing import Optional
+
+import omega_db
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("OMEGA_LLM_CACHE", "1").strip().lower() not in ("0", "false", "no")
+SEMANTIC = os.environ.get("OMEGA_LLM_CACHE_SEMANTIC", "0").strip().lower() in ("1", "true", "yes")
+TTL = float(os.environ.get("OMEGA_LLM_CACHE_TTL", "86400") or 86400)
+MAX_ENTRIES = int(os.environ.get("OMEGA_LLM_CACHE_MAX", "5000") or 5000)
+THRESHOLD = float(os.environ.get("OMEGA_LLM_CACHE_THRESHOLD", "0.95") or 0.95)
+SEMANTIC_CANDIDATES = 500
+
+
+@dataclass
+class Probe:
+    """Resultaat van lookup(): hit (of None) plus wat store() nodig heeft bij een miss."""
+    key: str
+    tenant_id: str
+    system_hash: str
+    hit: Optional[dict] = None
+    kind: str = ""  # "exact" | "semantic"
+    embedding: Optional[bytes] = None
+
+
+def _sha(*parts: str) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _semantic_ready() -> bool:
+    if not SEMANTIC:
+        return False
+    import rag
+    return rag._get_embedder() != "placeholder"
+
+
+def _embed(text: str) -> bytes:
+    import rag
+    return array("f", rag._embed(text)).tobytes()
+
+
+def _best_match(query: bytes, candidates: list[tuple[str, bytes]]) -> tuple[Optional[str], float]:
+    if not candidates:
+        return None, 0.0
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    if np is not None:
+        q = np.frombuffer(query, dtype=np.float32)
+        m = np.stack([np.frombuffer(e, dtype=np.float32) for _, e in candidates])
+        sims = m @ q / (np.linalg.norm(m, axis=1) * np.linalg.norm(q) + 1e-9)
+        i = int(sims.argmax())
+        return candidates[i][0], float(sims[i])
+    q = array("f", query)
+    qn = sum(x * x for x in q) ** 0.5 or 1e-9
+    best, best_sim = None, 0.0
+    for key, emb in candidates:
+        v = array("f", emb)
+        sim = sum(a * b for a, b in zip(q, v)) / (qn * (sum(x * x for x in v) ** 0.5 or 1e-9))
+        if sim > best_sim:
+            best, best_sim = key, sim
+    return best, best_sim
+
+
+def lookup(tenant_id: str, system_prompt: str, user_prompt: str, namespace: str = "",
+           semantic: bool = False) -> Optional[Probe]:
+    """Zoek een gecachet antwoord. None als de cache uit staat; anders een Probe (probe.hit bij een hit)."""
+    if not ENABLED:
+        return None
+    system_hash = _sha(namespace, system_prompt)
+    probe = Probe(key=_sha(tenant_id, system_hash, user_prompt), tenant_id=tenant_id, system_hash=system_hash)
+    try:
+        hit = omega_db.llm_cache_get(probe.key, TTL)
+        if hit and hit["tenant_id"] == tenant_id:
+            probe.hit, probe.kind = hit, "exact"
+            return probe
+        if semantic and _semantic_ready():
+            probe.embedding = _embed(user_prompt)
+            key, sim = _best_match(probe.embedding, omega_db.llm_cache_candidates(
+                tenant_id, system_hash, TTL, SEMANTIC_CANDIDATES))
+            if key is not None and sim >= THRESHOLD:
+                hit = omega_db.llm_cache_get(key, TTL)
+                if hit and hit["tenant_id"] == tenant_id:
+                    probe.hit, probe.kind = hit, "semantic"
+                    logger.debug("LLM cache semantisch (%.3f) voor %s", sim, tenant_id)
+    except Exception as e:
+        logger.debug("LLM cache lookup: %s", e)
+    return probe
+
+
+def store(probe: Optional[Probe], content: str, model: str, tokens_in: int = 0, tokens_out: int = 0) -> None:
+    """Bewaar een vers antwoord onder de key van de probe (no-op zonder probe of bij een hit)."""
+    if probe is None or probe.hit is not None:
+        return
+    try:
+        omega_db.llm_cache_put(probe.key, probe.tenant_id, probe.system_hash, model, content,
+                               tokens_in, tokens_out, probe.embedding, TTL, MAX_ENTRIES)
+    except Exception as e:
+        logger.debug("LLM cache store: %s", e)
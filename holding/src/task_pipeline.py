@@ -4,12 +4,14 @@ Hergebruikt approval flow via ai_tools.request_user_approval voor escalaties.
 """
 from __future__ import annotations
 
+import asyncio
 import logging
 import uuid
 from datetime import datetime, timezone
 from typing import Optional
 
 import omega_db
+import omega_telemetry
 from holding.src import agent_registry, correction_engine
 from holding.src import llm_router
 
@@ -32,7 +34,7 @@ def create_task(tenant_id: str, task_type: str, title: str,
         title=title, description=description, assigned_to=assigned_to,
         created_by=created_by, input_data=input_data, priority=priority,
     )
-    omega_db.holding_audit_log("task_created", tenant_id=tenant_id, details={
+    omega_telemetry.log_audit("task_created", tenant_id=tenant_id, details={
         "task_id": task_id, "type": task_type, "assigned_to": assigned_to})
 
     logger.info("Holding task %s aangemaakt voor %s, assigned=%s",
@@ -40,7 +42,7 @@ def create_task(tenant_id: str, task_type: str, title: str,
     return task_id
 
 
-async def execute_task(task_id: str) -> dict:
+async def execute_task(task_id: str, interactive: bool = False) -> dict:
     """Voer een taak uit: agent + LLM, submit voor review."""
     task = omega_db.holding_task_get(task_id)
     if not task:
@@ -50,7 +52,7 @@ async def execute_task(task_id: str) -> dict:
     if not agent_id:
         return {"ok": False, "error": "Geen agent toegewezen"}
 
-    agent = omega_db.holding_agent_get(agent_id)
+    agent = agent_registry.get_agent(agent_id, task["tenant_id"])
     if not agent:
         return {"ok": False, "error": f"Agent {agent_id} niet gevonden"}
 
@@ -59,23 +61,33 @@ async def execute_task(task_id: str) -> dict:
 
     prompt = _build_prompt(task)
     try:
-        output = await llm_router.generate(agent, prompt, task["tenant_id"])
+        output = await llm_router.generate(agent, prompt, task["tenant_id"],
+                                           priority=task.get("priority") or 5,
+                                           interactive=interactive, task_id=task_id,
+                                           cache=not task.get("revision_count"))
+    except asyncio.CancelledError:
+        # Geannuleerd in de LLM-wachtrij: terug naar pending, tenzij de taak intussen
+        # afgekeurd of anders afgehandeld is (/holding reject annuleert ook)
+        omega_db.holding_agent_set_status(agent_id, "idle")
+        omega_db.holding_task_update_status(task_id, "pending", expected_status="in_progress")
+        raise
     except Exception as e:
         omega_db.holding_agent_set_status(agent_id, "error")
-        omega_db.holding_task_update_status(task_id, "pending")
+        omega_db.holding_task_update_status(task_id, "pending", expected_status="in_progress")
         return {"ok": False, "error": str(e)}
 
     omega_db.holding_agent_set_status(agent_id, "idle")
-    omega_db.holding_task_update_status(
-        task_id, "review", output_data={"content": output})
+    if not omega_db.holding_task_update_status(
+            task_id, "review", output_data={"content": output}, expected_status="in_progress"):
+        return {"ok": False, "error": "Taak is tijdens de uitvoering afgekeurd of gewijzigd"}
 
-    omega_db.holding_audit_log("task_executed", tenant_id=task["tenant_id"],
-                               agent_id=agent_id, details={"task_id": task_id})
+    omega_telemetry.log_audit("task_executed", tenant_id=task["tenant_id"],
+                              agent_id=agent_id, details={"task_id": task_id})
 
     return {"ok": True, "task_id": task_id, "output": output}
 
 
-async def review_task(task_id: str) -> dict:
+async def review_task(task_id: str, interactive: bool = False) -> dict:
     """Laat de auditor van dezelfde tenant de taak reviewen."""
     task = omega_db.holding_task_get(task_id)
     if not task:
@@ -88,28 +100,29 @@ async def review_task(task_id: str) -> dict:
         return {"ok": False, "error": "Geen auditor gevonden"}
 
     output = (task.get("output_data") or {}).get("content", "")
-    review = await correction_engine.audit(auditor, task, output)
+    review = await correction_engine.audit(auditor, task, output, interactive=interactive)
 
     return correction_engine.apply_review(task_id, task, auditor, review)
 
 
 async def run_full_pipeline(tenant_id: str, task_type: str, title: str,
                             description: str = "", priority: int = 5,
-                            input_data: dict | None = None) -> dict:
-    """End-to-end: aanmaken → uitvoeren → reviewen."""
+                            input_data: dict | None = None,
+                            interactive: bool = False) -> dict:
+    """End-to-end: aanmaken → uitvoeren → reviewen. interactive=True voor verzoeken vanuit Telegram."""
     task_id = create_task(tenant_id, task_type, title, description,
                           priority, input_data=input_data)
-    exec_result = await execute_task(task_id)
+    exec_result = await execute_task(task_id, interactive=interactive)
     if not exec_result.get("ok"):
         return exec_result
 
-    review_result = await review_task(task_id)
+    review_result = await review_task(task_id, interactive=interactive)
     return {**review_result, "task_id": task_id, "output": exec_result.get("output", "")}
 
 
 def _build_prompt(task: dict) -> str:
     """Bouw een prompt op basis van taakgegevens + tenant context."""
-    tenant = omega_db.tenant_get(task["tenant_id"])
+    tenant = agent_registry.get_tenant(task["tenant_id"])
     parts = []
     if tenant:
         parts.append(f"Brand: {tenant.get('name', '')}")
@@ -0,0 +1,608 @@
+"""
+Omega AI-Holding — Eén LLM-provider-engine voor ai_chat, ai_chat_retries en holding_llm.
+Backends (pluggable via register()): OpenAI-compatible (OpenAI, Cerebras, OpenRouter, Groq), Ollama en Gemini,
+elk met call() (sync), acall() (async) en stream() (tekst-delta's), allemaal via de gedeelde pools van omega_http.
+Gedeeld door alle aanroepers:
+- retries met exponentiële backoff + full jitter; een Retry-After (HTTP-header of Gemini retry_delay) gaat voor
+- health: cooldown na COOLDOWN_FAILURES fouten op rij (dit proces direct, andere processen via provider_health)
+- concurrency per provider (provider_limits, AIMD; Ollama met RAM-gate)
+- één kostenboek (ledger): euro's per call naar de daglimiet (mission_control), tokens per tenant/agent naar cost_log
+Chains: "holding" (holding-agents, herordend op gemeten latency) en "chat" (Telegram: Gemini → OpenAI → Ollama).
+Resultaat-dict (zoals holding_llm altijd gebruikte):
+  {"ok": True, "content", "tokens_in", "tokens_out"} of {"ok": False, "error", "retriable", "retry_after"}
+"""
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import logging
+import os
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+import requests
+
+import llm_stream
+import omega_http
+from holding.src import provider_health, provider_limits
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parent
+COOLDOWN_SECONDS = 300
+COOLDOWN_FAILURES = 3
+BACKOFF_BASE = float(os.environ.get("OMEGA_LLM_BACKOFF_BASE", "0.5") or 0.5)
+BACKOFF_MAX = float(os.environ.get("OMEGA_LLM_BACKOFF_MAX", "8") or 8)
+RETRY_AFTER_MAX = 30.0  # langer wachten op één provider heeft geen zin: dan liever de volgende
+
+
+@dataclass
+class Request:
+    messages: list[dict]  # OpenAI-formaat: system eerst, laatste is het user-bericht
+    max_tokens: int = 1024
+    timeout: Optional[float] = None  # read-timeout per call; None = default van de backend
+    temperature: Optional[float] = None
+    tools: tuple = ()  # gemini_tools-namen; alleen Gemini doet function calling, de rest negeert dit
+
+    @property
+    def prompt_tokens(self) -> int:
+        return sum(len(m.get("content") or "") for m in self.messages) // 4
+
+
+def _ok(content: str, tokens_in: int, tokens_out: int) -> dict:
+    return {"ok": True, "content": content, "tokens_in": tokens_in, "tokens_out": tokens_out}
+
+
+def _fail(error: str, retriable: bool, retry_after: Optional[float] = None) -> dict:
+    return {"ok": False, "error": error, "retriable": retriable, "retry_after": retry_after}
+
+
+def retry_after_seconds(value: Any) -> Optional[float]:
+    """Retry-After-header (seconden of HTTP-datum) → seconden; None als onbekend."""
+    if value is None or value == "":
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(str(value)).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Wachttijd vóór poging attempt + 1: full jitter op BACKOFF_BASE · 2^attempt (max BACKOFF_MAX), of Retry-After."""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+    if retry_after:
+        delay = max(delay, min(RETRY_AFTER_MAX, retry_after))
+    return delay
+
+
+def _http_result(status_code: int, headers: Any, data_fn, req: Request) -> dict:
+    """Vertaal HTTP-status + JSON (data_fn() → dict) van een OpenAI-compatible endpoint naar een resultaat."""
+    if status_code == 429:
+        return _fail("Rate limited (429)", True, retry_after_seconds(headers.get("Retry-After")))
+    if status_code >= 500:
+        return _fail(f"Server error ({status_code})", True, retry_after_seconds(headers.get("Retry-After")))
+    if status_code >= 400:
+        return _fail(f"HTTP {status_code}", False)
+    data = data_fn()
+    choices = data.get("choices") or []
+    content = ((choices[0].get("message") or {}).get("content") or "").strip() if choices else ""
+    usage = data.get("usage") or {}
+    return _ok(content, usage.get("prompt_tokens", req.prompt_tokens),
+               usage.get("completion_tokens", len(content) // 4))
+
+
+# ——— Backends ———
+
+class Backend:
+    """Basis: naam (health/limiter-sleutel), model, API key uit env, kosten per call in euro (daglimiet)."""
+
+    def __init__(self, name: str, model: str, env_key: str = "", needs_key: bool = True,
+                 model_env: str = "", cost_eur: float = 0.0, timeout: float = 60,
+                 alt_env_keys: tuple = ()):
+        self.name = name
+        self.default_model = model
+        self.env_key = env_key
+        self.alt_env_keys = alt_env_keys
+        self.needs_key = needs_key
+        self.model_env = model_env
+        self.cost_eur = cost_eur
+        self.timeout = timeout
+
+    @property
+    def model(self) -> str:
+        return (os.environ.get(self.model_env) or "").strip() or self.default_model if self.model_env else self.default_model
+
+    @property
+    def tag(self) -> str:
+        return f"{self.name}/{self.model}"
+
+    def api_key(self) -> str:
+        for key in (self.env_key, *self.alt_env_keys):
+            value = (os.environ.get(key) or "").strip() if key else ""
+            if value and not value.startswith("sk-xxx"):
+                return value
+        return ""
+
+    def configured(self) -> bool:
+        return not self.needs_key or bool(self.api_key())
+
+    def env_keys(self) -> set[str]:
+        return {k for k in (self.env_key, *self.alt_env_keys, self.model_env) if k}
+
+    def error_result(self, e: Exception) -> dict:
+        """Exception (ook halverwege een stream) → resultaat-dict."""
+        if isinstance(e, requests.exceptions.HTTPError) and e.response is not None:
+            return _http_result(e.response.status_code, e.response.headers, dict, Request([]))
+        if isinstance(e, (requests.exceptions.Timeout, asyncio.TimeoutError)):
+            return _fail(f"Timeout ({self.timeout}s)", True)
+        if isinstance(e, requests.exceptions.ConnectionError):
+            return _fail(f"Connection error: {e}", True)
+        return _fail(str(e), False)
+
+    def call(self, req: Request) -> dict:
+        raise NotImplementedError
+
+    async def acall(self, req: Request) -> dict:
+        return await asyncio.get_running_loop().run_in_executor(None, self.call, req)
+
+    def stream(self, req: Request) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class OpenAICompatible(Backend):
+    """/chat/completions (JSON) en stream=True (SSE) — OpenAI, Cerebras, OpenRouter, Groq."""
+
+    def __init__(self, name: str, base_url: str, model: str, env_key: str = "",
+                 base_url_env: str = "", headers: Optional[dict] = None, **kwargs: Any):
+        super().__init__(name, model, env_key, **kwargs)
+        self.default_base_url = base_url
+        self.base_url_env = base_url_env
+        self.headers = headers or {}
+
+    @property
+    def base_url(self) -> str:
+        return ((os.environ.get(self.base_url_env) or "").strip() if self.base_url_env else "") or self.default_base_url
+
+    def env_keys(self) -> set[str]:
+        return super().env_keys() | ({self.base_url_env} if self.base_url_env else set())
+
+    def _request(self, req: Request) -> tuple[str, dict, dict]:
+        headers = {"Authorization": f"Bearer {self.api_key() or self.name}", "Content-Type": "application/json",
+                   **self.headers}
+        body = {"model": self.model, "messages": req.messages, "max_tokens": req.max_tokens}
+        if req.temperature is not None:
+            body["temperature"] = req.temperature
+        return f"{self.base_url.rstrip('/')}/chat/completions", headers, body
+
+    def call(self, req: Request) -> dict:
+        url, headers, body = self._request(req)
+        timeout = req.timeout or self.timeout
+        try:
+            r = omega_http.post(url, read_timeout=timeout, headers=headers, json=body)
+            return _http_result(r.status_code, r.headers, r.json, req)
+        except requests.exceptions.Timeout:
+            return _fail(f"Timeout ({timeout}s)", True)
+        except Exception as e:
+            return self.error_result(e)
+
+    async def acall(self, req: Request) -> dict:
+        import httpx
+
+        url, headers, body = self._request(req)
+        timeout = req.timeout or self.timeout
+        try:
+            r = await asyncio.wait_for(omega_http.apost(url, read_timeout=timeout, headers=headers, json=body),
+                                       timeout + omega_http.CONNECT_TIMEOUT)
+            return _http_result(r.status_code, r.headers, r.json, req)
+        except (httpx.TimeoutException, asyncio.TimeoutError):
+            return _fail(f"Timeout ({timeout}s)", True)
+        except httpx.TransportError as e:
+            return _fail(f"Connection error: {e}", True)
+        except Exception as e:
+            return _fail(str(e), False)
+
+    def stream(self, req: Request) -> Iterator[str]:
+        url = f"{self.base_url.rstrip('/')}/chat/completions"
+        return llm_stream.openai_compatible(url, self.api_key() or self.name, self.model, req.messages,
+                                            max_tokens=req.max_tokens, read_timeout=req.timeout or self.timeout,
+                                            headers=self.headers)
+
+
+class Ollama(OpenAICompatible):
+    """Lokale Ollama: OpenAI-compatible /v1 voor gewone calls, /api/chat (NDJSON) voor streaming."""
+
+    def __init__(self, model: str, model_env: str = "", **kwargs: Any):
+        kwargs.setdefault("timeout", 120)
+        super().__init__("ollama", "http://localhost:11434", model, needs_key=False, model_env=model_env,
+                         base_url_env="OLLAMA_HOST", **kwargs)
+
+    @property
+    def model(self) -> str:
+        model = super().model
+        return model if ":" in model else self.default_model
+
+    @property
+    def base_url(self) -> str:
+        return f"{super().base_url.rstrip('/')}/v1"
+
+    def stream(self, req: Request) -> Iterator[str]:
+        host = self.base_url[:-len("/v1")]
+        return llm_stream.ollama(host, self.model, req.messages, read_timeout=req.timeout or self.timeout)
+
+
+_RETRY_DELAY_RE = re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)|retry in ([\d.]+)\s*s", re.IGNORECASE)
+
+
+class Gemini(Backend):
+    """google-generativeai. System prompt → system_instruction; verdere system-berichten (bijv. een
+    gesprekssamenvatting) worden een user/model-paar in de history. Met req.tools: automatic function calling."""
+
+    def __init__(self, **kwargs: Any):
+        super().__init__("gemini", "gemini-2.0-flash", "GOOGLE_API_KEY", model_env="GEMINI_MODEL",
+                         alt_env_keys=("GEMINI_API_KEY",), **kwargs)
+
+    @staticmethod
+    def _split(messages: list[dict]) -> tuple[str, list[dict], str]:
+        system, history = "", []
+        for i, m in enumerate(messages[:-1]):
+            if m["role"] == "system":
+                if i == 0:
+                    system = m["content"]
+                    continue
+                history.append({"role": "user", "parts": [m["content"]]})
+                history.append({"role": "model", "parts": ["Begrepen, ik neem dit mee."]})
+            else:
+                history.append({"role": "model" if m["role"] == "assistant" else "user", "parts": [m["content"]]})
+        return system, history, messages[-1]["content"]
+
+    def _chat(self, req: Request, automatic: bool):
+        import google.generativeai as genai
+
+        import gemini_tools
+        gemini_tools.configure(genai, self.api_key())
+        system, history, last = self._split(req.messages)
+        model = gemini_tools.model(genai, self.model, system, tuple(req.tools), req.max_tokens)
+        return model.start_chat(history=history, enable_automatic_function_calling=automatic), last
+
+    def _result(self, r: Any, req: Request) -> dict:
+        text = (r.text or "").strip() if r else ""
+        if not text:
+            return _fail("Gemini: leeg antwoord", True)
+        usage = getattr(r, "usage_metadata", None)
+        return _ok(text, getattr(usage, "prompt_token_count", 0) or req.prompt_tokens,
+                   getattr(usage, "candidates_token_count", 0) or len(text) // 4)
+
+    def error_result(self, e: Exception) -> dict:
+        if isinstance(e, ImportError):
+            return _fail("google-generativeai niet geïnstalleerd", False)
+        if isinstance(e, asyncio.TimeoutError):
+            return _fail(f"Timeout ({self.timeout}s)", True)
+        err = str(e)
+        retriable = any(s in err for s in ("429", "Resource exhausted", "500", "503", "Unavailable", "Deadline"))
+        m = _RETRY_DELAY_RE.search(err)
+        retry_after = float(m.group(1) or m.group(2)) if m else None
+        return _fail(err[:300], retriable, retry_after)
+
+    def call(self, req: Request) -> dict:
+        try:
+            chat, last = self._chat(req, automatic=bool(req.tools))
+            return self._result(chat.send_message(last), req)
+        except Exception as e:
+            return self.error_result(e)
+
+    async def acall(self, req: Request) -> dict:
+        if req.tools:
+            # Tools draaien synchroon (automatic function calling) → in een thread
+            return await super().acall(req)
+        try:
+            chat, last = self._chat(req, automatic=False)
+            r = await asyncio.wait_for(chat.send_message_async(last),
+                                       (req.timeout or self.timeout) + omega_http.CONNECT_TIMEOUT)
+            return self._result(r, req)
+        except Exception as e:
+            return self.error_result(e)
+
+    def stream(self, req: Request) -> Iterator[str]:
+        chat, last = self._chat(req, automatic=False)
+        return llm_stream.gemini(chat, last)
+
+
+# ——— Chains (registry) ———
+
+GEMINI = Gemini(cost_eur=0.001)  # ~€0.001 per call (gratis tier)
+
+CHAINS: dict[str, list[Backend]] = {
+    "holding": [
+        OpenAICompatible("cerebras", "https://api.cerebras.ai/v1", "llama3.1-8b", "CEREBRAS_API_KEY"),
+        OpenAICompatible("openrouter", "https://openrouter.ai/api/v1", "openrouter/auto", "OPENROUTER_API_KEY",
+                         headers={"HTTP-Referer": "https://omega-holding.local", "X-Title": "Omega Holding"}),
+        GEMINI,
+        Ollama("qwen3:4b"),
+        # Groq: klaargezet, pas actief als GROQ_API_KEY in .env staat
+        OpenAICompatible("groq", "https://api.groq.com/openai/v1", "llama-3.3-70b-versatile", "GROQ_API_KEY"),
+    ],
+    "chat": [
+        GEMINI,
+        OpenAICompatible("openai", "https://api.openai.com/v1", "gpt-4o-mini", "OPENAI_API_KEY",
+                         base_url_env="OPENAI_BASE_URL", model_env="OPENAI_MODEL", cost_eur=0.01),
+        Ollama("llama3.2:3b", model_env="OLLAMA_MODEL"),
+    ],
+}
+
+
+def chain(name: str) -> list[Backend]:
+    return CHAINS[name]
+
+
+def register(chain_name: str, backend: Backend, position: Optional[int] = None) -> None:
+    """Voeg een backend toe aan een chain (nieuwe chain als die nog niet bestaat); standaard achteraan."""
+    backends = CHAINS.setdefault(chain_name, [])
+    backends.insert(len(backends) if position is None else position, backend)
+    global _env_mtime
+    _env_mtime = None  # nieuwe env-keys meenemen bij de volgende ensure_env()
+
+
+# ——— .env ———
+
+_env_mtime: Optional[float] = None
+_ENV_EXTRA = ("OLLAMA_HOST",)
+
+
+def ensure_env() -> None:
+    """Vul ontbrekende of lege provider-variabelen uit .env; alleen opnieuw parsen als .env gewijzigd is."""
+    global _env_mtime
+    env_file = ROOT / ".env"
+    try:
+        mtime = env_file.stat().st_mtime
+    except OSError:
+        return
+    if mtime == _env_mtime:
+        return
+    _env_mtime = mtime
+    want = set(_ENV_EXTRA)
+    for backends in CHAINS.values():
+        for b in backends:
+            want |= b.env_keys()
+    with open(env_file, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#") or "=" not in line:
+                continue
+            k, _, v = line.partition("=")
+            k, v = k.strip(), v.strip()
+            if k not in want:
+                continue
+            if len(v) >= 2 and v[0] in "'\"" and v[0] == v[-1]:
+                v = v[1:-1]
+            if not (os.environ.get(k) or "").strip() and v:
+                os.environ[k] = v
+
+
+# ——— Health ———
+
+_local_health: dict[str, dict] = {}
+_health_lock = threading.Lock()
+
+
+def cooled_down(name: str) -> bool:
+    """Cooldown volgens dit proces (direct) of volgens het gedeelde scorebord (andere processen)."""
+    if provider_health.cooldown_remaining(name) > 0:
+        return True
+    with _health_lock:
+        state = _local_health.get(name)
+        if not state or state["failures"] < COOLDOWN_FAILURES:
+            return False
+        if time.time() >= state["cooldown_until"]:
+            _local_health.pop(name, None)
+            return False
+        return True
+
+
+def record(backend: Backend, result: dict, elapsed_ms: int) -> None:
+    """Uitkomst van één call naar de cooldown-administratie van dit proces en naar het gedeelde scorebord."""
+    with _health_lock:
+        if result["ok"]:
+            _local_health.pop(backend.name, None)
+        else:
+            state = _local_health.setdefault(backend.name, {"failures": 0, "cooldown_until": 0.0})
+            state["failures"] += 1
+            if state["failures"] >= COOLDOWN_FAILURES:
+                state["cooldown_until"] = time.time() + COOLDOWN_SECONDS
+                logger.warning("Provider %s in cooldown voor %ds na %d failures",
+                               backend.name, COOLDOWN_SECONDS, state["failures"])
+    provider_health.record(backend.name, result["ok"], elapsed_ms, result.get("tokens_out", 0),
+                           error="" if result["ok"] else result.get("error", ""),
+                           cooldown_failures=COOLDOWN_FAILURES, cooldown_seconds=COOLDOWN_SECONDS)
+
+
+def candidates(backends: list[Backend], prompt_tokens: int = 0, rank: bool = False) -> list[Backend]:
+    """Bruikbare backends (key aanwezig, geen cooldown); rank=True: herordend op het gedeelde scorebord."""
+    ordered = provider_health.rank(backends, prompt_tokens) if rank else backends
+    out = []
+    for b in ordered:
+        if not b.configured():
+            continue
+        if cooled_down(b.name):
+            logger.debug("Skip %s (cooldown)", b.name)
+            continue
+        out.append(b)
+    return out
+
+
+# ——— Kostenboek ———
+
+def ledger(backend: Backend, result: dict, tenant_id: Optional[str] = None, agent_id: str = "chat") -> None:
+    """
+    Eén geslaagde call boeken: kosten per call naar de daglimiet (mission_control) en, met tenant_id,
+    tokens naar cost_log (write-behind). Chat-calls horen bij geen tenant: cost_log heeft een FK op tenants.
+    """
+    import omega_telemetry
+
+    if tenant_id is not None:
+        try:
+            omega_telemetry.log_cost(tenant_id=tenant_id, agent_id=agent_id, model_used=backend.tag,
+                                     tokens_in=result.get("tokens_in", 0), tokens_out=result.get("tokens_out", 0),
+                                     cost_usd=0.0)
+        except Exception:
+            pass
+    if not backend.cost_eur:
+        return
+
+    def spend() -> None:
+        try:
+            from mission_control import record_spend
+            record_spend(backend.cost_eur, backend.name)
+        except Exception:
+            pass
+
+    try:
+        asyncio.get_running_loop().run_in_executor(None, spend)  # niet op de event loop naar SQLite
+    except RuntimeError:
+        spend()
+
+
+# ——— Aanroepen ———
+
+def _settle(backend: Backend, result: dict, start: float) -> tuple[dict, int]:
+    if result["ok"] and not result.get("content"):
+        result = _fail("empty response", True)
+    elapsed_ms = int((time.monotonic() - start) * 1000)
+    record(backend, result, elapsed_ms)
+    return result, elapsed_ms
+
+
+def call_one(backend: Backend, req: Request) -> tuple[dict, int]:
+    """Eén call binnen een limiter-slot, met health-administratie. (resultaat, ms); no_capacity zonder slot."""
+    start = time.monotonic()
+    with provider_limits.slot(backend.name) as slot:
+        if slot is None:
+            return {**_fail("geen capaciteit", False), "no_capacity": True}, 0
+        result = backend.call(req)
+        slot["outcome"] = provider_limits.classify(result)
+    return _settle(backend, result, start)
+
+
+async def acall_one(backend: Backend, req: Request) -> tuple[dict, int]:
+    """Async variant van call_one. Annuleren breekt de call af en telt niet als provider-fout."""
+    start = time.monotonic()
+    async with provider_limits.aslot(backend.name) as slot:
+        if slot is None:
+            return {**_fail("geen capaciteit", False), "no_capacity": True}, 0
+        result = await backend.acall(req)
+        slot["outcome"] = provider_limits.classify(result)
+    return _settle(backend, result, start)
+
+
+def _done(backend: Backend, result: dict, elapsed_ms: int, errors: list,
+          tenant_id: Optional[str], agent_id: str) -> Optional[dict]:
+    """Resultaat van een geslaagde call (geboekt), of None na het noteren van de fout."""
+    if result["ok"]:
+        ledger(backend, result, tenant_id, agent_id)
+        return {**result, "backend": backend, "model_tag": backend.tag, "elapsed_ms": elapsed_ms, "errors": errors}
+    errors.append(f"{backend.name}: {result.get('error', 'unknown')} ({elapsed_ms}ms)")
+    logger.warning("LLM %s FAILED: %s (%dms)", backend.name, result.get("error"), elapsed_ms)
+    return None
+
+
+def complete(backends: list[Backend], req: Request, attempts: int = 1, rank: bool = False,
+             tenant_id: Optional[str] = None, agent_id: str = "chat") -> dict:
+    """
+    Fallback over backends; per backend hooguit attempts pogingen bij tijdelijke fouten (met backoff).
+    Succes: resultaat + backend, model_tag, elapsed_ms; anders {"ok": False, "error", "errors"}.
+    """
+    errors: list[str] = []
+    for backend in candidates(backends, req.prompt_tokens, rank):
+        for attempt in range(attempts):
+            result, elapsed_ms = call_one(backend, req)
+            done = _done(backend, result, elapsed_ms, errors, tenant_id, agent_id)
+            if done is not None:
+                return done
+            if not result.get("retriable") or attempt == attempts - 1:
+                break
+            time.sleep(backoff(attempt, result.get("retry_after")))
+    return {**_fail("; ".join(errors) or "geen provider beschikbaar", False), "errors": errors}
+
+
+async def acomplete(backends: list[Backend], req: Request, attempts: int = 1, rank: bool = False,
+                    tenant_id: Optional[str] = None, agent_id: str = "chat") -> dict:
+    """Async variant van complete()."""
+    errors: list[str] = []
+    for backend in candidates(backends, req.prompt_tokens, rank):
+        for attempt in range(attempts):
+            result, elapsed_ms = await acall_one(backend, req)
+            done = _done(backend, result, elapsed_ms, errors, tenant_id, agent_id)
+            if done is not None:
+                return done
+            if not result.get("retriable") or attempt == attempts - 1:
+                break
+            await asyncio.sleep(backoff(attempt, result.get("retry_after")))
+    return {**_fail("; ".join(errors) or "geen provider beschikbaar", False), "errors": errors}
+
+
+class _StreamFailed(Exception):
+    def __init__(self, result: dict):
+        super().__init__(result.get("error"))
+        self.result = result
+
+
+def stream(backends: list[Backend], req: Request, attempts: int = 1,
+           tenant_id: Optional[str] = None, agent_id: str = "chat") -> Iterator:
+    """
+    Tekst-delta's van de eerste backend die levert. Retries (met backoff) alleen vóór de eerste delta;
+    valt een backend halverwege weg, dan volgt llm_stream.RESET en neemt de volgende het over.
+    Wil Gemini een tool aanroepen (ToolCallRequired), dan wordt die beurt met call() afgehandeld en in één keer geleverd.
+    Levert niets als geen enkele backend antwoordt.
+    """
+    for backend in candidates(backends, req.prompt_tokens):
+        for attempt in range(attempts):
+            parts: list[str] = []
+            start = time.monotonic()
+            try:
+                with provider_limits.slot(backend.name) as slot:
+                    if slot is None:
+                        logger.warning("LLM %s overgeslagen: geen capaciteit", backend.name)
+                        break
+                    try:
+                        for delta in backend.stream(req):
+                            parts.append(delta)
+                            yield delta
+                    except llm_stream.ToolCallRequired:
+                        slot["outcome"] = "ok"
+                        raise
+                    except Exception as e:
+                        result = backend.error_result(e)
+                        slot["outcome"] = provider_limits.classify(result)
+                        raise _StreamFailed(result) from e
+                    slot["outcome"] = "ok" if parts else "error"
+            except llm_stream.ToolCallRequired:
+                if parts:
+                    yield llm_stream.RESET
+                result, elapsed_ms = call_one(backend, req)
+                if _done(backend, result, elapsed_ms, [], tenant_id, agent_id) is not None:
+                    yield result["content"]
+                    return
+                break
+            except _StreamFailed as e:
+                _settle(backend, e.result, start)
+                logger.warning("LLM %s stream failed: %s", backend.name, e.result.get("error"))
+                if parts:
+                    yield llm_stream.RESET
+                    break
+                if not e.result.get("retriable") or attempt == attempts - 1:
+                    break
+                time.sleep(backoff(attempt, e.result.get("retry_after")))
+                continue
+            content = "".join(parts).strip()
+            result, elapsed_ms = _settle(backend, _ok(content, req.prompt_tokens, len(content) // 4), start)
+            if _done(backend, result, elapsed_ms, [], tenant_id, agent_id) is not None:
+                return
+            break  # leeg antwoord → volgende backend
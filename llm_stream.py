@@ -0,0 +1,89 @@
+"""
+Omega AI-Holding — Streaming LLM-antwoorden per provider (tekst-delta's zodra ze binnenkomen).
+Doel: time-to-first-token bepaalt de waargenomen latency, niet de totale generatietijd.
+- openai_compatible: Server-Sent Events ("data: {...}" … "data: [DONE]") — OpenAI, Cerebras, OpenRouter, Groq
+- ollama: /api/chat met "stream": true — NDJSON, één JSON-object per regel tot "done": true
+- gemini: chat.send_message(..., stream=True); stopt met ToolCallRequired zodra het model een tool wil aanroepen
+HTTP gaat via de gedeelde pools van omega_http (stream=True); de read-timeout geldt per chunk, niet voor het geheel.
+Fouten vóór de eerste delta zijn gewone exceptions, zodat de aanroeper kan terugvallen op de volgende provider.
+RESET is een marker voor consumenten: vergeet de tot nu toe getoonde tekst (provider viel halverwege weg).
+"""
+import json
+from typing import Any, Iterable, Iterator, Optional
+
+import omega_http
+
+RESET = object()
+
+
+class ToolCallRequired(Exception):
+    """Gemini wil een function call doen; zonder automatische tool-afhandeling kan de stream niet verder."""
+
+
+def _sse_data(lines: Iterable) -> Iterator[str]:
+    """De data-velden van een SSE-stream, tot en met [DONE]. Commentaar- en event-regels worden overgeslagen."""
+    for raw in lines:
+        if not raw:
+            continue
+        line = raw.decode("utf-8", "replace") if isinstance(raw, bytes) else raw
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        yield data
+
+
+def openai_compatible(url: str, api_key: str, model: str, messages: list[dict],
+                      max_tokens: int = 1024, read_timeout: float = 60,
+                      headers: Optional[dict] = None) -> Iterator[str]:
+    """Stream een chat completion van een OpenAI-compatible endpoint (url = …/chat/completions)."""
+    hdrs = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json", **(headers or {})}
+    body = {"model": model, "messages": messages, "max_tokens": max_tokens, "stream": True}
+    with omega_http.post(url, read_timeout=read_timeout, headers=hdrs, json=body, stream=True) as resp:
+        resp.raise_for_status()
+        for data in _sse_data(resp.iter_lines()):
+            try:
+                chunk = json.loads(data)
+            except ValueError:
+                continue
+            if chunk.get("error"):
+                raise RuntimeError(str(chunk["error"])[:200])
+            for choice in chunk.get("choices") or []:
+                delta = (choice.get("delta") or {}).get("content")
+                if delta:
+                    yield delta
+
+
+def ollama(base_url: str, model: str, messages: list[dict], read_timeout: float = 120) -> Iterator[str]:
+    """Stream een antwoord van Ollama (/api/chat, NDJSON)."""
+    body = {"model": model, "messages": messages, "stream": True}
+    with omega_http.post(f"{base_url.rstrip('/')}/api/chat", read_timeout=read_timeout,
+                         json=body, stream=True) as resp:
+        resp.raise_for_status()
+        for line in resp.iter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if chunk.get("error"):
+                raise RuntimeError(str(chunk["error"])[:200])
+            delta = (chunk.get("message") or {}).get("content")
+            if delta:
+                yield delta
+            if chunk.get("done"):
+                return
+
+
+def gemini(chat: Any, message: str) -> Iterator[str]:
+    """
+    Stream één beurt van een Gemini ChatSession (start_chat zonder automatic function calling).
+    Bevat een chunk een function call, dan volgt ToolCallRequired: die beurt moet via het niet-streamende tool-pad.
+    """
+    for chunk in chat.send_message(message, stream=True):
+        candidates = getattr(chunk, "candidates", None) or []
+        parts = candidates[0].content.parts if candidates else []
+        if any(getattr(getattr(p, "function_call", None), "name", "") for p in parts):
+            raise ToolCallRequired()
+        text = "".join(getattr(p, "text", "") or "" for p in parts)
+        if text:
+            yield text
@@ -0,0 +1,57 @@
+-- =============================================
+-- OMEGA KERN TABELLEN
+-- missions, state, tasks, notes, approvals, heartbeat
+-- Idempotent (CREATE IF NOT EXISTS): bestaande databases blijven intact
+-- =============================================
+
+CREATE TABLE IF NOT EXISTS missions (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'QUEUED',
+    assigned_specialist TEXT NOT NULL DEFAULT 'shuri',
+    source TEXT DEFAULT 'telegram',
+    payload TEXT,
+    result TEXT,
+    progress REAL NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_missions_status ON missions(status);
+CREATE INDEX IF NOT EXISTS idx_missions_updated ON missions(updated_at);
+
+CREATE TABLE IF NOT EXISTS mission_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    description TEXT NOT NULL,
+    prioriteit TEXT NOT NULL DEFAULT 'normaal',
+    status TEXT NOT NULL DEFAULT 'open',
+    created TEXT NOT NULL,
+    completed TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
+
+CREATE TABLE IF NOT EXISTS notes (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_notes_created ON notes(created_at);
+
+CREATE TABLE IF NOT EXISTS pending_approvals (
+    chat_id TEXT PRIMARY KEY,
+    approval_id TEXT NOT NULL,
+    description TEXT NOT NULL,
+    action TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS heartbeat_history (
+    ts INTEGER NOT NULL,
+    ok INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_heartbeat_ts ON heartbeat_history(ts);
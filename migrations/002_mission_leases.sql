@@ -0,0 +1,11 @@
+-- =============================================
+-- MISSION LEASES
+-- Workers claimen missies atomair (UPDATE ... RETURNING) met een lease;
+-- verlopen leases worden terug in de queue gezet.
+-- =============================================
+
+ALTER TABLE missions ADD COLUMN lease_owner TEXT;
+ALTER TABLE missions ADD COLUMN lease_expires_at INTEGER;
+
+CREATE INDEX IF NOT EXISTS idx_missions_queue ON missions(status, assigned_specialist, created_at);
+CREATE INDEX IF NOT EXISTS idx_missions_lease ON missions(lease_expires_at) WHERE lease_expires_at IS NOT NULL;
@@ -0,0 +1,21 @@
+-- =============================================
+-- WORKER METRICS
+-- Throughput per specialist per meetvenster (scripts/agent_workers.py)
+-- =============================================
+
+CREATE TABLE IF NOT EXISTS worker_metrics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts INTEGER NOT NULL,
+    worker TEXT NOT NULL,
+    specialist TEXT NOT NULL,
+    window_seconds REAL NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    released INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    missions_per_min REAL NOT NULL DEFAULT 0,
+    avg_queue_wait_s REAL,
+    max_queue_wait_s REAL,
+    in_flight INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_worker_metrics_ts ON worker_metrics(ts);
@@ -0,0 +1,31 @@
+-- =============================================
+-- SPEND LEDGER (circuit breaker)
+-- Append-only ledger per betaalde call + dagelijkse rollup met atomaire increments.
+-- Vervangt daily_spend_eur / circuit_breaker_tripped in mission_state.
+-- =============================================
+
+CREATE TABLE IF NOT EXISTS spend_ledger (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    day TEXT NOT NULL,
+    amount_eur REAL NOT NULL,
+    source TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_spend_ledger_day ON spend_ledger(day);
+
+CREATE TABLE IF NOT EXISTS spend_daily (
+    day TEXT PRIMARY KEY,
+    spend_eur REAL NOT NULL DEFAULT 0,
+    tripped INTEGER NOT NULL DEFAULT 0
+);
+
+-- Lopende dag uit de oude mission_state-keys overnemen. state_set slaat strings ongecodeerd op
+-- (last_reset_date = 2026-02-24, zonder quotes), andere waarden als JSON: beide vormen accepteren.
+INSERT OR IGNORE INTO spend_daily (day, spend_eur, tripped)
+SELECT CASE WHEN json_valid(d.value) THEN json_extract(d.value, '$') ELSE d.value END,
+       CAST(s.value AS REAL),
+       CASE WHEN t.value = 'true' THEN 1 ELSE 0 END
+FROM mission_state d
+JOIN mission_state s ON s.key = 'daily_spend_eur'
+LEFT JOIN mission_state t ON t.key = 'circuit_breaker_tripped'
+WHERE d.key = 'last_reset_date';
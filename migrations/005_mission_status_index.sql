@@ -0,0 +1,6 @@
+-- =============================================
+-- MISSION STATUS + KEYSET INDEX
+-- SQL-side filter per status, gesorteerd op updated_at (keyset paginering op (updated_at, id))
+-- =============================================
+
+CREATE INDEX IF NOT EXISTS idx_missions_status_updated ON missions(status, updated_at, id);
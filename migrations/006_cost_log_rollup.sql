@@ -0,0 +1,21 @@
+-- =============================================
+-- COST LOG ROLLUP
+-- Maandtotalen van gearchiveerde cost_log-rijen (scripts/archive_omega_db.py),
+-- zodat cost_log_summary na archivering dezelfde totalen blijft geven.
+-- =============================================
+
+CREATE TABLE IF NOT EXISTS cost_log_rollup (
+    tenant_id TEXT NOT NULL,
+    agent_id TEXT NOT NULL,
+    model_used TEXT NOT NULL DEFAULT '',
+    month TEXT NOT NULL,
+    tokens_in INTEGER NOT NULL DEFAULT 0,
+    tokens_out INTEGER NOT NULL DEFAULT 0,
+    cost_usd REAL NOT NULL DEFAULT 0.0,
+    call_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (tenant_id, agent_id, model_used, month)
+);
+
+CREATE INDEX IF NOT EXISTS idx_cost_log_created ON cost_log(created_at);
+CREATE INDEX IF NOT EXISTS idx_audit_created ON holding_audit(created_at);
+CREATE INDEX IF NOT EXISTS idx_corrections_created ON corrections(created_at);
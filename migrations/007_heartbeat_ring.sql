@@ -0,0 +1,27 @@
+-- =============================================
+-- HEARTBEAT RING BUFFER + UURROLLUP
+-- heartbeat_ring: vaste 1440 slots (minuut van de dag); INSERT overschrijft het slot van gisteren,
+-- dus geen COUNT(*) of opruim-DELETE per heartbeat. heartbeat_hourly: beats per uur voor uptime %.
+-- =============================================
+
+CREATE TABLE IF NOT EXISTS heartbeat_ring (
+    slot INTEGER PRIMARY KEY CHECK (slot BETWEEN 0 AND 1439),
+    ts INTEGER NOT NULL,
+    ok INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS heartbeat_hourly (
+    hour INTEGER PRIMARY KEY,
+    beats INTEGER NOT NULL DEFAULT 0,
+    ok_beats INTEGER NOT NULL DEFAULT 0
+);
+
+-- Bestaande punten overnemen (oudste eerst, zodat het nieuwste punt per slot blijft staan)
+INSERT OR REPLACE INTO heartbeat_ring (slot, ts, ok)
+SELECT (ts / 60) % 1440, ts, ok FROM heartbeat_history ORDER BY ts;
+
+INSERT OR IGNORE INTO heartbeat_hourly (hour, beats, ok_beats)
+SELECT (ts / 3600) * 3600, COUNT(*), SUM(CASE WHEN ok THEN 1 ELSE 0 END)
+FROM heartbeat_history GROUP BY ts / 3600;
+
+DROP TABLE IF EXISTS heartbeat_history;
@@ -0,0 +1,115 @@
+-- =============================================
+-- FULL-TEXT SEARCH (FTS5)
+-- search_fts indexeert notes, tasks, missions en holding_tasks; ranking via bm25.
+-- search_docs koppelt de FTS-rowid stabiel aan (kind, ref_id): de rowid van tabellen met een
+-- TEXT primary key kan bij VACUUM veranderen, een INTEGER PRIMARY KEY niet.
+-- Triggers houden de index synchroon bij INSERT/UPDATE/DELETE.
+-- =============================================
+
+CREATE TABLE IF NOT EXISTS search_docs (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    ref_id TEXT NOT NULL,
+    tenant_id TEXT,
+    UNIQUE (kind, ref_id)
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+    title, body, tokenize = 'unicode61 remove_diacritics 2'
+);
+
+-- notes
+INSERT OR IGNORE INTO search_docs (kind, ref_id, tenant_id) SELECT 'note', id, NULL FROM notes;
+INSERT INTO search_fts (rowid, title, body)
+SELECT d.id, t.title, t.content FROM notes t JOIN search_docs d ON d.kind = 'note' AND d.ref_id = t.id;
+
+CREATE TRIGGER IF NOT EXISTS search_notes_ai AFTER INSERT ON notes BEGIN
+    INSERT OR IGNORE INTO search_docs (kind, ref_id, tenant_id) VALUES ('note', new.id, NULL);
+    DELETE FROM search_fts WHERE rowid = (SELECT id FROM search_docs WHERE kind = 'note' AND ref_id = new.id);
+    INSERT INTO search_fts (rowid, title, body)
+    VALUES ((SELECT id FROM search_docs WHERE kind = 'note' AND ref_id = new.id), new.title, new.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS search_notes_ad AFTER DELETE ON notes BEGIN
+    DELETE FROM search_fts WHERE rowid = (SELECT id FROM search_docs WHERE kind = 'note' AND ref_id = old.id);
+    DELETE FROM search_docs WHERE kind = 'note' AND ref_id = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS search_notes_au AFTER UPDATE OF title, content ON notes
+WHEN old.title IS NOT new.title OR old.content IS NOT new.content BEGIN
+    DELETE FROM search_fts WHERE rowid = (SELECT id FROM search_docs WHERE kind = 'note' AND ref_id = old.id);
+    INSERT INTO search_fts (rowid, title, body)
+    VALUES ((SELECT id FROM search_docs WHERE kind = 'note' AND ref_id = new.id), new.title, new.content);
+END;
+
+-- tasks
+INSERT OR IGNORE INTO search_docs (kind, ref_id, tenant_id) SELECT 'task', id, NULL FROM tasks;
+INSERT INTO search_fts (rowid, title, body)
+SELECT d.id, '', t.description FROM tasks t JOIN search_docs d ON d.kind = 'task' AND d.ref_id = t.id;
+
+CREATE TRIGGER IF NOT EXISTS search_tasks_ai AFTER INSERT ON tasks BEGIN
+    INSERT OR IGNORE INTO search_docs (kind, ref_id, tenant_id) VALUES ('task', new.id, NULL);
+    DELETE FROM search_fts WHERE rowid = (SELECT id FROM search_docs WHERE kind = 'task' AND ref_id = new.id);
+    INSERT INTO search_fts (rowid, title, body)
+    VALUES ((SELECT id FROM search_docs WHERE kind = 'task' AND ref_id = new.id), '', new.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS search_tasks_ad AFTER DELETE ON tasks BEGIN
+    DELETE FROM search_fts WHERE rowid = (SELECT id FROM search_docs WHERE kind = 'task' AND ref_id = old.id);
+    DELETE FROM search_docs WHERE kind = 'task' AND ref_id = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS search_tasks_au AFTER UPDATE OF description ON tasks
+WHEN old.description IS NOT new.description BEGIN
+    DELETE FROM search_fts WHERE rowid = (SELECT id FROM search_docs WHERE kind = 'task' AND ref_id = old.id);
+    INSERT INTO search_fts (rowid, title, body)
+    VALUES ((SELECT id FROM search_docs WHERE kind = 'task' AND ref_id = new.id), '', new.description);
+END;
+
+-- missions
+INSERT OR IGNORE INTO search_docs (kind, ref_id, tenant_id) SELECT 'mission', id, NULL FROM missions;
+INSERT INTO search_fts (rowid, title, body)
+SELECT d.id, t.title, COALESCE(t.result, '') FROM missions t JOIN search_docs d ON d.kind = 'mission' AND d.ref_id = t.id;
+
+CREATE TRIGGER IF NOT EXISTS search_missions_ai AFTER INSERT ON missions BEGIN
+    INSERT OR IGNORE INTO search_docs (kind, ref_id, tenant_id) VALUES ('mission', new.id, NULL);
+    DELETE FROM search_fts WHERE rowid = (SELECT id FROM search_docs WHERE kind = 'mission' AND ref_id = new.id);
+    INSERT INTO search_fts (rowid, title, body)
+    VALUES ((SELECT id FROM search_docs WHERE kind = 'mission' AND ref_id = new.id), new.title, COALESCE(new.result, ''));
+END;
+
+CREATE TRIGGER IF NOT EXISTS search_missions_ad AFTER DELETE ON missions BEGIN
+    DELETE FROM search_fts WHERE rowid = (SELECT id FROM search_docs WHERE kind = 'mission' AND ref_id = old.id);
+    DELETE FROM search_docs WHERE kind = 'mission' AND ref_id = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS search_missions_au AFTER UPDATE OF title, result ON missions
+WHEN old.title IS NOT new.title OR old.result IS NOT new.result BEGIN
+    DELETE FROM search_fts WHERE rowid = (SELECT id FROM search_docs WHERE kind = 'mission' AND ref_id = old.id);
+    INSERT INTO search_fts (rowid, title, body)
+    VALUES ((SELECT id FROM search_docs WHERE kind = 'mission' AND ref_id = new.id), new.title, COALESCE(new.result, ''));
+END;
+
+-- holding_tasks
+INSERT OR IGNORE INTO search_docs (kind, ref_id, tenant_id) SELECT 'holding_task', id, holding_tasks.tenant_id FROM holding_tasks;
+INSERT INTO search_fts (rowid, title, body)
+SELECT d.id, t.title, COALESCE(t.description, '') || ' ' || COALESCE(t.output_data, '') FROM holding_tasks t JOIN search_docs d ON d.kind = 'holding_task' AND d.ref_id = t.id;
+
+CREATE TRIGGER IF NOT EXISTS search_holding_tasks_ai AFTER INSERT ON holding_tasks BEGIN
+    INSERT OR IGNORE INTO search_docs (kind, ref_id, tenant_id) VALUES ('holding_task', new.id, new.tenant_id);
+    DELETE FROM search_fts WHERE rowid = (SELECT id FROM search_docs WHERE kind = 'holding_task' AND ref_id = new.id);
+    INSERT INTO search_fts (rowid, title, body)
+    VALUES ((SELECT id FROM search_docs WHERE kind = 'holding_task' AND ref_id = new.id), new.title, COALESCE(new.description, '') || ' ' || COALESCE(new.output_data, ''));
+END;
+
+CREATE TRIGGER IF NOT EXISTS search_holding_tasks_ad AFTER DELETE ON holding_tasks BEGIN
+    DELETE FROM search_fts WHERE rowid = (SELECT id FROM search_docs WHERE kind = 'holding_task' AND ref_id = old.id);
+    DELETE FROM search_docs WHERE kind = 'holding_task' AND ref_id = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS search_holding_tasks_au AFTER UPDATE OF title, description, output_data ON holding_tasks
+WHEN old.title IS NOT new.title OR old.description IS NOT new.description OR old.output_data IS NOT new.output_data BEGIN
+    DELETE FROM search_fts WHERE rowid = (SELECT id FROM search_docs WHERE kind = 'holding_task' AND ref_id = old.id);
+    INSERT INTO search_fts (rowid, title, body)
+    VALUES ((SELECT id FROM search_docs WHERE kind = 'holding_task' AND ref_id = new.id), new.title, COALESCE(new.description, '') || ' ' || COALESCE(new.output_data, ''));
+END;
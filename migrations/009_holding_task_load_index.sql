@@ -0,0 +1,6 @@
+-- =============================================
+-- HOLDING TASK LOAD INDEX
+-- Covering index voor omega_db.holding_agent_load: open taken + goedkeuringsratio per agent per tenant
+-- =============================================
+
+CREATE INDEX IF NOT EXISTS idx_htasks_tenant_assigned_status ON holding_tasks(tenant_id, assigned_to, status);
@@ -0,0 +1,28 @@
+-- =============================================
+-- PROVIDER HEALTH (holding LLM-providers)
+-- Gedeeld door bridge, workers en pipeline: EWMA-latency, tokens/s, succesratio, cooldown, laatste fout.
+-- provider_latency: ring van recente responstijden per provider voor p50/p95 (slot wordt overschreven).
+-- Tijden zijn unix-seconden (REAL), zodat processen ze direct kunnen vergelijken.
+-- =============================================
+
+CREATE TABLE IF NOT EXISTS provider_health (
+    provider TEXT PRIMARY KEY,
+    calls INTEGER NOT NULL DEFAULT 0,
+    successes INTEGER NOT NULL DEFAULT 0,
+    consecutive_failures INTEGER NOT NULL DEFAULT 0,
+    cooldown_until REAL NOT NULL DEFAULT 0,
+    ewma_latency_ms REAL,
+    ewma_tokens_per_sec REAL,
+    ewma_success REAL,
+    last_error TEXT,
+    last_error_at REAL,
+    updated_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS provider_latency (
+    provider TEXT NOT NULL,
+    slot INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    ms INTEGER NOT NULL,
+    PRIMARY KEY (provider, slot)
+) WITHOUT ROWID;
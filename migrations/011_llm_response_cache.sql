@@ -0,0 +1,23 @@
+-- =============================================
+-- LLM RESPONSE CACHE (holding)
+-- Exacte tier: key = sha256(tenant, model-config, system_prompt, user_prompt); TTL op created_at,
+-- LRU-eviction op last_hit_at. Semantische tier: embedding (float32) van de user_prompt,
+-- alleen vergeleken binnen dezelfde tenant én dezelfde system_prompt (system_hash).
+-- =============================================
+
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    system_hash TEXT NOT NULL,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    tokens_in INTEGER NOT NULL DEFAULT 0,
+    tokens_out INTEGER NOT NULL DEFAULT 0,
+    embedding BLOB,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    last_hit_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_llm_cache_lru ON llm_cache(last_hit_at);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_semantic ON llm_cache(tenant_id, system_hash, created_at);
@@ -0,0 +1,24 @@
+-- =============================================
+-- CHAT MEMORY (Telegram-conversaties per chat_id)
+-- chat_turns: recente beurten (user/assistant) met geschatte tokens; venster = nieuwste beurten binnen het budget.
+-- chat_summaries: lopende samenvatting van oudere beurten; turns t/m upto_id zijn erin opgenomen en verwijderd.
+-- =============================================
+
+CREATE TABLE IF NOT EXISTS chat_turns (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_chat_turns_chat ON chat_turns(chat_id, id);
+
+CREATE TABLE IF NOT EXISTS chat_summaries (
+    chat_id TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    upto_id INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
@@ -0,0 +1,7 @@
+-- =============================================
+-- MISSION ATTEMPTS
+-- Elke claim telt een poging; een missie waarvan de lease MISSION_MAX_ATTEMPTS keer
+-- verloopt (worker crasht of execute_mission faalt) gaat naar FAILED i.p.v. eindeloos terug in de queue.
+-- =============================================
+
+ALTER TABLE missions ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0;
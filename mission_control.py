@@ -4,6 +4,10 @@ Single Source of Truth: data/omega.db (omega_db).
 Jarvis orchestrates (delegates); specialists execute.
 """
 import logging
+import os
+import socket
+import sqlite3
+import time
 import uuid
 from datetime import datetime, timezone, date
 from pathlib import Path
@@ -12,6 +16,8 @@ from typing import Any
 ROOT = Path(__file__).resolve().parent
 AGENTS_DIR = ROOT / "holding" / "agents"
 DEFAULT_SPEND_LIMIT_EUR = 10.0
+# Circuit breaker leest dagtotaal + limiet uit een procescache; record_spend werkt die direct bij
+CIRCUIT_CACHE_SECONDS = 5.0
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +26,9 @@ STATUS_PENDING = "PENDING"
 STATUS_IN_PROGRESS = "IN_PROGRESS"
 STATUS_DOING = "DOING"
 STATUS_COMPLETED = "COMPLETED"
+STATUS_FAILED = "FAILED"  # lease te vaak verlopen (zie omega_db.MISSION_MAX_ATTEMPTS)
 SPECIALISTS = ("jarvis", "shuri", "vision", "friday")
+DEFAULT_LEASE_SECONDS = 300
 
 # Lazy init schema on first use
 _schema_inited = False
@@ -40,10 +48,10 @@ def load_state() -> dict:
     import omega_db
     missions = omega_db.missions_get_all()
     state = omega_db.state_get_all()
-    state.setdefault("daily_spend_eur", 0.0)
+    today = date.today().isoformat()
+    state["daily_spend_eur"], state["circuit_breaker_tripped"] = omega_db.spend_get(today)
+    state["last_reset_date"] = today
     state.setdefault("spend_limit_eur", DEFAULT_SPEND_LIMIT_EUR)
-    state.setdefault("last_reset_date", date.today().isoformat())
-    state.setdefault("circuit_breaker_tripped", False)
     state.setdefault("tunnel_url", "")
     return {"missions": missions, "state": state}
 
@@ -56,18 +64,6 @@ def save_state(data: dict) -> None:
         omega_db.state_set(k, v)
 
 
-def _reset_daily_if_needed(state: dict) -> None:
-    today = date.today().isoformat()
-    if state.get("last_reset_date") != today:
-        state["daily_spend_eur"] = 0.0
-        state["last_reset_date"] = today
-        state["circuit_breaker_tripped"] = False
-        import omega_db
-        omega_db.state_set("daily_spend_eur", state["daily_spend_eur"])
-        omega_db.state_set("last_reset_date", state["last_reset_date"])
-        omega_db.state_set("circuit_breaker_tripped", state["circuit_breaker_tripped"])
-
-
 def add_mission(
     title: str,
     source: str = "telegram",
@@ -77,17 +73,25 @@ def add_mission(
     """Jarvis: add mission to queue; assign specialist. Returns mission id."""
     _ensure_db()
     import omega_db
-    data = load_state()
-    _reset_daily_if_needed(data["state"])
     specialist = (assigned_specialist or "shuri").lower()
     if specialist not in SPECIALISTS and specialist != "new":
         specialist = "shuri"
     mid = str(uuid.uuid4())[:8]
     now = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
     omega_db.mission_insert(mid, title[:500], STATUS_QUEUED, specialist, source, payload or {}, now, now)
+    _notify_workers(specialist)
     return mid
 
 
+def _notify_workers(specialist: str) -> None:
+    """Wek wachtende agent_workers direct (best effort; zonder luisteraar pakt polling het op)."""
+    try:
+        import mission_notify
+        mission_notify.notify(specialist)
+    except Exception as e:
+        logger.debug("mission notify: %s", e)
+
+
 def assign_mission(mission_id: str, specialist: str) -> bool:
     """Set assigned_specialist and optionally move to IN_PROGRESS."""
     _ensure_db()
@@ -102,11 +106,12 @@ def start_mission(mission_id: str) -> bool:
     return omega_db.mission_update_status(mission_id, STATUS_IN_PROGRESS, progress=0.0)
 
 
-def complete_mission(mission_id: str, result: str | None = None, progress: float = 1.0) -> bool:
-    """Mark mission COMPLETED."""
+def complete_mission(mission_id: str, result: str | None = None, progress: float = 1.0,
+                     owner: str | None = None) -> bool:
+    """Mark mission COMPLETED. Met owner alleen als die worker de lease nog heeft (anders False)."""
     _ensure_db()
     import omega_db
-    return omega_db.mission_update_status(mission_id, STATUS_COMPLETED, result=result, progress=progress)
+    return omega_db.mission_update_status(mission_id, STATUS_COMPLETED, result=result, progress=progress, owner=owner)
 
 
 def set_mission_progress(mission_id: str, progress: float) -> bool:
@@ -115,29 +120,57 @@ def set_mission_progress(mission_id: str, progress: float) -> bool:
     return omega_db.mission_update_progress(mission_id, progress)
 
 
-def get_queued_missions(specialist: str | None = None) -> list:
-    data = load_state()
-    status_ok = (STATUS_QUEUED, STATUS_PENDING)
-    out = [m for m in data["missions"] if (m.get("status") or "").upper() in status_ok]
-    if specialist:
-        spec_lower = specialist.lower()
-        out = [m for m in out if (m.get("assigned_specialist") or m.get("assignee") or "").lower() == spec_lower]
-    return out
+def get_queued_missions(specialist: str | None = None, limit: int | None = None) -> list:
+    _ensure_db()
+    import omega_db
+    return omega_db.missions_query((STATUS_QUEUED, STATUS_PENDING), specialist, limit)
+
+
+def worker_id() -> str:
+    """Lease-eigenaar voor dit proces (host:pid)."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_next_mission(specialist: str, lease_seconds: int = DEFAULT_LEASE_SECONDS,
+                       owner: str | None = None) -> dict | None:
+    """
+    Claim atomair de oudste queued missie voor specialist en zet hem op IN_PROGRESS.
+    Veilig met meerdere worker-processen; verlopen leases gaan eerst terug in de queue.
+    """
+    _ensure_db()
+    import omega_db
+    return omega_db.mission_claim_next(specialist, owner or worker_id(), lease_seconds)
+
+
+def renew_mission_lease(mission_id: str, lease_seconds: int = DEFAULT_LEASE_SECONDS,
+                        owner: str | None = None) -> bool:
+    """Verleng de lease van een geclaimde missie (bij lange uitvoering)."""
+    _ensure_db()
+    import omega_db
+    return omega_db.mission_renew_lease(mission_id, owner or worker_id(), lease_seconds)
+
+
+def release_mission(mission_id: str, owner: str | None = None) -> bool:
+    """Geef een geclaimde maar niet afgeronde missie terug aan de queue."""
+    _ensure_db()
+    import omega_db
+    released = omega_db.mission_release_lease(mission_id, owner or worker_id())
+    if released:
+        _notify_workers("")
+    return released
 
 
-def get_in_progress_missions(specialist: str | None = None) -> list:
-    data = load_state()
-    out = [m for m in data["missions"] if (m.get("status") or "").upper() in (STATUS_IN_PROGRESS, STATUS_DOING)]
-    if specialist:
-        out = [m for m in out if (m.get("assigned_specialist") or "").lower() == specialist.lower()]
-    return out
+def get_in_progress_missions(specialist: str | None = None, limit: int | None = None) -> list:
+    _ensure_db()
+    import omega_db
+    return omega_db.missions_query((STATUS_IN_PROGRESS, STATUS_DOING), specialist, limit)
 
 
-def get_completed_missions(limit: int = 50) -> list:
-    data = load_state()
-    out = [m for m in data["missions"] if (m.get("status") or "").upper() == STATUS_COMPLETED]
-    out.sort(key=lambda x: x.get("updated_at") or "", reverse=True)
-    return out[:limit]
+def get_completed_missions(limit: int = 50, before: tuple[str, str] | None = None) -> list:
+    """Afgeronde missies, nieuwste eerst. Volgende pagina: before=(updated_at, id) van de laatste rij."""
+    _ensure_db()
+    import omega_db
+    return omega_db.missions_query((STATUS_COMPLETED,), limit=limit, before=before)
 
 
 # ——— Circuit Breaker ———
@@ -160,46 +193,86 @@ def _send_telegram_alert(text: str) -> None:
         pass
 
 
-def record_spend(amount_eur: float) -> None:
-    data = load_state()
-    _reset_daily_if_needed(data["state"])
-    was_ok = not data["state"].get("circuit_breaker_tripped") and (
-        data["state"].get("daily_spend_eur", 0) < data["state"].get("spend_limit_eur", DEFAULT_SPEND_LIMIT_EUR)
-    )
-    data["state"]["daily_spend_eur"] = data["state"].get("daily_spend_eur", 0) + amount_eur
-    if data["state"]["daily_spend_eur"] >= data["state"].get("spend_limit_eur", DEFAULT_SPEND_LIMIT_EUR):
-        data["state"]["circuit_breaker_tripped"] = True
-    save_state(data)
-    if was_ok and data["state"].get("circuit_breaker_tripped"):
+_spend_cache: dict = {}
+
+
+def _spend_limit() -> float:
+    import omega_db
+    try:
+        return float(omega_db.state_get("spend_limit_eur", DEFAULT_SPEND_LIMIT_EUR))
+    except (TypeError, ValueError):
+        return DEFAULT_SPEND_LIMIT_EUR
+
+
+def _spend_snapshot() -> dict:
+    """
+    Dagtotaal + limiet van vandaag; max CIRCUIT_CACHE_SECONDS oud. Dagwissel = nieuwe sleutel.
+    Database-fout: de laatst bekende stand van vandaag (anders 0), zodat een chatbericht niet crasht.
+    """
+    global _spend_cache
+    today = date.today().isoformat()
+    snap = _spend_cache
+    if snap.get("day") == today and time.monotonic() - snap["at"] < CIRCUIT_CACHE_SECONDS:
+        return snap
+    try:
+        _ensure_db()
+        import omega_db
+        spend, _ = omega_db.spend_get(today)
+        limit = _spend_limit()
+    except sqlite3.Error as e:
+        logger.warning("Circuit breaker: spend ledger onleesbaar (%s)", e)
+        known = snap.get("day") == today
+        spend = snap["spend"] if known else 0.0
+        limit = snap["limit"] if known else DEFAULT_SPEND_LIMIT_EUR
+    snap = {"day": today, "spend": spend, "limit": limit, "at": time.monotonic()}
+    _spend_cache = snap
+    return snap
+
+
+def record_spend(amount_eur: float, source: str = "") -> None:
+    """Boek kosten in de spend ledger (atomaire increment); alert één keer bij het passeren van de limiet."""
+    global _spend_cache
+    today = date.today().isoformat()
+    snap = _spend_snapshot()
+    limit = snap["limit"]
+    try:
+        _ensure_db()
+        import omega_db
+        total, tripped_now = omega_db.spend_record(today, amount_eur, limit, source)
+    except sqlite3.Error as e:
+        # Niet geboekt; wel in de procescache meetellen zodat de breaker in dit proces blijft werken
+        logger.warning("Spend ledger: %.4f EUR (%s) niet geboekt: %s", amount_eur, source, e)
+        total = snap["spend"] + amount_eur
+        tripped_now = snap["spend"] < limit <= total
+    _spend_cache = {"day": today, "spend": total, "limit": limit, "at": time.monotonic()}
+    if tripped_now:
         _send_telegram_alert(
-            f"⛔ Circuit Breaker: API-daglimiet bereikt (€{data['state']['daily_spend_eur']:.2f}). "
+            f"⛔ Circuit Breaker: API-daglimiet bereikt (€{total:.2f}). "
             "Geen betaalde API-calls tot morgen. Pas mission_control state.spend_limit_eur aan indien nodig."
         )
 
 
 def circuit_breaker_ok() -> bool:
     """True if we may still call paid APIs."""
-    data = load_state()
-    _reset_daily_if_needed(data["state"])
-    return not data["state"].get("circuit_breaker_tripped", False) and (
-        data["state"].get("daily_spend_eur", 0) < data["state"].get("spend_limit_eur", DEFAULT_SPEND_LIMIT_EUR)
-    )
+    snap = _spend_snapshot()
+    return snap["spend"] < snap["limit"]
 
 
 def get_daily_spend() -> tuple[float, float]:
-    data = load_state()
-    _reset_daily_if_needed(data["state"])
-    return data["state"].get("daily_spend_eur", 0), data["state"].get("spend_limit_eur", DEFAULT_SPEND_LIMIT_EUR)
+    snap = _spend_snapshot()
+    return snap["spend"], snap["limit"]
 
 
 def set_tunnel_url(url: str) -> None:
-    data = load_state()
-    data["state"]["tunnel_url"] = url
-    save_state(data)
+    _ensure_db()
+    import omega_db
+    omega_db.state_set("tunnel_url", url)
 
 
 def get_tunnel_url() -> str:
-    return load_state().get("state", {}).get("tunnel_url", "")
+    _ensure_db()
+    import omega_db
+    return omega_db.state_get("tunnel_url", "") or ""
 
 
 # ——— Architect Mode: create new specialist SOUL.md ———
@@ -0,0 +1,101 @@
+"""
+Omega Supremacy — Mission notify-kanaal.
+Unix-domain datagram sockets in data/mission_notify/: elke worker-proces bindt één socket,
+mission_control.add_mission stuurt een datagram (specialist) naar alle sockets.
+Workers blokkeren op het kanaal in plaats van omega_db te pollen; polling blijft als trage fallback.
+data/ is gedeeld tussen bridge- en worker-container (volume), dus dit werkt ook over containers heen.
+"""
+import logging
+import os
+import socket
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+ROOT = Path(__file__).resolve().parent
+NOTIFY_DIR = ROOT / "data" / "mission_notify"
+MAX_DATAGRAM = 256
+
+logger = logging.getLogger(__name__)
+
+
+def notify(specialist: str = "") -> int:
+    """Signaleer alle luisterende workers (best effort, non-blocking). Retourneert aantal bereikte workers."""
+    if not hasattr(socket, "AF_UNIX") or not NOTIFY_DIR.is_dir():
+        return 0
+    sent = 0
+    payload = (specialist or "").lower().encode("utf-8")[:MAX_DATAGRAM]
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    try:
+        for path in NOTIFY_DIR.glob("*.sock"):
+            try:
+                sock.sendto(payload, str(path))
+                sent += 1
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Worker is weg zonder op te ruimen
+                path.unlink(missing_ok=True)
+            except BlockingIOError:
+                # Buffer vol: worker heeft nog ongelezen signalen en wordt toch al wakker
+                sent += 1
+            except OSError as e:
+                logger.debug("mission_notify %s: %s", path.name, e)
+    finally:
+        sock.close()
+    return sent
+
+
+class Listener:
+    """Bindt een datagram-socket voor dit proces en roept on_signal(specialist) aan per bericht."""
+
+    def __init__(self, name: str, on_signal: Callable[[str], None]):
+        safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in name)[:64]
+        self.path = NOTIFY_DIR / f"{safe}.sock"
+        self.on_signal = on_signal
+        self._sock: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = threading.Event()
+
+    def start(self) -> bool:
+        """Start de luister-thread. False als Unix-sockets niet beschikbaar zijn (dan alleen polling)."""
+        if not hasattr(socket, "AF_UNIX"):
+            return False
+        try:
+            NOTIFY_DIR.mkdir(parents=True, exist_ok=True)
+            self.path.unlink(missing_ok=True)
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._sock.bind(str(self.path))
+            self._sock.settimeout(1.0)
+            os.chmod(self.path, 0o660)
+        except OSError as e:
+            logger.warning("mission_notify: kan %s niet binden (%s); alleen polling", self.path, e)
+            self._sock = None
+            return False
+        self._thread = threading.Thread(target=self._loop, name="mission-notify", daemon=True)
+        self._thread.start()
+        return True
+
+    def _loop(self) -> None:
+        sock = self._sock
+        while not self._closed.is_set():
+            try:
+                data = sock.recv(MAX_DATAGRAM)
+            except OSError:
+                if self._closed.is_set():
+                    return
+                continue
+            try:
+                self.on_signal(data.decode("utf-8", errors="ignore"))
+            except Exception as e:
+                logger.debug("mission_notify callback: %s", e)
+
+    def close(self) -> None:
+        self._closed.set()
+        if self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._sock.close()
+            self._sock = None
+        self.path.unlink(missing_ok=True)
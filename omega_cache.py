@@ -0,0 +1,104 @@
+"""
+Omega AI-Holding — Kleine in-process read-through cache.
+Benoemde TTL-caches (tenants, agents, SOUL-bestanden) met hit/miss-tellers voor monitoring.
+Schrijvende helpers in omega_db invalideren expliciet; de TTL vangt wijzigingen uit andere processen op.
+Bestanden worden gecachet op (mtime, grootte): een os.stat per aanroep, geen read zolang niets wijzigt.
+Gecachte waarden worden gedeeld: aanroepers mogen ze niet muteren.
+"""
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+DEFAULT_TTL = float(os.environ.get("OMEGA_CACHE_TTL", "30") or 30)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe dict met vervaltijd per entry en hit/miss/invalidatie-tellers."""
+
+    def __init__(self, name: str, ttl: float = DEFAULT_TTL, max_entries: int = 1024):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data: dict[Any, tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: Any, loader: Callable[[], Any]) -> Any:
+        """Waarde uit de cache, of loader() bij miss/verlopen (ook None wordt gecachet)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        value = loader()
+        with self._lock:
+            if len(self._data) >= self.max_entries and key not in self._data:
+                self._data.clear()
+            self._data[key] = (now + self.ttl, value)
+        return value
+
+    def invalidate(self, key: Any = _MISSING) -> None:
+        with self._lock:
+            if key is _MISSING:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._data)
+        total = self.hits + self.misses
+        return {"name": self.name, "size": size, "hits": self.hits, "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / total, 3) if total else None}
+
+
+_caches: dict[str, TTLCache] = {}
+_caches_lock = threading.Lock()
+
+
+def cache(name: str, ttl: float = DEFAULT_TTL) -> TTLCache:
+    """Geef (of maak) de benoemde cache."""
+    c = _caches.get(name)
+    if c is None:
+        with _caches_lock:
+            c = _caches.get(name)
+            if c is None:
+                c = _caches[name] = TTLCache(name, ttl)
+    return c
+
+
+def invalidate(*names: str) -> None:
+    """Leeg de genoemde caches (geen namen = alles)."""
+    for name in names or list(_caches):
+        c = _caches.get(name)
+        if c is not None:
+            c.invalidate()
+
+
+def stats() -> list[dict]:
+    return [c.stats() for c in list(_caches.values())]
+
+
+# ——— Bestanden (SOUL.md e.d.) ———
+
+_files = cache("files", ttl=float("inf"))
+
+
+def read_text(path: Path, encoding: str = "utf-8") -> Optional[str]:
+    """Lees een tekstbestand via de cache; opnieuw lezen zodra mtime of grootte verandert. None als het ontbreekt."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key = (str(path), st.st_mtime_ns, st.st_size)
+    return _files.get(key, lambda: Path(path).read_text(encoding=encoding))
@@ -2,20 +2,31 @@
 Omega AI-Holding — Centraal SQLite-zenuwstelsel.
 Eén database (data/omega.db) voor missions, state, tasks, notes, approvals, heartbeat.
 PRAGMA journal_mode=WAL op elke connectie voor gelijktijdige toegang.
+Connecties worden per databasebestand gepoold: PRAGMA's één keer per connectie,
+health check bij hergebruik. OMEGA_DB_POOL_SIZE=0 schakelt pooling uit.
 """
+import itertools
 import json
 import logging
+import os
+import random
 import sqlite3
+import threading
 from contextlib import contextmanager
 from pathlib import Path
 from typing import Any, Optional
 
+import omega_cache
+
 ROOT = Path(__file__).resolve().parent
 DATABASE_PATH = Path(__file__).resolve().parent / "data" / "omega.db"
 # TODO: SQLCipher in Fase 1+ (sqlcipher3, PRAGMA key via OMEGA_DB_KEY env var)
 MIGRATIONS_DIR = ROOT / "migrations"
 logger = logging.getLogger(__name__)
 
+# Max aantal idle connecties dat per databasebestand bewaard blijft (0 = connect-per-call)
+POOL_MAX_SIZE = int(os.environ.get("OMEGA_DB_POOL_SIZE", "8") or 0)
+
 
 def _apply_pragmas(conn: sqlite3.Connection) -> None:
     conn.execute("PRAGMA journal_mode=WAL;")
@@ -24,13 +35,100 @@ def _apply_pragmas(conn: sqlite3.Connection) -> None:
     conn.execute("PRAGMA foreign_keys=ON;")
 
 
-@contextmanager
-def get_connection():
-    """Sync context manager voor database-connectie. WAL op elke connectie."""
-    DATABASE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(str(DATABASE_PATH))
+def _new_connection(path: str) -> sqlite3.Connection:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
     conn.row_factory = sqlite3.Row
     _apply_pragmas(conn)
+    return conn
+
+
+def _is_healthy(conn: sqlite3.Connection) -> bool:
+    """Health check voor een idle connectie: open transactie terugdraaien + SELECT 1."""
+    try:
+        if conn.in_transaction:
+            conn.rollback()
+        conn.execute("SELECT 1").fetchone()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+class _ConnectionPool:
+    """
+    Begrensde pool van idle connecties voor één databasebestand.
+    Blokkeert nooit: bij een lege pool komt er een nieuwe connectie bij; bij teruggeven
+    boven POOL_MAX_SIZE wordt de connectie gesloten. Na fork() wordt niets hergebruikt.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.pid = os.getpid()
+        self._idle: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> sqlite3.Connection:
+        while True:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return _new_connection(self.path)
+            if _is_healthy(conn):
+                return conn
+            logger.debug("omega_db: ongezonde connectie uit pool verwijderd")
+            _close_quietly(conn)
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        if POOL_MAX_SIZE > 0 and os.getpid() == self.pid:
+            with self._lock:
+                if len(self._idle) < POOL_MAX_SIZE:
+                    self._idle.append(conn)
+                    return
+        _close_quietly(conn)
+
+    def close_all(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            _close_quietly(conn)
+
+
+_pools: dict[str, _ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _close_quietly(conn: sqlite3.Connection) -> None:
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+
+def _get_pool() -> _ConnectionPool:
+    path = str(DATABASE_PATH)
+    pool = _pools.get(path)
+    if pool is None or pool.pid != os.getpid():
+        with _pools_lock:
+            pool = _pools.get(path)
+            if pool is None or pool.pid != os.getpid():
+                pool = _pools[path] = _ConnectionPool(path)
+    return pool
+
+
+def close_pool() -> None:
+    """Sluit alle idle connecties (bij shutdown of na wissel van DATABASE_PATH)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
+
+
+@contextmanager
+def get_connection():
+    """Sync context manager voor database-connectie uit de pool. Commit bij succes, rollback bij fout."""
+    pool = _get_pool()
+    conn = pool.acquire()
     try:
         yield conn
         conn.commit()
@@ -38,73 +136,109 @@ def get_connection():
         conn.rollback()
         raise
     finally:
-        conn.close()
+        pool.release(conn)
+
+
+_schema_lock = threading.Lock()
+# Databasebestanden die in dit proces al op de laatste schema-versie staan
+_schema_ready: set[str] = set()
+# Mislukte migratie per databasebestand: (fout, monotonic-tijd); pas na MIGRATION_RETRY_SECONDS opnieuw proberen
+_schema_failed: dict[str, tuple["MigrationError", float]] = {}
+MIGRATION_RETRY_SECONDS = 300.0
+
+
+class MigrationError(sqlite3.DatabaseError):
+    """Een migratie mislukte; latere migraties zijn niet toegepast (schema staat op de versie ervóór)."""
+
+
+def _list_migrations() -> list[tuple[int, str, Path]]:
+    """Migratiebestanden NNN_naam.sql in MIGRATIONS_DIR, gesorteerd op versie."""
+    out = []
+    for path in MIGRATIONS_DIR.glob("*.sql"):
+        prefix = path.name.split("_", 1)[0]
+        if prefix.isdigit():
+            out.append((int(prefix), path.stem, path))
+    return sorted(out)
 
 
 def init_schema() -> None:
-    """Maak alle tabellen aan indien ze nog niet bestaan."""
-    with get_connection() as conn:
-        conn.executescript("""
-            CREATE TABLE IF NOT EXISTS missions (
-                id TEXT PRIMARY KEY,
-                title TEXT NOT NULL,
-                status TEXT NOT NULL DEFAULT 'QUEUED',
-                assigned_specialist TEXT NOT NULL DEFAULT 'shuri',
-                source TEXT DEFAULT 'telegram',
-                payload TEXT,
-                result TEXT,
-                progress REAL NOT NULL DEFAULT 0,
-                created_at TEXT NOT NULL,
-                updated_at TEXT NOT NULL
-            );
-            CREATE INDEX IF NOT EXISTS idx_missions_status ON missions(status);
-            CREATE INDEX IF NOT EXISTS idx_missions_updated ON missions(updated_at);
-
-            CREATE TABLE IF NOT EXISTS mission_state (
-                key TEXT PRIMARY KEY,
-                value TEXT NOT NULL
-            );
-
-            CREATE TABLE IF NOT EXISTS tasks (
-                id TEXT PRIMARY KEY,
-                description TEXT NOT NULL,
-                prioriteit TEXT NOT NULL DEFAULT 'normaal',
-                status TEXT NOT NULL DEFAULT 'open',
-                created TEXT NOT NULL,
-                completed TEXT
-            );
-            CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
-
-            CREATE TABLE IF NOT EXISTS notes (
-                id TEXT PRIMARY KEY,
-                title TEXT NOT NULL,
-                content TEXT NOT NULL,
-                created_at TEXT NOT NULL
-            );
-            CREATE INDEX IF NOT EXISTS idx_notes_created ON notes(created_at);
-
-            CREATE TABLE IF NOT EXISTS pending_approvals (
-                chat_id TEXT PRIMARY KEY,
-                approval_id TEXT NOT NULL,
-                description TEXT NOT NULL,
-                action TEXT NOT NULL,
-                created_at TEXT NOT NULL
-            );
-
-            CREATE TABLE IF NOT EXISTS heartbeat_history (
-                ts INTEGER NOT NULL,
-                ok INTEGER NOT NULL DEFAULT 1
-            );
-            CREATE INDEX IF NOT EXISTS idx_heartbeat_ts ON heartbeat_history(ts);
-        """)
-        _run_holding_migrations(conn)
+    """
+    Breng de database op de laatste schema-versie (schema_version + migrations/NNN_*.sql).
+    Eén keer per proces per databasebestand; daarna direct terug.
+    Mislukt een migratie, dan MigrationError; die uitkomst wordt MIGRATION_RETRY_SECONDS onthouden,
+    zodat niet elke aanroep opnieuw de schrijflock pakt en dezelfde migratie herhaalt.
+    """
+    import time
+    path = str(DATABASE_PATH)
+    if path in _schema_ready:
+        return
+    failed = _schema_failed.get(path)
+    if failed and time.monotonic() - failed[1] < MIGRATION_RETRY_SECONDS:
+        raise failed[0]
+    with _schema_lock:
+        if path in _schema_ready:
+            return
+        failed = _schema_failed.get(path)
+        if failed and time.monotonic() - failed[1] < MIGRATION_RETRY_SECONDS:
+            raise failed[0]
+        try:
+            with get_connection() as conn:
+                _run_migrations(conn)
+        except MigrationError as e:
+            _schema_failed[path] = (e, time.monotonic())
+            raise
+        _schema_failed.pop(path, None)
+        _schema_ready.add(path)
+
+
+def schema_version() -> int:
+    """
+    Huidige schema-versie: de hoogste versie waarvoor alle eerdere ook zijn toegepast
+    (-1 als er nog niets is toegepast). Een gat (mislukte migratie) telt dus als het einde.
+    """
+    with get_connection() as conn:
+        try:
+            applied = {r[0] for r in conn.execute("SELECT version FROM schema_version")}
+        except sqlite3.OperationalError:
+            return -1
+    version = -1
+    while version + 1 in applied:
+        version += 1
+    return version
 
 
 # ——— Missions ———
 
 def missions_get_all() -> list[dict]:
     with get_connection() as conn:
-        cur = conn.execute("SELECT id, title, status, assigned_specialist, source, payload, result, progress, created_at, updated_at FROM missions ORDER BY updated_at DESC")
+        cur = conn.execute(f"SELECT {_MISSION_COLUMNS} FROM missions ORDER BY updated_at DESC")
+        return [_row_to_mission(dict(r)) for r in cur.fetchall()]
+
+
+_MISSION_COLUMNS = "id, title, status, assigned_specialist, source, payload, result, progress, created_at, updated_at"
+
+
+def missions_query(statuses: tuple[str, ...] | list[str], specialist: str | None = None,
+                   limit: int | None = 50,
+                   before: tuple[str, str] | None = None) -> list[dict]:
+    """
+    Missies met status in statuses (optioneel per specialist), nieuwste updated_at eerst.
+    Keyset paginering: before = (updated_at, id) van de laatste rij van de vorige pagina.
+    """
+    clauses = [f"status IN ({','.join('?' * len(statuses))})"]
+    params: list[Any] = [s.upper() for s in statuses]
+    if specialist:
+        clauses.append("assigned_specialist = ?")
+        params.append(specialist.lower())
+    if before:
+        clauses.append("(updated_at, id) < (?, ?)")
+        params.extend(before)
+    sql = f"SELECT {_MISSION_COLUMNS} FROM missions WHERE {' AND '.join(clauses)} ORDER BY updated_at DESC, id DESC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    with get_connection() as conn:
+        cur = conn.execute(sql, params)
         return [_row_to_mission(dict(r)) for r in cur.fetchall()]
 
 
@@ -118,27 +252,34 @@ def _row_to_mission(row: dict) -> dict:
     return out
 
 
+_MISSION_INSERT_SQL = """INSERT INTO missions (id, title, status, assigned_specialist, source, payload, result, progress, created_at, updated_at)
+               VALUES (?, ?, ?, ?, ?, ?, NULL, 0, ?, ?)"""
+
+
+def _mission_params(mid, title, status, assigned_specialist, source, payload, created_at, updated_at) -> tuple:
+    return (mid, title[:500], status, assigned_specialist, source, json.dumps(payload or {}), created_at, updated_at)
+
+
 def mission_insert(mid: str, title: str, status: str, assigned_specialist: str, source: str, payload: dict | None, created_at: str, updated_at: str) -> None:
     with get_connection() as conn:
-        conn.execute(
-            """INSERT INTO missions (id, title, status, assigned_specialist, source, payload, result, progress, created_at, updated_at)
-               VALUES (?, ?, ?, ?, ?, ?, NULL, 0, ?, ?)""",
-            (mid, title[:500], status, assigned_specialist, source, json.dumps(payload or {}), created_at, updated_at),
-        )
+        conn.execute(_MISSION_INSERT_SQL,
+                     _mission_params(mid, title, status, assigned_specialist, source, payload, created_at, updated_at))
 
 
-def mission_update_status(mission_id: str, status: str, result: Optional[str] = None, progress: Optional[float] = None, updated_at: str = "") -> bool:
+def mission_update_status(mission_id: str, status: str, result: Optional[str] = None, progress: Optional[float] = None, updated_at: str = "", owner: Optional[str] = None) -> bool:
+    """Zet status (+ result/progress). Met owner alleen als die de lease nog heeft; False anders."""
     import datetime
     from datetime import timezone
     ts = updated_at or datetime.datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    where, key = ("id = ? AND lease_owner = ?", (mission_id, owner)) if owner is not None else ("id = ?", (mission_id,))
     with get_connection() as conn:
         if result is not None and progress is not None:
-            conn.execute("UPDATE missions SET status = ?, result = ?, progress = ?, updated_at = ? WHERE id = ?", (status, result, progress, ts, mission_id))
+            cur = conn.execute(f"UPDATE missions SET status = ?, result = ?, progress = ?, updated_at = ? WHERE {where}", (status, result, progress, ts, *key))
         elif progress is not None:
-            conn.execute("UPDATE missions SET status = ?, progress = ?, updated_at = ? WHERE id = ?", (status, max(0, min(1, progress)), ts, mission_id))
+            cur = conn.execute(f"UPDATE missions SET status = ?, progress = ?, updated_at = ? WHERE {where}", (status, max(0, min(1, progress)), ts, *key))
         else:
-            conn.execute("UPDATE missions SET status = ?, updated_at = ? WHERE id = ?", (status, ts, mission_id))
-        return conn.total_changes > 0
+            cur = conn.execute(f"UPDATE missions SET status = ?, updated_at = ? WHERE {where}", (status, ts, *key))
+        return cur.rowcount > 0
 
 
 def mission_update_specialist(mission_id: str, specialist: str, updated_at: str = "") -> bool:
@@ -146,8 +287,8 @@ def mission_update_specialist(mission_id: str, specialist: str, updated_at: str
     from datetime import timezone
     ts = updated_at or datetime.datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
     with get_connection() as conn:
-        conn.execute("UPDATE missions SET assigned_specialist = ?, updated_at = ? WHERE id = ?", (specialist.lower(), ts, mission_id))
-        return conn.total_changes > 0
+        cur = conn.execute("UPDATE missions SET assigned_specialist = ?, updated_at = ? WHERE id = ?", (specialist.lower(), ts, mission_id))
+        return cur.rowcount > 0
 
 
 def mission_update_progress(mission_id: str, progress: float, updated_at: str = "") -> bool:
@@ -156,8 +297,127 @@ def mission_update_progress(mission_id: str, progress: float, updated_at: str =
     ts = updated_at or datetime.datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
     p = max(0.0, min(1.0, progress))
     with get_connection() as conn:
-        conn.execute("UPDATE missions SET progress = ?, updated_at = ? WHERE id = ?", (p, ts, mission_id))
-        return conn.total_changes > 0
+        cur = conn.execute("UPDATE missions SET progress = ?, updated_at = ? WHERE id = ?", (p, ts, mission_id))
+        return cur.rowcount > 0
+
+
+# ——— Mission queue (leases) ———
+
+MISSION_QUEUED_STATUSES = ("QUEUED", "PENDING")
+MISSION_ACTIVE_STATUSES = ("IN_PROGRESS", "DOING")
+# Claims per missie voordat een verlopen lease hem op FAILED zet
+MISSION_MAX_ATTEMPTS = int(os.environ.get("OMEGA_MISSION_MAX_ATTEMPTS", "3") or 3)
+
+
+def _utc_now_iso() -> str:
+    import datetime
+    from datetime import timezone
+    return datetime.datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _requeue_expired(conn: sqlite3.Connection, now: int, max_attempts: int = MISSION_MAX_ATTEMPTS) -> int:
+    """Verlopen leases: terug naar QUEUED, of naar FAILED als de missie al max_attempts keer geclaimd is."""
+    active = ",".join("?" * len(MISSION_ACTIVE_STATUSES))
+    conn.execute(
+        f"""UPDATE missions SET status = 'FAILED', lease_owner = NULL, lease_expires_at = NULL,
+                   result = COALESCE(result, 'Lease ' || attempts || 'x verlopen zonder afronding'), updated_at = ?
+            WHERE lease_expires_at IS NOT NULL AND lease_expires_at < ? AND attempts >= ?
+              AND status IN ({active})""",
+        (_utc_now_iso(), now, max_attempts, *MISSION_ACTIVE_STATUSES))
+    cur = conn.execute(
+        f"""UPDATE missions SET status = 'QUEUED', progress = 0, lease_owner = NULL,
+                   lease_expires_at = NULL, updated_at = ?
+            WHERE lease_expires_at IS NOT NULL AND lease_expires_at < ?
+              AND status IN ({active})""",
+        (_utc_now_iso(), now, *MISSION_ACTIVE_STATUSES))
+    return cur.rowcount
+
+
+def mission_claim_next(specialist: str, owner: str, lease_seconds: int = 300,
+                       max_attempts: int = MISSION_MAX_ATTEMPTS) -> Optional[dict]:
+    """
+    Claim atomair de oudste QUEUED/PENDING missie van een specialist (UPDATE ... RETURNING) en tel de poging.
+    Verlopen leases gaan eerst terug in de queue (of naar FAILED na max_attempts). Retourneert de missie of None.
+    """
+    import time
+    now = int(time.time())
+    placeholders = ",".join("?" * len(MISSION_QUEUED_STATUSES))
+    with get_connection() as conn:
+        _requeue_expired(conn, now, max_attempts)
+        cur = conn.execute(
+            f"""UPDATE missions SET status = 'IN_PROGRESS', progress = 0, lease_owner = ?,
+                       lease_expires_at = ?, updated_at = ?, attempts = attempts + 1
+                WHERE id = (
+                    SELECT id FROM missions
+                    WHERE status IN ({placeholders}) AND assigned_specialist = ?
+                    ORDER BY created_at LIMIT 1)
+                RETURNING id, title, status, assigned_specialist, source, payload, result,
+                          progress, created_at, updated_at, lease_owner, lease_expires_at, attempts""",
+            (owner, now + lease_seconds, _utc_now_iso(), *MISSION_QUEUED_STATUSES, specialist.lower()))
+        row = cur.fetchone()
+        return _row_to_mission(dict(row)) if row else None
+
+
+def mission_renew_lease(mission_id: str, owner: str, lease_seconds: int = 300) -> bool:
+    """Verleng de lease; False als de missie niet (meer) door owner geclaimd is."""
+    import time
+    with get_connection() as conn:
+        cur = conn.execute(
+            "UPDATE missions SET lease_expires_at = ? WHERE id = ? AND lease_owner = ?",
+            (int(time.time()) + lease_seconds, mission_id, owner))
+        return cur.rowcount > 0
+
+
+def mission_release_lease(mission_id: str, owner: str) -> bool:
+    """Geef een geclaimde missie terug aan de queue (bijv. bij shutdown van een worker); telt niet als poging."""
+    with get_connection() as conn:
+        cur = conn.execute(
+            f"""UPDATE missions SET status = 'QUEUED', progress = 0, lease_owner = NULL,
+                       lease_expires_at = NULL, updated_at = ?, attempts = MAX(attempts - 1, 0)
+                WHERE id = ? AND lease_owner = ?
+                  AND status IN ({",".join("?" * len(MISSION_ACTIVE_STATUSES))})""",
+            (_utc_now_iso(), mission_id, owner, *MISSION_ACTIVE_STATUSES))
+        return cur.rowcount > 0
+
+
+def mission_requeue_expired() -> int:
+    """Zet missies met een verlopen lease terug op QUEUED (of FAILED na MISSION_MAX_ATTEMPTS). Retourneert het aantal requeues."""
+    import time
+    with get_connection() as conn:
+        return _requeue_expired(conn, int(time.time()))
+
+
+# ——— Worker metrics ———
+
+def worker_metrics_insert(worker: str, specialist: str, window_seconds: float,
+                          completed: int = 0, released: int = 0, failed: int = 0,
+                          avg_queue_wait_s: float | None = None,
+                          max_queue_wait_s: float | None = None,
+                          in_flight: int = 0, ts: int | None = None) -> None:
+    import time
+    per_min = completed / (window_seconds / 60.0) if window_seconds > 0 else 0.0
+    with get_connection() as conn:
+        conn.execute(
+            """INSERT INTO worker_metrics
+               (ts, worker, specialist, window_seconds, completed, released, failed,
+                missions_per_min, avg_queue_wait_s, max_queue_wait_s, in_flight)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (ts or int(time.time()), worker, specialist, window_seconds, completed, released,
+             failed, per_min, avg_queue_wait_s, max_queue_wait_s, in_flight))
+
+
+def worker_metrics_list(since_ts: int = 0, specialist: str | None = None, limit: int = 500) -> list[dict]:
+    """Recente throughput-metingen (nieuwste eerst) voor dashboard/monitoring."""
+    with get_connection() as conn:
+        if specialist:
+            cur = conn.execute(
+                "SELECT * FROM worker_metrics WHERE ts >= ? AND specialist = ? ORDER BY ts DESC LIMIT ?",
+                (since_ts, specialist, limit))
+        else:
+            cur = conn.execute(
+                "SELECT * FROM worker_metrics WHERE ts >= ? ORDER BY ts DESC LIMIT ?",
+                (since_ts, limit))
+        return [dict(r) for r in cur.fetchall()]
 
 
 # ——— Mission state (key-value) ———
@@ -194,14 +454,51 @@ def state_get_all() -> dict:
         return out
 
 
+# ——— Spend ledger (circuit breaker) ———
+
+def spend_record(day: str, amount_eur: float, limit_eur: float, source: str = "") -> tuple[float, bool]:
+    """
+    Boek een betaalde call: ledger-rij + atomaire increment van de dagtotaal.
+    Retourneert (dagtotaal, tripped_now); tripped_now is alleen True voor de call die de limiet passeert.
+    Ligt het totaal onder de (intussen verhoogde) limiet, dan gaat tripped terug naar 0, zodat een
+    volgende overschrijding opnieuw alarm geeft.
+    """
+    with get_connection() as conn:
+        conn.execute(
+            "INSERT INTO spend_ledger (day, amount_eur, source) VALUES (?, ?, ?)",
+            (day, amount_eur, source))
+        row = conn.execute(
+            """INSERT INTO spend_daily (day, spend_eur) VALUES (?, ?)
+               ON CONFLICT(day) DO UPDATE SET spend_eur = spend_eur + excluded.spend_eur
+               RETURNING spend_eur""",
+            (day, amount_eur)).fetchone()
+        total = float(row[0])
+        tripped_now = False
+        if total >= limit_eur:
+            cur = conn.execute(
+                "UPDATE spend_daily SET tripped = 1 WHERE day = ? AND tripped = 0", (day,))
+            tripped_now = cur.rowcount > 0
+        else:
+            conn.execute("UPDATE spend_daily SET tripped = 0 WHERE day = ? AND tripped = 1", (day,))
+        return total, tripped_now
+
+
+def spend_get(day: str) -> tuple[float, bool]:
+    """(dagtotaal, tripped) voor day; (0.0, False) als er nog niets geboekt is."""
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT spend_eur, tripped FROM spend_daily WHERE day = ?", (day,)).fetchone()
+        return (float(row[0]), bool(row[1])) if row else (0.0, False)
+
+
 # ——— Tasks ———
 
+_TASK_INSERT_SQL = "INSERT INTO tasks (id, description, prioriteit, status, created, completed) VALUES (?, ?, ?, ?, ?, ?)"
+
+
 def task_insert(task_id: str, description: str, prioriteit: str, status: str, created: str, completed: Optional[str] = None) -> None:
     with get_connection() as conn:
-        conn.execute(
-            "INSERT INTO tasks (id, description, prioriteit, status, created, completed) VALUES (?, ?, ?, ?, ?, ?)",
-            (task_id, description, prioriteit, status, created, completed),
-        )
+        conn.execute(_TASK_INSERT_SQL, (task_id, description, prioriteit, status, created, completed))
 
 
 def task_list(status: str = "open", limit: int = 50) -> list[dict]:
@@ -215,15 +512,18 @@ def task_list(status: str = "open", limit: int = 50) -> list[dict]:
 
 def task_complete(task_id: str, completed: str) -> bool:
     with get_connection() as conn:
-        conn.execute("UPDATE tasks SET status = 'done', completed = ? WHERE id = ?", (completed, task_id))
-        return conn.total_changes > 0
+        cur = conn.execute("UPDATE tasks SET status = 'done', completed = ? WHERE id = ?", (completed, task_id))
+        return cur.rowcount > 0
 
 
 # ——— Notes ———
 
+_NOTE_INSERT_SQL = "INSERT INTO notes (id, title, content, created_at) VALUES (?, ?, ?, ?)"
+
+
 def note_insert(note_id: str, title: str, content: str, created_at: str) -> None:
     with get_connection() as conn:
-        conn.execute("INSERT INTO notes (id, title, content, created_at) VALUES (?, ?, ?, ?)", (note_id, title, content, created_at))
+        conn.execute(_NOTE_INSERT_SQL, (note_id, title, content, created_at))
 
 
 def note_list(limit: int = 10) -> list[dict]:
@@ -269,61 +569,482 @@ def approval_remove(chat_id: str) -> None:
 
 
 # ——— Heartbeat ———
+# Ring buffer: één slot per minuut van de dag (1440), ouder punt in hetzelfde slot wordt overschreven.
+# Uurrollup (heartbeat_hourly) voor lange-termijn uptime; opruimen met één range-delete per nieuw uur.
+
+HEARTBEAT_SLOTS = 24 * 60
+HEARTBEAT_BEATS_PER_HOUR = 60  # heartbeat.py INTERVAL = 60 s
+HEARTBEAT_HOURLY_RETENTION_DAYS = 90
+
 
 def heartbeat_append(ts: int, ok: int = 1) -> None:
-    max_rows = 24 * 60
+    ok = 1 if ok else 0
+    hour = (ts // 3600) * 3600
     with get_connection() as conn:
-        conn.execute("INSERT INTO heartbeat_history (ts, ok) VALUES (?, ?)", (ts, ok))
-        cur = conn.execute("SELECT COUNT(*) FROM heartbeat_history")
-        n = cur.fetchone()[0]
-        if n > max_rows:
-            cur = conn.execute("SELECT ts FROM heartbeat_history ORDER BY ts ASC LIMIT ?", (n - max_rows,))
-            to_delete = [r[0] for r in cur.fetchall()]
-            if to_delete:
-                conn.executemany("DELETE FROM heartbeat_history WHERE ts = ?", [(t,) for t in to_delete])
+        conn.execute(
+            """INSERT INTO heartbeat_ring (slot, ts, ok) VALUES (?, ?, ?)
+               ON CONFLICT(slot) DO UPDATE SET ts = excluded.ts, ok = excluded.ok""",
+            ((ts // 60) % HEARTBEAT_SLOTS, ts, ok),
+        )
+        beats = conn.execute(
+            """INSERT INTO heartbeat_hourly (hour, beats, ok_beats) VALUES (?, 1, ?)
+               ON CONFLICT(hour) DO UPDATE SET beats = beats + 1, ok_beats = ok_beats + excluded.ok_beats
+               RETURNING beats""",
+            (hour, ok),
+        ).fetchone()[0]
+        if beats == 1:
+            # Eerste beat van een nieuw uur: rollup buiten de retentie in één keer weg
+            conn.execute("DELETE FROM heartbeat_hourly WHERE hour < ?",
+                         (hour - HEARTBEAT_HOURLY_RETENTION_DAYS * 86400,))
 
 
 def heartbeat_last_ts() -> Optional[int]:
     with get_connection() as conn:
-        cur = conn.execute("SELECT ts FROM heartbeat_history ORDER BY ts DESC LIMIT 1")
-        row = cur.fetchone()
-        return int(row[0]) if row else None
+        row = conn.execute("SELECT MAX(ts) FROM heartbeat_ring").fetchone()
+        return int(row[0]) if row and row[0] is not None else None
 
 
-def heartbeat_list(limit: int = 24 * 60) -> list[dict]:
-    """Recent heartbeat points for dashboard (ts, ok)."""
+def heartbeat_list(limit: int = 24 * 60, since: Optional[int] = None) -> list[dict]:
+    """Recent heartbeat points for dashboard (ts, ok). Leest hooguit HEARTBEAT_SLOTS rijen."""
+    import time
+    if since is None:
+        since = int(time.time()) - 24 * 3600
     with get_connection() as conn:
-        cur = conn.execute("SELECT ts, ok FROM heartbeat_history ORDER BY ts DESC LIMIT ?", (limit,))
+        cur = conn.execute("SELECT ts, ok FROM heartbeat_ring WHERE ts >= ? ORDER BY ts DESC LIMIT ?", (since, limit))
         return [{"ts": r[0], "ok": r[1]} for r in cur.fetchall()]
 
 
-# ——— Holding migraties ———
+def heartbeat_uptime(days: int = 30, now: Optional[int] = None) -> dict:
+    """Uptime uit de uurrollup: {uptime_pct, hours: [{hour, beats, ok_beats, uptime_pct}]}.
+    Uren zonder enkele heartbeat tellen als down, vanaf het eerste gemeten uur in het venster."""
+    import time
+    now = int(now if now is not None else time.time())
+    current_hour = (now // 3600) * 3600
+    with get_connection() as conn:
+        cur = conn.execute(
+            "SELECT hour, beats, ok_beats FROM heartbeat_hourly WHERE hour >= ? ORDER BY hour",
+            (current_hour - days * 86400,),
+        )
+        rows = cur.fetchall()
+    hours = [
+        {"hour": r[0], "beats": r[1], "ok_beats": r[2],
+         "uptime_pct": round(100.0 * min(r[2], HEARTBEAT_BEATS_PER_HOUR) / HEARTBEAT_BEATS_PER_HOUR, 2)}
+        for r in rows
+    ]
+    if not rows:
+        return {"uptime_pct": None, "hours": hours}
+    # Lopend uur telt naar rato van de verstreken minuten
+    expected = (current_hour - rows[0][0]) // 3600 * HEARTBEAT_BEATS_PER_HOUR + max(1, (now - current_hour) // 60)
+    ok_total = sum(min(r[2], HEARTBEAT_BEATS_PER_HOUR) for r in rows)
+    return {"uptime_pct": round(min(100.0, 100.0 * ok_total / expected), 2), "hours": hours}
+
+
+# ——— Provider health (holding LLM) ———
+# Eén rij per provider, bijgewerkt met een UPSERT die de EWMA's in SQL berekent (executemany-baar,
+# dus ook via WriteBatch/omega_telemetry). Na COOLDOWN-drempel opeenvolgende fouten: cooldown_until;
+# na afloop volstaat één nieuwe fout voor een volgende cooldown (half-open), één succes reset alles.
+
+PROVIDER_HEALTH_ALPHA = 0.2
+PROVIDER_LATENCY_SLOTS = 128
+PROVIDER_LATENCY_WINDOW = 24 * 3600
+
+_PROVIDER_HEALTH_SQL = """INSERT INTO provider_health
+        (provider, calls, successes, consecutive_failures, cooldown_until, ewma_latency_ms,
+         ewma_tokens_per_sec, ewma_success, last_error, last_error_at, updated_at)
+    VALUES (?1, 1, ?2, 1 - ?2, CASE WHEN ?2 = 0 AND ?7 <= 1 THEN ?8 ELSE 0 END,
+            CASE WHEN ?2 = 1 THEN ?3 END, CASE WHEN ?2 = 1 THEN ?4 END, ?2,
+            CASE WHEN ?2 = 0 THEN ?5 END, CASE WHEN ?2 = 0 THEN ?6 END, ?6)
+    ON CONFLICT(provider) DO UPDATE SET
+        calls = calls + 1,
+        successes = successes + excluded.successes,
+        consecutive_failures = CASE WHEN ?2 = 1 THEN 0 ELSE consecutive_failures + 1 END,
+        cooldown_until = CASE WHEN ?2 = 1 THEN 0
+                              WHEN consecutive_failures + 1 >= ?7 THEN ?8
+                              ELSE cooldown_until END,
+        ewma_latency_ms = CASE WHEN ?2 = 0 THEN ewma_latency_ms
+                               WHEN ewma_latency_ms IS NULL THEN ?3
+                               ELSE ewma_latency_ms + ?9 * (?3 - ewma_latency_ms) END,
+        ewma_tokens_per_sec = CASE WHEN ?2 = 0 OR ?4 IS NULL THEN ewma_tokens_per_sec
+                                   WHEN ewma_tokens_per_sec IS NULL THEN ?4
+                                   ELSE ewma_tokens_per_sec + ?9 * (?4 - ewma_tokens_per_sec) END,
+        ewma_success = COALESCE(ewma_success, ?2) + ?9 * (?2 - COALESCE(ewma_success, ?2)),
+        last_error = CASE WHEN ?2 = 0 THEN ?5 ELSE last_error END,
+        last_error_at = CASE WHEN ?2 = 0 THEN ?6 ELSE last_error_at END,
+        updated_at = ?6"""
+
+_PROVIDER_LATENCY_SQL = """INSERT INTO provider_latency (provider, slot, ts, ms) VALUES (?, ?, ?, ?)
+    ON CONFLICT(provider, slot) DO UPDATE SET ts = excluded.ts, ms = excluded.ms"""
+
+_latency_slot_seq = itertools.count(random.randrange(PROVIDER_LATENCY_SLOTS))
+
+
+def _provider_health_params(provider: str, ok: bool, latency_ms: int, tokens_out: int, error: str,
+                            now: float, cooldown_failures: int, cooldown_seconds: float) -> tuple:
+    tps = tokens_out * 1000.0 / latency_ms if ok and tokens_out and latency_ms > 0 else None
+    return (provider, 1 if ok else 0, float(latency_ms), tps, (error or "")[:300] or None, now,
+            cooldown_failures, now + cooldown_seconds, PROVIDER_HEALTH_ALPHA)
+
+
+def _provider_latency_params(provider: str, latency_ms: int, now: float) -> tuple:
+    # Slot per proces doorlopend vanaf een willekeurig punt: processen overschrijven elkaars slots niet systematisch
+    return (provider, next(_latency_slot_seq) % PROVIDER_LATENCY_SLOTS, now, int(latency_ms))
+
+
+def provider_health_record(provider: str, ok: bool, latency_ms: int, tokens_out: int = 0,
+                           error: str = "", now: float | None = None,
+                           cooldown_failures: int = 3, cooldown_seconds: float = 300) -> None:
+    import time
+    now = time.time() if now is None else now
+    with get_connection() as conn:
+        conn.execute(_PROVIDER_HEALTH_SQL, _provider_health_params(
+            provider, ok, latency_ms, tokens_out, error, now, cooldown_failures, cooldown_seconds))
+        if ok:
+            conn.execute(_PROVIDER_LATENCY_SQL, _provider_latency_params(provider, latency_ms, now))
+
 
-def _run_holding_migrations(conn: sqlite3.Connection) -> None:
-    """Voer holding migratie-SQL uit (idempotent via CREATE IF NOT EXISTS)."""
-    migration_file = MIGRATIONS_DIR / "001_holding_tables.sql"
-    if not migration_file.exists():
-        return
-    try:
-        sql = migration_file.read_text(encoding="utf-8")
-        conn.executescript(sql)
-    except Exception as e:
-        logger.warning("Holding migratie overgeslagen: %s", e)
+def provider_health_list(now: float | None = None) -> list[dict]:
+    """Scorebord: alle providers met EWMA's, succesratio en p50/p95 over het laatste etmaal."""
+    import time
+    now = time.time() if now is None else now
+    with get_connection() as conn:
+        rows = [dict(r) for r in conn.execute("SELECT * FROM provider_health ORDER BY provider")]
+        samples: dict[str, list[int]] = {}
+        for provider, ms in conn.execute(
+                "SELECT provider, ms FROM provider_latency WHERE ts >= ? ORDER BY provider, ms",
+                (now - PROVIDER_LATENCY_WINDOW,)):
+            samples.setdefault(provider, []).append(ms)
+    for r in rows:
+        s = samples.get(r["provider"], [])
+        r["samples"] = len(s)
+        r["p50_ms"] = s[len(s) // 2] if s else None
+        r["p95_ms"] = s[min(len(s) - 1, int(len(s) * 0.95))] if s else None
+        r["success_rate"] = round(r["successes"] / r["calls"], 3) if r["calls"] else None
+    return rows
+
+
+def provider_health_reset(provider: str | None = None) -> int:
+    with get_connection() as conn:
+        if provider is None:
+            conn.execute("DELETE FROM provider_latency")
+            return conn.execute("DELETE FROM provider_health").rowcount
+        conn.execute("DELETE FROM provider_latency WHERE provider = ?", (provider,))
+        return conn.execute("DELETE FROM provider_health WHERE provider = ?", (provider,)).rowcount
+
+
+# ——— LLM response cache (holding) ———
+# Tijden in unix-seconden. Verlopen = created_at ouder dan ttl; eviction op last_hit_at (LRU).
+
+def llm_cache_get(key: str, ttl: float, now: float | None = None) -> Optional[dict]:
+    """Geldige cache-entry (en tel de hit), of None."""
+    import time
+    now = time.time() if now is None else now
+    with get_connection() as conn:
+        row = conn.execute(
+            """UPDATE llm_cache SET hits = hits + 1, last_hit_at = ?
+               WHERE key = ? AND created_at >= ?
+               RETURNING tenant_id, model, response, tokens_in, tokens_out""",
+            (now, key, now - ttl)).fetchone()
+        return dict(row) if row else None
+
+
+def llm_cache_candidates(tenant_id: str, system_hash: str, ttl: float, limit: int = 500,
+                         now: float | None = None) -> list[tuple[str, bytes]]:
+    """(key, embedding) van geldige entries van deze tenant + system prompt, recentst gebruikt eerst."""
+    import time
+    now = time.time() if now is None else now
+    with get_connection() as conn:
+        cur = conn.execute(
+            """SELECT key, embedding FROM llm_cache
+               WHERE tenant_id = ? AND system_hash = ? AND created_at >= ? AND embedding IS NOT NULL
+               ORDER BY last_hit_at DESC LIMIT ?""",
+            (tenant_id, system_hash, now - ttl, limit))
+        return [(r[0], r[1]) for r in cur.fetchall()]
+
+
+# Opruimen (TTL + LRU) kost een scan van de hele tabel: niet bij elke put, maar eens per LLM_CACHE_EVICT_EVERY
+LLM_CACHE_EVICT_EVERY = 100
+_llm_cache_put_seq = itertools.count()
+
+
+def llm_cache_put(key: str, tenant_id: str, system_hash: str, model: str, response: str,
+                  tokens_in: int = 0, tokens_out: int = 0, embedding: bytes | None = None,
+                  ttl: float = 86400, max_entries: int = 5000, now: float | None = None) -> None:
+    """
+    Sla een antwoord op. Eens per LLM_CACHE_EVICT_EVERY puts (en bij de eerste in dit proces) worden
+    verlopen entries en de minst recent gebruikte boven max_entries opgeruimd; daartussen mag de tabel
+    dus tijdelijk iets boven max_entries komen.
+    """
+    import time
+    now = time.time() if now is None else now
+    with get_connection() as conn:
+        conn.execute(
+            """INSERT OR REPLACE INTO llm_cache
+                   (key, tenant_id, system_hash, model, response, tokens_in, tokens_out, embedding,
+                    hits, created_at, last_hit_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0, ?, ?)""",
+            (key, tenant_id, system_hash, model, response, tokens_in, tokens_out, embedding, now, now))
+        if next(_llm_cache_put_seq) % LLM_CACHE_EVICT_EVERY:
+            return
+        conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - ttl,))
+        excess = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_hit_at LIMIT ?)",
+                (excess,))
+
+
+def llm_cache_stats(tenant_id: str | None = None) -> list[dict]:
+    """Per tenant: entries, hits en bespaarde tokens (hits × tokens van de oorspronkelijke call)."""
+    where = "WHERE tenant_id = ?" if tenant_id else ""
+    with get_connection() as conn:
+        cur = conn.execute(
+            f"""SELECT tenant_id, COUNT(*) AS entries, SUM(hits) AS hits,
+                       SUM(hits * (tokens_in + tokens_out)) AS tokens_saved
+                FROM llm_cache {where} GROUP BY tenant_id ORDER BY tenant_id""",
+            (tenant_id,) if tenant_id else ())
+        return [dict(r) for r in cur.fetchall()]
+
+
+def llm_cache_clear(tenant_id: str | None = None) -> int:
+    with get_connection() as conn:
+        if tenant_id:
+            return conn.execute("DELETE FROM llm_cache WHERE tenant_id = ?", (tenant_id,)).rowcount
+        return conn.execute("DELETE FROM llm_cache").rowcount
+
+
+# ——— Chat memory (Telegram-conversaties) ———
+# chat_id als tekst; tijden in unix-seconden. Oudere beurten gaan via chat_summary_set op in de samenvatting.
+
+def chat_turns_append(chat_id: str, turns: list[tuple[str, str, int]], now: float | None = None) -> int:
+    """Voeg beurten (role, content, tokens) toe in één transactie. Retourneert het id van de laatste."""
+    import time
+    now = time.time() if now is None else now
+    last = 0
+    with get_connection() as conn:
+        for role, content, tokens in turns:
+            last = conn.execute(
+                "INSERT INTO chat_turns (chat_id, role, content, tokens, created_at) VALUES (?, ?, ?, ?, ?)",
+                (str(chat_id), role, content, int(tokens), now)).lastrowid
+    return last
+
+
+def chat_turns_recent(chat_id: str, limit: int = 20) -> list[dict]:
+    """De laatste limit beurten van een chat, oudste eerst."""
+    with get_connection() as conn:
+        cur = conn.execute(
+            """SELECT id, role, content, tokens FROM chat_turns
+               WHERE chat_id = ? ORDER BY id DESC LIMIT ?""",
+            (str(chat_id), limit))
+        return [dict(r) for r in reversed(cur.fetchall())]
+
+
+def chat_turns_before(chat_id: str, before_id: int, limit: int = 200) -> list[dict]:
+    """Beurten met id < before_id (nog niet samengevat), oudste eerst."""
+    with get_connection() as conn:
+        cur = conn.execute(
+            """SELECT id, role, content, tokens FROM chat_turns
+               WHERE chat_id = ? AND id < ? ORDER BY id LIMIT ?""",
+            (str(chat_id), before_id, limit))
+        return [dict(r) for r in cur.fetchall()]
+
+
+def chat_turns_stats(chat_id: str) -> dict:
+    """Aantal beurten en totaal geschatte tokens (zonder samenvatting)."""
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT COUNT(*) AS turns, COALESCE(SUM(tokens), 0) AS tokens FROM chat_turns WHERE chat_id = ?",
+            (str(chat_id),)).fetchone()
+        return dict(row)
+
+
+def chat_summary_get(chat_id: str) -> Optional[dict]:
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT summary, tokens, upto_id, updated_at FROM chat_summaries WHERE chat_id = ?",
+            (str(chat_id),)).fetchone()
+        return dict(row) if row else None
+
+
+def chat_summary_set(chat_id: str, summary: str, tokens: int, upto_id: int, now: float | None = None) -> int:
+    """
+    Sla de nieuwe samenvatting op en verwijder de beurten t/m upto_id die erin zijn opgenomen (één transactie).
+    Bestaat beurt upto_id niet meer (chat_forget liep tijdens het samenvatten), dan wordt niets geschreven: retourneert 0.
+    """
+    import time
+    now = time.time() if now is None else now
+    with get_connection() as conn:
+        # De DELETE opent de schrijftransactie, zodat chat_forget niet tussen check en upsert kan vallen
+        removed = conn.execute(
+            """DELETE FROM chat_turns WHERE chat_id = ? AND id <= ?
+                 AND EXISTS (SELECT 1 FROM chat_turns WHERE chat_id = ? AND id = ?)""",
+            (str(chat_id), upto_id, str(chat_id), upto_id)).rowcount
+        if not removed:
+            return 0
+        conn.execute(
+            """INSERT INTO chat_summaries (chat_id, summary, tokens, upto_id, updated_at)
+               VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT(chat_id) DO UPDATE SET
+                   summary = excluded.summary, tokens = excluded.tokens,
+                   upto_id = excluded.upto_id, updated_at = excluded.updated_at""",
+            (str(chat_id), summary, int(tokens), upto_id, now))
+        return removed
+
+
+def chat_forget(chat_id: str) -> int:
+    """Wis beurten en samenvatting van een chat. Retourneert het aantal verwijderde beurten."""
+    with get_connection() as conn:
+        conn.execute("DELETE FROM chat_summaries WHERE chat_id = ?", (str(chat_id),))
+        return conn.execute("DELETE FROM chat_turns WHERE chat_id = ?", (str(chat_id),)).rowcount
+
+
+# ——— Zoeken (FTS5) ———
+
+SEARCH_KINDS = ("note", "task", "mission", "holding_task")
+
+
+# Zeer frequente woorden die een zoekopdracht alleen trager maken (alleen weggelaten naast andere termen)
+_SEARCH_STOPWORDS = frozenset(
+    "de het een en van in op te is dat die voor met aan er om als bij of ook naar the a an and of to in for on is".split())
+
+
+def _fts_query(query: str, prefix_last: bool = False) -> str:
+    """
+    Gebruikersinvoer → veilige FTS5-query: losse woorden (AND), 'woord*' als prefix; stopwoorden eruit.
+    prefix_last: het laatste woord altijd als prefix (de gebruiker typt nog, of noemt een titel half).
+    """
+    import re
+    terms = re.findall(r"(\w+)(\*?)", query or "")
+    if not terms:
+        return ""
+    kept = [t for t in terms if t[0].lower() not in _SEARCH_STOPWORDS] or terms
+    if prefix_last:
+        kept[-1] = (kept[-1][0], "*")
+    return " ".join(f'"{word}"{star}' for word, star in kept)
+
+
+def search(query: str, kinds: tuple[str, ...] | list[str] | None = None, limit: int = 10,
+           tenant_id: str | None = None, title_only: bool = False) -> list[dict]:
+    """
+    Full-text zoeken over notes, tasks, missions en holding_tasks (search_fts, bm25; titel telt dubbel).
+    kinds beperkt tot een subset van SEARCH_KINDS; tenant_id beperkt holding_tasks tot één tenant.
+    title_only: alleen in de titelkolom, laatste woord als prefix (opzoeken op een (halve) titel).
+    Retourneert [{kind, id, title, snippet, score}], beste eerst.
+    """
+    match = _fts_query(query, prefix_last=title_only)
+    if not match:
+        return []
+    if title_only:
+        match = f"title : ({match})"
+    where = ["search_fts MATCH ?"]
+    params: list[Any] = [match]
+    kinds = [k for k in (kinds or ()) if k in SEARCH_KINDS]
+    if kinds:
+        where.append(f"d.kind IN ({','.join('?' * len(kinds))})")
+        params.extend(kinds)
+    if tenant_id:
+        where.append("(d.tenant_id IS NULL OR d.tenant_id = ?)")
+        params.append(tenant_id)
+    params.append(max(1, int(limit)))
+    with get_connection() as conn:
+        cur = conn.execute(
+            f"""SELECT d.kind, d.ref_id, search_fts.title,
+                       snippet(search_fts, 1, '[', ']', '…', 16) AS snippet,
+                       bm25(search_fts, 2.0, 1.0) AS score
+                FROM search_fts JOIN search_docs d ON d.id = search_fts.rowid
+                WHERE {" AND ".join(where)}
+                ORDER BY score LIMIT ?""",
+            params,
+        )
+        return [{"kind": r[0], "id": r[1], "title": r[2], "snippet": r[3], "score": round(-r[4], 4)}
+                for r in cur.fetchall()]
+
+
+# ——— Migraties ———
+
+def _split_statements(sql: str) -> list[str]:
+    """SQL-script → losse statements (triggers met BEGIN … END blijven heel)."""
+    out, current = [], ""
+    for line in sql.splitlines(keepends=True):
+        current += line
+        if sqlite3.complete_statement(current):
+            if current.strip().strip(";").strip():
+                out.append(current)
+            current = ""
+    if current.strip():
+        out.append(current)
+    return out
+
+
+_ADD_COLUMN_RE = r"^\s*ALTER\s+TABLE\s+(\w+)\s+ADD\s+COLUMN\s+(\w+)"
+
+
+def _apply_migration(conn: sqlite3.Connection, sql: str) -> None:
+    """Statements van één migratie in de lopende transactie; ADD COLUMN van een bestaande kolom wordt overgeslagen."""
+    import re
+    for stmt in _split_statements(sql):
+        body = "\n".join(line for line in stmt.splitlines() if not line.strip().startswith("--"))
+        m = re.match(_ADD_COLUMN_RE, body, re.IGNORECASE)
+        if m and m.group(2) in {r[1] for r in conn.execute(f"PRAGMA table_info({m.group(1)})")}:
+            continue
+        conn.execute(stmt)
+
+
+def _run_migrations(conn: sqlite3.Connection) -> None:
+    """
+    Pas ontbrekende migraties in volgorde toe. Elke migratie draait in een eigen
+    BEGIN IMMEDIATE-transactie en controleert daarbinnen opnieuw of een ander proces haar al toepaste,
+    zodat parallel startende processen (bridge, workers, pipeline) niet dubbel migreren.
+    Een mislukte migratie wordt teruggedraaid en stopt de rij (MigrationError): latere migraties
+    bouwen voort op het schema van eerdere en draaien dus niet op een onvolledig schema.
+    """
+    conn.execute("""CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )""")
+    conn.commit()
+    applied = {r[0] for r in conn.execute("SELECT version FROM schema_version")}
+    for version, name, path in _list_migrations():
+        if version in applied:
+            continue
+        try:
+            sql = path.read_text(encoding="utf-8")
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM schema_version WHERE version = ?", (version,)).fetchone():
+                conn.commit()
+                continue
+            _apply_migration(conn, sql)
+            conn.execute("INSERT INTO schema_version (version, name) VALUES (?, ?)", (version, name))
+            conn.commit()
+            logger.info("Migratie %s toegepast", name)
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            logger.error("Migratie %s mislukt, latere migraties niet toegepast: %s", name, e)
+            raise MigrationError(f"Migratie {name} mislukt: {e}") from e
 
 
 # ——— Tenants ———
 
+# Read-through caches (omega_cache) die leeg moeten na een schrijfactie op tenants/holding_agents
+TENANT_CACHES = ("tenants",)
+AGENT_LIST_CACHE = "holding_agents"  # agents per tenant (incl. status)
+AGENT_CACHES = (AGENT_LIST_CACHE, "holding_agent_skills")
+LOAD_CACHE = "holding_agent_load"  # open/approved/rejected per agent, per tenant
+LOAD_CACHE_TTL = 5.0  # kort (statuswissels van taken invalideren niet); overal meegeven: de eerste aanmaker bepaalt de TTL
+
+_TENANT_INSERT_SQL = """INSERT OR IGNORE INTO tenants
+               (id, name, type, brand_voice, target_audience, industry, config)
+               VALUES (?, ?, ?, ?, ?, ?, ?)"""
+
+
 def tenant_insert(tenant_id: str, name: str, tenant_type: str,
                   brand_voice: str = "", target_audience: str = "",
                   industry: str = "", config: dict | None = None) -> None:
     with get_connection() as conn:
-        conn.execute(
-            """INSERT OR IGNORE INTO tenants
-               (id, name, type, brand_voice, target_audience, industry, config)
-               VALUES (?, ?, ?, ?, ?, ?, ?)""",
-            (tenant_id, name, tenant_type, brand_voice, target_audience,
-             industry, json.dumps(config or {})),
-        )
+        conn.execute(_TENANT_INSERT_SQL, (tenant_id, name, tenant_type, brand_voice, target_audience,
+                                          industry, json.dumps(config or {})))
+    omega_cache.invalidate(*TENANT_CACHES)
 
 
 def tenant_get(tenant_id: str) -> Optional[dict]:
@@ -341,21 +1062,22 @@ def tenant_list() -> list[dict]:
 
 # ——— Holding agents ———
 
+_HOLDING_AGENT_INSERT_SQL = """INSERT OR IGNORE INTO holding_agents
+               (id, tenant_id, name, role, specialization, skills, model,
+                status, parent_agent_id, confidence_threshold, system_prompt)
+               VALUES (?, ?, ?, ?, ?, ?, ?, 'idle', ?, ?, ?)"""
+
+
 def holding_agent_insert(agent_id: str, tenant_id: str, name: str, role: str,
                          specialization: str = "", skills: list | None = None,
                          model: str = "gemini", parent_agent_id: str | None = None,
                          confidence_threshold: float = 0.8,
                          system_prompt: str = "") -> None:
     with get_connection() as conn:
-        conn.execute(
-            """INSERT OR IGNORE INTO holding_agents
-               (id, tenant_id, name, role, specialization, skills, model,
-                status, parent_agent_id, confidence_threshold, system_prompt)
-               VALUES (?, ?, ?, ?, ?, ?, ?, 'idle', ?, ?, ?)""",
-            (agent_id, tenant_id, name, role, specialization,
-             json.dumps(skills or []), model, parent_agent_id,
-             confidence_threshold, system_prompt),
-        )
+        conn.execute(_HOLDING_AGENT_INSERT_SQL, (agent_id, tenant_id, name, role, specialization,
+                                                 json.dumps(skills or []), model, parent_agent_id,
+                                                 confidence_threshold, system_prompt))
+    omega_cache.invalidate(*AGENT_CACHES)
 
 
 def holding_agent_get(agent_id: str) -> Optional[dict]:
@@ -392,10 +1114,14 @@ def holding_agent_list(tenant_id: str | None = None) -> list[dict]:
 
 
 def holding_agent_set_status(agent_id: str, status: str) -> bool:
+    """Status (idle/busy/error/offline). Invalideert alleen de agentlijst van die tenant: skills veranderen niet."""
     with get_connection() as conn:
-        conn.execute(
-            "UPDATE holding_agents SET status = ? WHERE id = ?", (status, agent_id))
-        return conn.total_changes > 0
+        row = conn.execute(
+            "UPDATE holding_agents SET status = ? WHERE id = ? RETURNING tenant_id", (status, agent_id)).fetchone()
+    if row is None:
+        return False
+    omega_cache.cache(AGENT_LIST_CACHE).invalidate(row[0])
+    return True
 
 
 # ——— Holding tasks ———
@@ -415,6 +1141,24 @@ def holding_task_insert(task_id: str, tenant_id: str, task_type: str,
             (task_id, tenant_id, assigned_to, created_by, task_type, title,
              description, json.dumps(input_data or {}), priority, max_revisions),
         )
+    omega_cache.cache(LOAD_CACHE, ttl=LOAD_CACHE_TTL).invalidate(tenant_id)
+
+
+HOLDING_OPEN_STATUSES = ("pending", "in_progress", "review")
+
+
+def holding_agent_load(tenant_id: str) -> dict[str, dict]:
+    """Per agent van een tenant: {agent_id: {open, approved, rejected}} uit holding_tasks (één GROUP BY)."""
+    with get_connection() as conn:
+        cur = conn.execute(
+            f"""SELECT assigned_to,
+                       SUM(CASE WHEN status IN ({",".join("?" * len(HOLDING_OPEN_STATUSES))}) THEN 1 ELSE 0 END),
+                       SUM(CASE WHEN status = 'approved' THEN 1 ELSE 0 END),
+                       SUM(CASE WHEN status = 'rejected' THEN 1 ELSE 0 END)
+                FROM holding_tasks WHERE tenant_id = ? AND assigned_to IS NOT NULL
+                GROUP BY assigned_to""",
+            (*HOLDING_OPEN_STATUSES, tenant_id))
+        return {r[0]: {"open": r[1], "approved": r[2], "rejected": r[3]} for r in cur.fetchall()}
 
 
 def holding_task_get(task_id: str) -> Optional[dict]:
@@ -445,7 +1189,9 @@ def holding_task_list(tenant_id: str | None = None, status: str | None = None,
 
 def holding_task_update_status(task_id: str, status: str,
                                output_data: dict | None = None,
-                               confidence_score: float | None = None) -> bool:
+                               confidence_score: float | None = None,
+                               expected_status: str | None = None) -> bool:
+    """expected_status: alleen bijwerken als de taak nog die status heeft (bijv. niet terugzetten na een reject)."""
     with get_connection() as conn:
         sets = ["status = ?"]
         params: list[Any] = [status]
@@ -458,9 +1204,13 @@ def holding_task_update_status(task_id: str, status: str,
             sets.append("approved_at = ?")
             params.append(_dt.now(_tz.utc).isoformat().replace("+00:00", "Z"))
         params.append(task_id)
-        conn.execute(
-            f"UPDATE holding_tasks SET {', '.join(sets)} WHERE id = ?", params)
-        return conn.total_changes > 0
+        where = "id = ?"
+        if expected_status is not None:
+            where += " AND status = ?"
+            params.append(expected_status)
+        cur = conn.execute(
+            f"UPDATE holding_tasks SET {', '.join(sets)} WHERE {where}", params)
+        return cur.rowcount > 0
 
 
 def holding_task_increment_revision(task_id: str, review_notes: str = "",
@@ -474,10 +1224,10 @@ def holding_task_increment_revision(task_id: str, review_notes: str = "",
             sets.append("confidence_score = ?")
             params.append(confidence_score)
         params.append(task_id)
-        conn.execute(
+        cur = conn.execute(
             f"UPDATE holding_tasks SET {', '.join(sets)} WHERE id = ?",
             params)
-        return conn.total_changes > 0
+        return cur.rowcount > 0
 
 
 def _parse_holding_task(d: dict) -> dict:
@@ -514,43 +1264,165 @@ def correction_list(task_id: str) -> list[dict]:
 
 # ——— Cost log ———
 
+_COST_LOG_INSERT_SQL = """INSERT INTO cost_log
+               (tenant_id, agent_id, model_used, tokens_in, tokens_out, cost_usd, task_id)
+               VALUES (?, ?, ?, ?, ?, ?, ?)"""
+
+
 def cost_log_insert(tenant_id: str, agent_id: str, model_used: str = "",
                     tokens_in: int = 0, tokens_out: int = 0,
                     cost_usd: float = 0.0, task_id: str | None = None) -> None:
     with get_connection() as conn:
-        conn.execute(
-            """INSERT INTO cost_log
-               (tenant_id, agent_id, model_used, tokens_in, tokens_out, cost_usd, task_id)
-               VALUES (?, ?, ?, ?, ?, ?, ?)""",
-            (tenant_id, agent_id, model_used, tokens_in, tokens_out, cost_usd, task_id))
+        conn.execute(_COST_LOG_INSERT_SQL,
+                     (tenant_id, agent_id, model_used, tokens_in, tokens_out, cost_usd, task_id))
 
 
 def cost_log_summary(tenant_id: str | None = None) -> list[dict]:
+    """Totalen per tenant/agent/model: live cost_log + cost_log_rollup (gearchiveerde maanden)."""
+    where = "WHERE tenant_id = ?" if tenant_id else ""
+    params = (tenant_id, tenant_id) if tenant_id else ()
     with get_connection() as conn:
-        if tenant_id:
-            cur = conn.execute(
-                """SELECT tenant_id, agent_id, model_used,
-                          SUM(tokens_in) as total_in, SUM(tokens_out) as total_out,
-                          SUM(cost_usd) as total_cost, COUNT(*) as call_count
-                   FROM cost_log WHERE tenant_id = ?
-                   GROUP BY tenant_id, agent_id, model_used""",
-                (tenant_id,))
-        else:
-            cur = conn.execute(
-                """SELECT tenant_id, agent_id, model_used,
-                          SUM(tokens_in) as total_in, SUM(tokens_out) as total_out,
-                          SUM(cost_usd) as total_cost, COUNT(*) as call_count
-                   FROM cost_log
-                   GROUP BY tenant_id, agent_id, model_used""")
+        cur = conn.execute(
+            f"""SELECT tenant_id, agent_id, model_used,
+                       SUM(total_in) as total_in, SUM(total_out) as total_out,
+                       SUM(total_cost) as total_cost, SUM(call_count) as call_count
+                FROM (
+                    SELECT tenant_id, agent_id, COALESCE(model_used, '') as model_used,
+                           SUM(tokens_in) as total_in, SUM(tokens_out) as total_out,
+                           SUM(cost_usd) as total_cost, COUNT(*) as call_count
+                    FROM cost_log {where}
+                    GROUP BY tenant_id, agent_id, COALESCE(model_used, '')
+                    UNION ALL
+                    SELECT tenant_id, agent_id, model_used,
+                           SUM(tokens_in), SUM(tokens_out), SUM(cost_usd), SUM(call_count)
+                    FROM cost_log_rollup {where}
+                    GROUP BY tenant_id, agent_id, model_used
+                )
+                GROUP BY tenant_id, agent_id, model_used""",
+            params)
         return [dict(r) for r in cur.fetchall()]
 
 
 # ——— Holding audit ———
 
+_HOLDING_AUDIT_INSERT_SQL = "INSERT INTO holding_audit (tenant_id, agent_id, action, details) VALUES (?, ?, ?, ?)"
+
+
 def holding_audit_log(action: str, tenant_id: str | None = None,
                       agent_id: str | None = None,
                       details: dict | None = None) -> None:
     with get_connection() as conn:
-        conn.execute(
-            "INSERT INTO holding_audit (tenant_id, agent_id, action, details) VALUES (?, ?, ?, ?)",
-            (tenant_id, agent_id, action, json.dumps(details or {})))
+        conn.execute(_HOLDING_AUDIT_INSERT_SQL, (tenant_id, agent_id, action, json.dumps(details or {})))
+
+
+# ——— Batch writes ———
+
+class WriteBatch:
+    """
+    Unit of work: verzamelt inserts in het geheugen en schrijft ze bij flush() met executemany
+    in één transactie (BEGIN IMMEDIATE). Statements worden per SQL gegroepeerd en in volgorde
+    van eerste gebruik uitgevoerd; voeg afhankelijke rijen (tenants vóór agents) dus in die volgorde toe.
+    ignore_duplicates=True maakt van INSERT een INSERT OR IGNORE (bestaande id's worden overgeslagen).
+    """
+
+    def __init__(self, conn: sqlite3.Connection | None = None, ignore_duplicates: bool = False):
+        self._conn = conn
+        self.ignore_duplicates = ignore_duplicates
+        self._pending: dict[str, list[tuple]] = {}
+        self.written = 0
+
+    def __len__(self) -> int:
+        return sum(len(rows) for rows in self._pending.values())
+
+    def add(self, sql: str, params: tuple) -> None:
+        if self.ignore_duplicates and sql.lstrip().startswith("INSERT INTO"):
+            sql = sql.lstrip().replace("INSERT INTO", "INSERT OR IGNORE INTO", 1)
+        self._pending.setdefault(sql, []).append(tuple(params))
+
+    def mission_insert(self, mid: str, title: str, status: str, assigned_specialist: str, source: str,
+                       payload: dict | None, created_at: str, updated_at: str) -> None:
+        self.add(_MISSION_INSERT_SQL,
+                 _mission_params(mid, title, status, assigned_specialist, source, payload, created_at, updated_at))
+
+    def task_insert(self, task_id: str, description: str, prioriteit: str, status: str, created: str,
+                    completed: Optional[str] = None) -> None:
+        self.add(_TASK_INSERT_SQL, (task_id, description, prioriteit, status, created, completed))
+
+    def note_insert(self, note_id: str, title: str, content: str, created_at: str) -> None:
+        self.add(_NOTE_INSERT_SQL, (note_id, title, content, created_at))
+
+    def tenant_insert(self, tenant_id: str, name: str, tenant_type: str, brand_voice: str = "",
+                      target_audience: str = "", industry: str = "", config: dict | None = None) -> None:
+        self.add(_TENANT_INSERT_SQL, (tenant_id, name, tenant_type, brand_voice, target_audience,
+                                      industry, json.dumps(config or {})))
+
+    def holding_agent_insert(self, agent_id: str, tenant_id: str, name: str, role: str,
+                             specialization: str = "", skills: list | None = None,
+                             model: str = "gemini", parent_agent_id: str | None = None,
+                             confidence_threshold: float = 0.8, system_prompt: str = "") -> None:
+        self.add(_HOLDING_AGENT_INSERT_SQL, (agent_id, tenant_id, name, role, specialization,
+                                             json.dumps(skills or []), model, parent_agent_id,
+                                             confidence_threshold, system_prompt))
+
+    def cost_log_insert(self, tenant_id: str, agent_id: str, model_used: str = "",
+                        tokens_in: int = 0, tokens_out: int = 0,
+                        cost_usd: float = 0.0, task_id: str | None = None) -> None:
+        self.add(_COST_LOG_INSERT_SQL, (tenant_id, agent_id, model_used, tokens_in, tokens_out, cost_usd, task_id))
+
+    def holding_audit_log(self, action: str, tenant_id: str | None = None,
+                          agent_id: str | None = None, details: dict | None = None) -> None:
+        self.add(_HOLDING_AUDIT_INSERT_SQL, (tenant_id, agent_id, action, json.dumps(details or {})))
+
+    def provider_health_record(self, provider: str, ok: bool, latency_ms: int, tokens_out: int = 0,
+                               error: str = "", now: float | None = None,
+                               cooldown_failures: int = 3, cooldown_seconds: float = 300) -> None:
+        import time
+        now = time.time() if now is None else now
+        self.add(_PROVIDER_HEALTH_SQL, _provider_health_params(
+            provider, ok, latency_ms, tokens_out, error, now, cooldown_failures, cooldown_seconds))
+        if ok:
+            self.add(_PROVIDER_LATENCY_SQL, _provider_latency_params(provider, latency_ms, now))
+
+    def _execute(self, conn: sqlite3.Connection, pending: dict[str, list[tuple]]) -> int:
+        written = 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for sql, rows in pending.items():
+                written += max(conn.executemany(sql, rows).rowcount, 0)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return written
+
+    def flush(self) -> int:
+        """Schrijf alles wat klaarstaat in één transactie. Retourneert aantal geschreven rijen."""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        if self._conn is not None:
+            written = self._execute(self._conn, pending)
+        else:
+            pool = _get_pool()
+            conn = pool.acquire()
+            try:
+                written = self._execute(conn, pending)
+            finally:
+                pool.release(conn)
+        if _TENANT_INSERT_SQL in pending:
+            omega_cache.invalidate(*TENANT_CACHES)
+        if _HOLDING_AGENT_INSERT_SQL in pending:
+            omega_cache.invalidate(*AGENT_CACHES)
+        self.written += written
+        return written
+
+
+@contextmanager
+def batch(conn: sqlite3.Connection | None = None, ignore_duplicates: bool = False):
+    """
+    with omega_db.batch() as b: b.task_insert(...) — flush bij het verlaten van het blok,
+    niets geschreven bij een exceptie. Optioneel een eigen connectie (bijv. met sqlite-vec geladen).
+    """
+    wb = WriteBatch(conn, ignore_duplicates)
+    yield wb
+    wb.flush()
@@ -0,0 +1,106 @@
+"""
+Omega AI-Holding — Gedeelde HTTP-client voor LLM-providers (Cerebras, OpenRouter, Groq, Ollama, OpenAI-compatible).
+Eén requests.Session per host (scheme + netloc) met keep-alive en een connectiepool van POOL_SIZE,
+zodat niet elke call een nieuwe TCP- (en TLS-)handshake kost.
+Timeouts zijn gesplitst: CONNECT_TIMEOUT voor het opzetten, read_timeout per aanroeper (LLM-antwoorden duren lang).
+Geen automatische retries: fallback/retry (backoff + jitter, Retry-After) zit in llm_engine.
+Na een fork krijgt het kindproces eigen sessies (sockets worden niet gedeeld).
+Async: één httpx.AsyncClient per event loop (async_client), met dezelfde pool- en connect-instellingen.
+"""
+import asyncio
+import os
+import threading
+import weakref
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CONNECT_TIMEOUT = float(os.environ.get("OMEGA_HTTP_CONNECT_TIMEOUT", "5") or 5)
+POOL_SIZE = int(os.environ.get("OMEGA_HTTP_POOL_SIZE", "16") or 16)
+
+_sessions: dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+_pid = os.getpid()
+
+
+def _host_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def _new_session() -> requests.Session:
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=0, pool_block=False)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    return s
+
+
+def session(url: str) -> requests.Session:
+    """De gedeelde Session voor de host van url (aangemaakt bij eerste gebruik)."""
+    global _pid
+    key = _host_key(url)
+    s = _sessions.get(key) if _pid == os.getpid() else None
+    if s is None:
+        with _sessions_lock:
+            if _pid != os.getpid():
+                _sessions.clear()
+                _pid = os.getpid()
+            s = _sessions.get(key)
+            if s is None:
+                s = _sessions[key] = _new_session()
+    return s
+
+
+def timeout(read_timeout: float, connect_timeout: Optional[float] = None) -> tuple[float, float]:
+    """(connect, read)-tuple zoals requests die verwacht."""
+    return (CONNECT_TIMEOUT if connect_timeout is None else connect_timeout, read_timeout)
+
+
+def post(url: str, read_timeout: float = 60, **kwargs: Any) -> requests.Response:
+    """POST via de gepoolde Session van de host. Zelfde kwargs als requests.post (behalve timeout)."""
+    return session(url).post(url, timeout=timeout(read_timeout), **kwargs)
+
+
+def get(url: str, read_timeout: float = 30, **kwargs: Any) -> requests.Response:
+    return session(url).get(url, timeout=timeout(read_timeout), **kwargs)
+
+
+def close_all() -> None:
+    """Sluit alle sessies (bijv. in tests of bij afsluiten)."""
+    with _sessions_lock:
+        for s in _sessions.values():
+            s.close()
+        _sessions.clear()
+
+
+# ——— Async (httpx, komt mee met python-telegram-bot) ———
+
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+
+
+def async_client() -> Any:
+    """De httpx.AsyncClient van de lopende event loop (keep-alive, max POOL_SIZE verbindingen per host)."""
+    import httpx
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = _async_clients[loop] = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=POOL_SIZE),
+            timeout=httpx.Timeout(60, connect=CONNECT_TIMEOUT))
+    return client
+
+
+async def apost(url: str, read_timeout: float = 60, **kwargs: Any) -> Any:
+    """Async POST via de gedeelde AsyncClient. Zelfde kwargs als httpx.AsyncClient.post (behalve timeout)."""
+    import httpx
+    return await async_client().post(url, timeout=httpx.Timeout(read_timeout, connect=CONNECT_TIMEOUT), **kwargs)
+
+
+async def aclose() -> None:
+    """Sluit de AsyncClient van de lopende event loop."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,236 @@
+"""
+Omega AI-Holding — Write-behind queue voor telemetrie (cost_log, holding_audit, provider_health).
+Aanroepers zetten een rij in een begrensde in-memory queue en gaan direct door; één
+achtergrondthread schrijft de rijen gebundeld weg via omega_db.batch() (executemany, één transactie)
+zodra FLUSH_ROWS rijen klaarstaan of FLUSH_INTERVAL_MS verstreken is.
+Queue vol → kort wachten (backpressure), daarna wordt de rij gedropt en geteld.
+Bij afsluiten (atexit) wordt de queue leeggeschreven. OMEGA_TELEMETRY_SYNC=1 schrijft direct (debug).
+"""
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+import omega_db
+
+QUEUE_SIZE = int(os.environ.get("OMEGA_TELEMETRY_QUEUE_SIZE", "10000") or 10000)
+FLUSH_INTERVAL_MS = int(os.environ.get("OMEGA_TELEMETRY_FLUSH_MS", "250") or 250)
+FLUSH_ROWS = 200
+ENQUEUE_TIMEOUT = 0.05  # seconden backpressure voordat een rij wordt gedropt
+SHUTDOWN_TIMEOUT = 5.0
+SYNC = os.environ.get("OMEGA_TELEMETRY_SYNC", "").strip().lower() in ("1", "true", "yes")
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class TelemetryWriter:
+    """Begrensde queue + één writer-thread. Items zijn (WriteBatch-methode, kwargs)."""
+
+    def __init__(self, max_queue: int = QUEUE_SIZE, flush_interval_ms: int = FLUSH_INTERVAL_MS,
+                 flush_rows: int = FLUSH_ROWS):
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.flush_rows = flush_rows
+        self.pid = os.getpid()
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._last_drop_warning = 0.0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="omega-telemetry", daemon=True)
+                self._thread.start()
+
+    def put(self, method: str, **kwargs) -> bool:
+        """Zet een rij in de queue. False als de rij is gedropt (queue vol)."""
+        self._ensure_started()
+        try:
+            self._queue.put((method, kwargs), timeout=ENQUEUE_TIMEOUT)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            now = time.monotonic()
+            if now - self._last_drop_warning > 60:
+                self._last_drop_warning = now
+                logger.warning("omega_telemetry: queue vol, %d rij(en) gedropt", self.dropped)
+            return False
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._queue.get()
+            except Exception:
+                continue
+            rows: list[tuple[str, dict]] = []
+            waiters: list[threading.Event] = []
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    rows.append(item)
+                if stop or waiters or len(rows) >= self.flush_rows:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if stop:
+                # Alles wat nog in de queue staat meenemen
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if isinstance(item, threading.Event):
+                        waiters.append(item)
+                    elif item is not _STOP:
+                        rows.append(item)
+            self._write(rows)
+            for ev in waiters:
+                ev.set()
+            if stop:
+                return
+
+    def _write(self, rows: list[tuple[str, dict]]) -> None:
+        if not rows:
+            return
+        for attempt in (1, 2):
+            try:
+                with omega_db.batch() as b:
+                    for method, kwargs in rows:
+                        getattr(b, method)(**kwargs)
+                self.written += len(rows)
+                return
+            except sqlite3.IntegrityError:
+                # Eén ongeldige rij (bijv. onbekende tenant) mag de rest van de batch niet meenemen
+                break
+            except Exception as e:
+                logger.debug("omega_telemetry batch (poging %d): %s", attempt, e)
+                if attempt == 1:
+                    time.sleep(0.2)
+        for method, kwargs in rows:
+            try:
+                getattr(omega_db, method)(**kwargs)
+                self.written += 1
+            except Exception as e:
+                self.failed += 1
+                logger.debug("omega_telemetry %s: %s", method, e)
+
+    def flush(self, timeout: float = SHUTDOWN_TIMEOUT) -> bool:
+        """Wacht tot alles wat nu in de queue staat geschreven is."""
+        if self._thread is None or not self._thread.is_alive():
+            return self._queue.empty()
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def shutdown(self, timeout: float = SHUTDOWN_TIMEOUT) -> None:
+        """Schrijf de queue leeg en stop de writer-thread."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning("omega_telemetry: queue vol bij afsluiten; %d rij(en) verloren", self._queue.qsize())
+            return
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {"queued": self._queue.qsize(), "written": self.written,
+                "dropped": self.dropped, "failed": self.failed}
+
+
+_writer: Optional[TelemetryWriter] = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer() -> TelemetryWriter:
+    global _writer
+    writer = _writer
+    if writer is None or writer.pid != os.getpid():
+        with _writer_lock:
+            if _writer is None or _writer.pid != os.getpid():
+                _writer = TelemetryWriter()
+            writer = _writer
+    return writer
+
+
+def log_cost(tenant_id: str, agent_id: str, model_used: str = "",
+             tokens_in: int = 0, tokens_out: int = 0,
+             cost_usd: float = 0.0, task_id: str | None = None) -> None:
+    """Zelfde argumenten als omega_db.cost_log_insert, maar zonder database-I/O op het request-pad."""
+    kwargs = dict(tenant_id=tenant_id, agent_id=agent_id, model_used=model_used, tokens_in=tokens_in,
+                  tokens_out=tokens_out, cost_usd=cost_usd, task_id=task_id)
+    if SYNC:
+        omega_db.cost_log_insert(**kwargs)
+        return
+    _get_writer().put("cost_log_insert", **kwargs)
+
+
+def log_audit(action: str, tenant_id: str | None = None,
+              agent_id: str | None = None, details: dict | None = None) -> None:
+    """Zelfde argumenten als omega_db.holding_audit_log, maar zonder database-I/O op het request-pad."""
+    if SYNC:
+        omega_db.holding_audit_log(action, tenant_id=tenant_id, agent_id=agent_id, details=details)
+        return
+    _get_writer().put("holding_audit_log", action=action, tenant_id=tenant_id,
+                      agent_id=agent_id, details=dict(details or {}))
+
+
+def log_provider_health(provider: str, ok: bool, latency_ms: int, tokens_out: int = 0, error: str = "",
+                        now: float | None = None, cooldown_failures: int = 3,
+                        cooldown_seconds: float = 300) -> None:
+    """Zelfde argumenten als omega_db.provider_health_record (now vooraf vastleggen: de write komt later)."""
+    kwargs = dict(provider=provider, ok=ok, latency_ms=latency_ms, tokens_out=tokens_out, error=error,
+                  now=time.time() if now is None else now, cooldown_failures=cooldown_failures,
+                  cooldown_seconds=cooldown_seconds)
+    if SYNC:
+        omega_db.provider_health_record(**kwargs)
+        return
+    _get_writer().put("provider_health_record", **kwargs)
+
+
+def flush(timeout: float = SHUTDOWN_TIMEOUT) -> bool:
+    """Wacht tot alle telemetrie tot nu toe in omega.db staat (bijv. vóór een kostenoverzicht)."""
+    writer = _writer
+    if writer is None or writer.pid != os.getpid():
+        return True
+    return writer.flush(timeout)
+
+
+def shutdown(timeout: float = SHUTDOWN_TIMEOUT) -> None:
+    writer = _writer
+    if writer is not None and writer.pid == os.getpid():
+        writer.shutdown(timeout)
+
+
+def stats() -> dict:
+    writer = _writer
+    if writer is None or writer.pid != os.getpid():
+        return {"queued": 0, "written": 0, "dropped": 0, "failed": 0}
+    return writer.stats()
+
+
+atexit.register(shutdown)
@@ -16,6 +16,8 @@ CHUNK_SIZE = 800
 CHUNK_OVERLAP = 150
 
 _embedder = None
+# Databasebestanden waarvoor rag_chunks/rag_vectors in dit proces al zijn aangemaakt
+_rag_schema_ready: set[str] = set()
 
 
 def _get_embedder():
@@ -46,6 +48,15 @@ def _embed(text: str) -> list[float]:
     return vec.astype(float).tolist()
 
 
+def _embed_many(texts: list[str]) -> list[list[float]]:
+    """Embed meerdere teksten in één encode-aanroep (sentence-transformers batcht intern)."""
+    emb = _get_embedder()
+    if emb == "placeholder" or not texts:
+        return [_embed(t) for t in texts]
+    vecs = emb.encode(texts, convert_to_numpy=True)
+    return [v.astype(float).tolist() for v in vecs]
+
+
 def _chunk_text(text: str, size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> list[str]:
     """Split tekst in chunks met overlap."""
     text = text.strip()
@@ -93,7 +104,11 @@ def _get_connection_with_vec():
 
 
 def init_rag_schema() -> None:
-    """Maak rag_chunks en vec0-rag_vectors aan."""
+    """Maak rag_chunks en vec0-rag_vectors aan (één keer per proces per databasebestand)."""
+    import omega_db
+    path = str(omega_db.DATABASE_PATH)
+    if path in _rag_schema_ready:
+        return
     conn = _get_connection_with_vec()
     try:
         conn.execute("""
@@ -115,23 +130,42 @@ def init_rag_schema() -> None:
                 if "no such module" not in str(e).lower():
                     logger.warning("rag_vectors: %s", e)
         conn.commit()
+        _rag_schema_ready.add(path)
     finally:
         conn.close()
 
 
-def _insert_chunk(conn, source_type: str, source_id: str, content: str, embedding: list[float], created_at: str) -> None:
-    cur = conn.execute(
-        "INSERT INTO rag_chunks (source_type, source_id, content, created_at) VALUES (?, ?, ?, ?)",
-        (source_type, source_id, content[:10000], created_at),
-    )
-    rowid = cur.lastrowid
-    if _vec_available():
-        try:
-            from sqlite_vec import serialize_float32
-            blob = serialize_float32(embedding)
-            conn.execute("INSERT INTO rag_vectors(rowid, embedding) VALUES (?, ?)", (rowid, blob))
-        except Exception as e:
-            logger.debug("rag_vectors insert: %s", e)
+def _insert_chunks(conn, rows: list[tuple[str, str, str, str]], embeddings: list[list[float]]) -> int:
+    """
+    Voeg chunks in bulk toe: rows = [(source_type, source_id, content, created_at)].
+    Id's worden binnen één BEGIN IMMEDIATE-transactie vooraf toegekend, zodat rag_chunks en
+    rag_vectors allebei met executemany kunnen.
+    """
+    if not rows:
+        return 0
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        first_id = conn.execute(
+            """SELECT MAX(COALESCE((SELECT MAX(id) FROM rag_chunks), 0),
+                          COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'rag_chunks'), 0)) + 1"""
+        ).fetchone()[0]
+        ids = range(first_id, first_id + len(rows))
+        conn.executemany(
+            "INSERT INTO rag_chunks (id, source_type, source_id, content, created_at) VALUES (?, ?, ?, ?, ?)",
+            [(rowid, st, sid, content[:10000], ts) for rowid, (st, sid, content, ts) in zip(ids, rows)],
+        )
+        if _vec_available():
+            try:
+                from sqlite_vec import serialize_float32
+                conn.executemany("INSERT INTO rag_vectors(rowid, embedding) VALUES (?, ?)",
+                                 [(rowid, serialize_float32(e)) for rowid, e in zip(ids, embeddings)])
+            except Exception as e:
+                logger.debug("rag_vectors insert: %s", e)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(rows)
 
 
 def index_file(source_type: str, source_id: str, path: Path, created_at: Optional[str] = None) -> int:
@@ -146,17 +180,12 @@ def index_file(source_type: str, source_id: str, path: Path, created_at: Optiona
     chunks = _chunk_text(text)
     if not chunks:
         return 0
+    embeddings = _embed_many(chunks)
     conn = _get_connection_with_vec()
-    n = 0
     try:
-        for i, content in enumerate(chunks):
-            embedding = _embed(content)
-            _insert_chunk(conn, source_type, source_id, content, embedding, ts)
-            n += 1
-        conn.commit()
+        return _insert_chunks(conn, [(source_type, source_id, c, ts) for c in chunks], embeddings)
     finally:
         conn.close()
-    return n
 
 
 def index_notes_from_db(created_at: Optional[str] = None) -> int:
@@ -165,21 +194,21 @@ def index_notes_from_db(created_at: Optional[str] = None) -> int:
     from datetime import datetime, timezone
     ts = created_at or datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
     notes = omega_db.note_list(limit=500)
-    total = 0
+    rows = []
+    for n in notes:
+        content = (n.get("content") or "").strip()
+        if not content:
+            continue
+        for chunk in _chunk_text(content):
+            rows.append(("note", n.get("id", ""), chunk, ts))
+    if not rows:
+        return 0
+    embeddings = _embed_many([r[2] for r in rows])
     conn = _get_connection_with_vec()
     try:
-        for n in notes:
-            content = (n.get("content") or "").strip()
-            if not content:
-                continue
-            for chunk in _chunk_text(content):
-                embedding = _embed(chunk)
-                _insert_chunk(conn, "note", n.get("id", ""), chunk, embedding, ts)
-                total += 1
-        conn.commit()
+        return _insert_chunks(conn, rows, embeddings)
     finally:
         conn.close()
-    return total
 
 
 def index_all(skip_logs: bool = False, include_notes: bool = True) -> dict:
@@ -1,6 +1,11 @@
-import requests
 import re
 import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import omega_http
 
 def create_new_agent(agent_name, task_description):
     print(f"\n🤖 Manager: Ik ga aan de slag voor agent '{agent_name}'...")
@@ -33,7 +38,7 @@ def create_new_agent(agent_name, task_description):
 
     try:
         print("⏳ Even geduld, ik ben aan het programmeren (dit duurt ca. 20-30 sec)...")
-        response = requests.post(url, json=data)
+        response = omega_http.post(url, read_timeout=300, json=data)
         
         if response.status_code == 200:
             raw_content = response.json()['message']['content']
@@ -72,15 +77,4 @@ if __name__ == "__main__":
     print("Tip: Zeg welke URL hij moet gebruiken en waar hij logs moet opslaan.")
     taak = input("Taak omschrijving: ")
     
-    create_new_agent(naam, taak)Optimaliseer 'agents/web_researcher.py' voor snelheid op de NUC:
-1. Verhoog de 'llm_timeout' naar 120 seconden om Ollama meer tijd te geven.
-2. Voeg 'max_steps=10' toe aan de Agent om te voorkomen dat hij eindeloos blijft zoeken.
-3. Pas de taak aan naar een simpelere instructie: "Haal alleen de titels van de top 3 AI posts en stop direct."
-
-Bereid daarna Fase 5 voor:
-Installeer 'chromadb' en 'sentence-transformers' in de venv. 
-Maak een nieuw script 'scripts/memory_manager.py' dat een simpele functie heeft om tekst op te slaan in een lokale ChromaDB database in de map '/home/pietje/AI_HQ/kennisbank'.
-source venv/bin/activate
-pip install chromadb sentence-transformers
-# Run de geoptimaliseerde researcher
-python3 agents/web_researcher.py
+    create_new_agent(naam, taak)
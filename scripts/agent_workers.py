@@ -1,21 +1,33 @@
 """
 Omega Supremacy — Agent Workers.
-Poll mission_control.json; pick QUEUED missions for each specialist and execute (placeholder: complete with result).
-Runs as a daemon/container next to the bridge.
+Claim QUEUED missions per specialist (atomic lease in omega_db) and execute (placeholder: complete with result).
+Runs as a daemon/container next to the bridge; several worker processes can run side-by-side.
+Thread pool with per-specialist slots; total concurrency bounded by the container CPU/RAM limits.
+Woken by mission_notify (Unix socket) when a mission is added; polling only as slow fallback.
+SIGTERM/SIGINT: stop claiming, let in-flight missions finish or release them back to the queue.
 """
 import logging
+import os
+import signal
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in __import__("sys").path:
     __import__("sys").path.insert(0, str(ROOT))
 
+import mission_notify
+import omega_db
 from mission_control import (
-    start_mission,
+    claim_next_mission,
     complete_mission,
+    release_mission,
+    renew_mission_lease,
     set_mission_progress,
-    get_queued_missions,
+    worker_id,
     SPECIALISTS,
 )
 
@@ -29,8 +41,17 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Agent watcher: elke 10s mission_control.json inladen; status PENDING/QUEUED + assignee == Agent_Name → DOING → uitvoeren → COMPLETED
-POLL_INTERVAL = 10
+# Agent watcher: bij notify (of elke POLL_INTERVAL als fallback) per specialist de oudste QUEUED missie claimen (lease) → uitvoeren → COMPLETED
+POLL_INTERVAL = 60
+# Zonder notify-kanaal (bind mislukt) terug naar snelle polling
+POLL_INTERVAL_NO_NOTIFY = 10
+LEASE_SECONDS = 300
+# Parallelle missies per specialist; totaal begrensd door max_concurrency()
+WORKERS_PER_SPECIALIST = int(os.environ.get("OMEGA_WORKERS_PER_SPECIALIST", "2") or 1)
+MISSIONS_PER_CPU = 4          # missies wachten vooral op I/O (LLM, schijf)
+MEMORY_PER_MISSION_MB = 128
+METRICS_INTERVAL = 60         # seconden tussen worker_metrics-rijen
+SHUTDOWN_GRACE = 8            # docker stop wacht standaard 10s
 THOUGHT_TRACE = ROOT / "data" / "thought_trace.log"
 MISSION_JSON_PATH = ROOT / "data" / "mission_control.json"
 # Zelfde map als dashboard, ook buiten Docker (NUC)
@@ -47,18 +68,78 @@ def _trace(msg: str) -> None:
         pass
 
 
-def execute_mission(mission: dict) -> None:
-    """Execute mission; write report to holding/output/[task_id].md before COMPLETED."""
+def _cgroup_limits() -> tuple[float, int | None]:
+    """(cpus, mem_mb) uit cgroup v2 (docker-compose cpus/mem_limit); buiten Docker de host."""
+    cpus = float(os.cpu_count() or 1)
+    mem_mb = None
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()[:2]
+        if quota != "max":
+            cpus = min(cpus, int(quota) / int(period))
+    except (OSError, ValueError):
+        pass
+    try:
+        raw = Path("/sys/fs/cgroup/memory.max").read_text().strip()
+        if raw != "max":
+            mem_mb = int(raw) // (1024 * 1024)
+    except (OSError, ValueError):
+        pass
+    return cpus, mem_mb
+
+
+def max_concurrency() -> int:
+    """Totaal aantal gelijktijdige missies: OMEGA_WORKERS_MAX of afgeleid van CPU/RAM-limiet."""
+    env = (os.environ.get("OMEGA_WORKERS_MAX") or "").strip()
+    if env:
+        return max(1, int(env))
+    cpus, mem_mb = _cgroup_limits()
+    limit = max(1, int(cpus * MISSIONS_PER_CPU))
+    if mem_mb:
+        limit = min(limit, max(1, mem_mb // MEMORY_PER_MISSION_MB))
+    return limit
+
+
+def _queue_wait_seconds(mission: dict) -> float | None:
+    try:
+        created = datetime.fromisoformat((mission.get("created_at") or "").replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return max(0.0, time.time() - created.timestamp())
+
+
+def _pause(seconds: float, stop: threading.Event | None) -> bool:
+    """Wacht seconds; True als de worker intussen moet stoppen."""
+    if stop is None:
+        time.sleep(seconds)
+        return False
+    return stop.wait(seconds)
+
+
+def execute_mission(mission: dict, stop: threading.Event | None = None) -> bool:
+    """
+    Execute a claimed mission; write report to holding/output/[task_id].md before COMPLETED.
+    Returns False when shutdown interrupted it and the mission was released back to the queue,
+    or when the lease was lost (the mission may belong to another worker by now).
+    """
     mid = mission.get("id", "")
     title = mission.get("title", "?")
     specialist = (mission.get("assigned_specialist") or "shuri").lower()
     _trace(f"[{specialist}] Picked mission {mid}: {title[:50]}")
-    if not start_mission(mid):
-        return
     set_mission_progress(mid, 0.3)
-    time.sleep(1)
+    if _pause(1, stop):
+        release_mission(mid)
+        _trace(f"[{specialist}] Released {mid} (shutdown)")
+        return False
     set_mission_progress(mid, 0.7)
-    time.sleep(0.5)
+    if not renew_mission_lease(mid, LEASE_SECONDS):
+        # Lease verlopen en missie teruggezet; mogelijk al door een andere worker geclaimd
+        logger.warning("Mission %s: lease kwijt, niet afronden", mid)
+        _trace(f"[{specialist}] Lost lease on {mid}")
+        return False
+    if _pause(0.5, stop):
+        release_mission(mid)
+        _trace(f"[{specialist}] Released {mid} (shutdown)")
+        return False
     result = f"Afgehandeld door {specialist} (worker placeholder)."
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     out_md = OUTPUT_DIR / f"{mid}.md"
@@ -66,24 +147,140 @@ def execute_mission(mission: dict) -> None:
         f"# {title}\n\n**Specialist:** {specialist}\n\n**Resultaat:**\n\n{result}\n",
         encoding="utf-8",
     )
-    complete_mission(mid, result=result, progress=1.0)
+    # Alleen afronden als deze worker de lease nog heeft (shutdown kan hem intussen hebben teruggegeven)
+    if not complete_mission(mid, result=result, progress=1.0, owner=worker_id()):
+        logger.warning("Mission %s: lease kwijt bij afronden, resultaat niet opgeslagen", mid)
+        _trace(f"[{specialist}] Lost lease on {mid}")
+        return False
     _trace(f"[{specialist}] Completed {mid}: {result[:60]}")
+    return True
+
+
+class WorkerPool:
+    """Thread pool met per-specialist slots, een globale limiet en throughput-metrics."""
+
+    def __init__(self, specialists: list[str], per_specialist: int, max_total: int):
+        self.specialists = specialists
+        self.per_specialist = per_specialist
+        self.max_total = max_total
+        self.worker = worker_id()
+        self.stop = threading.Event()
+        self.wake = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=max_total, thread_name_prefix="mission")
+        self._lock = threading.Lock()
+        self._in_flight = {s: {} for s in specialists}  # specialist → {future: mission}
+        self._window_start = time.monotonic()
+        self._stats = {s: self._empty_stats() for s in specialists}
+
+    @staticmethod
+    def _empty_stats() -> dict:
+        return {"completed": 0, "released": 0, "failed": 0, "waits": []}
+
+    def _has_slot(self, spec: str) -> bool:
+        with self._lock:
+            total = sum(len(m) for m in self._in_flight.values())
+            return len(self._in_flight[spec]) < self.per_specialist and total < self.max_total
+
+    def dispatch(self) -> int:
+        """Claim missies zolang er slots vrij zijn. Retourneert het aantal gestarte missies."""
+        started = 0
+        for spec in self.specialists:
+            while not self.stop.is_set() and self._has_slot(spec):
+                mission = claim_next_mission(spec, LEASE_SECONDS, owner=self.worker)
+                if not mission:
+                    break
+                with self._lock:
+                    wait_s = _queue_wait_seconds(mission)
+                    if wait_s is not None:
+                        self._stats[spec]["waits"].append(wait_s)
+                    future = self._executor.submit(self._run, spec, mission)
+                    self._in_flight[spec][future] = mission
+                started += 1
+        return started
+
+    def _run(self, spec: str, mission: dict) -> None:
+        outcome = "failed"
+        try:
+            outcome = "completed" if execute_mission(mission, self.stop) else "released"
+        except Exception as e:
+            # Lease verloopt vanzelf; dan gaat de missie terug in de queue, na MISSION_MAX_ATTEMPTS naar FAILED
+            logger.exception("Mission %s: %s", mission.get("id"), e)
+        finally:
+            with self._lock:
+                self._stats[spec][outcome] += 1
+                for future, m in list(self._in_flight[spec].items()):
+                    if m is mission:
+                        del self._in_flight[spec][future]
+            self.wake.set()
+
+    def flush_metrics(self) -> None:
+        """Schrijf throughput (missions/min, queue wait) per specialist naar omega_db.worker_metrics."""
+        now = time.monotonic()
+        window = now - self._window_start
+        with self._lock:
+            stats, self._stats = self._stats, {s: self._empty_stats() for s in self.specialists}
+            in_flight = {s: len(m) for s, m in self._in_flight.items()}
+            self._window_start = now
+        for spec, st in stats.items():
+            if not (st["completed"] or st["released"] or st["failed"] or in_flight[spec]):
+                continue
+            waits = st["waits"]
+            try:
+                omega_db.worker_metrics_insert(
+                    self.worker, spec, window,
+                    completed=st["completed"], released=st["released"], failed=st["failed"],
+                    avg_queue_wait_s=sum(waits) / len(waits) if waits else None,
+                    max_queue_wait_s=max(waits) if waits else None,
+                    in_flight=in_flight[spec])
+            except Exception as e:
+                logger.warning("worker_metrics: %s", e)
+
+    def shutdown(self) -> None:
+        """Stop claimen; wacht SHUTDOWN_GRACE op lopende missies, geef de rest terug aan de queue."""
+        self.stop.set()
+        with self._lock:
+            pending = {f: m for missions in self._in_flight.values() for f, m in missions.items()}
+        if pending:
+            logger.info("Shutdown: wacht op %d lopende missie(s)", len(pending))
+            _, not_done = wait(pending, timeout=SHUTDOWN_GRACE)
+            for future in not_done:
+                mission = pending[future]
+                if release_mission(mission.get("id", ""), owner=self.worker):
+                    logger.info("Shutdown: missie %s teruggezet in de queue", mission.get("id"))
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.flush_metrics()
 
 
 def run():
-    logger.info("Agent watchers started (poll omega_db every %ds)", POLL_INTERVAL)
-    while True:
+    specialists = [s for s in SPECIALISTS if s != "jarvis"]
+    pool = WorkerPool(specialists, WORKERS_PER_SPECIALIST, max_concurrency())
+
+    def _on_signal(signum, _frame):
+        logger.info("Signaal %s ontvangen, workers stoppen", signum)
+        pool.stop.set()
+        pool.wake.set()
+
+    signal.signal(signal.SIGTERM, _on_signal)
+    signal.signal(signal.SIGINT, _on_signal)
+    listener = mission_notify.Listener(pool.worker, lambda _spec: pool.wake.set())
+    poll_interval = POLL_INTERVAL if listener.start() else POLL_INTERVAL_NO_NOTIFY
+    logger.info(
+        "Agent watchers started (%d per specialist, max %d concurrent, fallback poll every %ds)",
+        pool.per_specialist, pool.max_total, poll_interval)
+    last_metrics = time.monotonic()
+    while not pool.stop.is_set():
+        pool.wake.clear()
         try:
-            for spec in SPECIALISTS:
-                if spec == "jarvis":
-                    continue
-                queued = get_queued_missions(specialist=spec)
-                for m in queued[:1]:
-                    execute_mission(m)
-                    break
+            pool.dispatch()
         except Exception as e:
             logger.exception("Worker cycle: %s", e)
-        time.sleep(POLL_INTERVAL)
+        if time.monotonic() - last_metrics >= METRICS_INTERVAL:
+            pool.flush_metrics()
+            last_metrics = time.monotonic()
+        pool.wake.wait(poll_interval)
+    listener.close()
+    pool.shutdown()
+    logger.info("Agent watchers gestopt")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,174 @@
+"""
+Archiveer oude rijen uit data/omega.db naar data/omega_archive.db (koude opslag).
+- missions (alleen COMPLETED), holding_audit, cost_log, corrections ouder dan de retentie
+- cost_log-totalen blijven opvraagbaar via cost_log_rollup (cost_tracker telt die mee)
+- korte batches (eigen transactie per batch) zodat bridge/workers gewoon doorlopen
+- daarna PRAGMA wal_checkpoint(TRUNCATE); VACUUM alleen met --vacuum (exclusieve lock)
+Draai vanuit projectroot:
+  python scripts/archive_omega_db.py [--days 90] [--dry-run] [--vacuum]
+  python scripts/archive_omega_db.py --daemon [--interval 86400]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import omega_db
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+logger = logging.getLogger(__name__)
+
+RETENTION_DAYS = int(os.environ.get("OMEGA_ARCHIVE_RETENTION_DAYS", "90") or 90)
+BATCH_SIZE = 1000
+DAEMON_INTERVAL = 24 * 3600
+ARCHIVE_NAME = "omega_archive.db"
+
+# tabel → (tijdkolom, extra filter). missions: ISO 8601 met 'Z'; overige: CURRENT_TIMESTAMP.
+ARCHIVE_TABLES = {
+    "missions": ("updated_at", "status = 'COMPLETED'"),
+    "holding_audit": ("created_at", ""),
+    "cost_log": ("created_at", ""),
+    "corrections": ("created_at", ""),
+}
+
+
+def archive_path() -> Path:
+    return omega_db.DATABASE_PATH.parent / ARCHIVE_NAME
+
+
+def _cutoff(table: str, days: int) -> str:
+    ts = datetime.now(timezone.utc) - timedelta(days=days)
+    if table == "missions":
+        return ts.isoformat().replace("+00:00", "Z")
+    return ts.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _columns(conn, schema: str, table: str) -> list[str]:
+    return [r[1] for r in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+
+def _ensure_archive_table(conn, table: str) -> list[str]:
+    """Maak archive.<table> aan (zelfde kolommen) en voeg kolommen toe die later in main zijn bijgekomen."""
+    conn.execute(f"CREATE TABLE IF NOT EXISTS archive.{table} AS SELECT * FROM main.{table} WHERE 0")
+    main_cols = _columns(conn, "main", table)
+    archive_cols = set(_columns(conn, "archive", table))
+    for col in main_cols:
+        if col not in archive_cols:
+            conn.execute(f"ALTER TABLE archive.{table} ADD COLUMN {col}")
+    conn.commit()
+    return main_cols
+
+
+def _rollup_cost_log(conn, placeholders: str, rowids: list[int]) -> None:
+    conn.execute(
+        f"""INSERT INTO main.cost_log_rollup
+                (tenant_id, agent_id, model_used, month, tokens_in, tokens_out, cost_usd, call_count)
+            SELECT tenant_id, agent_id, COALESCE(model_used, ''), substr(created_at, 1, 7),
+                   SUM(tokens_in), SUM(tokens_out), SUM(cost_usd), COUNT(*)
+            FROM main.cost_log WHERE rowid IN ({placeholders})
+            GROUP BY tenant_id, agent_id, COALESCE(model_used, ''), substr(created_at, 1, 7)
+            ON CONFLICT(tenant_id, agent_id, model_used, month) DO UPDATE SET
+                tokens_in = tokens_in + excluded.tokens_in,
+                tokens_out = tokens_out + excluded.tokens_out,
+                cost_usd = cost_usd + excluded.cost_usd,
+                call_count = call_count + excluded.call_count""",
+        rowids)
+
+
+def archive_table(conn, table: str, days: int, dry_run: bool = False) -> int:
+    """Verplaats rijen ouder dan days naar archive.<table>, in batches. Retourneert aantal rijen."""
+    ts_col, extra = ARCHIVE_TABLES[table]
+    where = f"{ts_col} < ?" + (f" AND {extra}" if extra else "")
+    cutoff = _cutoff(table, days)
+    if dry_run:
+        return conn.execute(f"SELECT COUNT(*) FROM main.{table} WHERE {where}", (cutoff,)).fetchone()[0]
+    cols = ", ".join(_ensure_archive_table(conn, table))
+    moved = 0
+    while True:
+        rowids = [r[0] for r in conn.execute(
+            f"SELECT rowid FROM main.{table} WHERE {where} ORDER BY rowid LIMIT ?", (cutoff, BATCH_SIZE))]
+        if not rowids:
+            return moved
+        placeholders = ",".join("?" * len(rowids))
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                f"INSERT INTO archive.{table} ({cols}) SELECT {cols} FROM main.{table} WHERE rowid IN ({placeholders})",
+                rowids)
+            if table == "cost_log":
+                _rollup_cost_log(conn, placeholders, rowids)
+            conn.execute(f"DELETE FROM main.{table} WHERE rowid IN ({placeholders})", rowids)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        moved += len(rowids)
+
+
+def run_once(days: int = RETENTION_DAYS, dry_run: bool = False, vacuum: bool = False) -> dict:
+    """Eén archiveringsronde over alle ARCHIVE_TABLES. Retourneert {tabel: aantal}."""
+    omega_db.init_schema()
+    counts = {}
+    with omega_db.get_connection() as conn:
+        conn.execute("ATTACH DATABASE ? AS archive", (str(archive_path()),))
+        try:
+            for table in ARCHIVE_TABLES:
+                counts[table] = archive_table(conn, table, days, dry_run)
+                logger.info("%s: %d rij(en) %s", table, counts[table],
+                            "te archiveren" if dry_run else "gearchiveerd")
+        finally:
+            conn.commit()
+            conn.execute("DETACH DATABASE archive")
+        if dry_run:
+            return counts
+        busy, log_frames, checkpointed = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        logger.info("wal_checkpoint(TRUNCATE): busy=%s, frames=%s/%s", busy, checkpointed, log_frames)
+        if vacuum:
+            try:
+                conn.execute("VACUUM")
+                logger.info("VACUUM klaar")
+            except Exception as e:
+                logger.warning("VACUUM overgeslagen (database bezet?): %s", e)
+    return counts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Archiveer oude omega.db-rijen naar omega_archive.db")
+    parser.add_argument("--days", type=int, default=RETENTION_DAYS, help="retentie in dagen (default %(default)s)")
+    parser.add_argument("--dry-run", action="store_true", help="alleen tellen, niets verplaatsen")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM na archiveren (exclusieve lock)")
+    parser.add_argument("--daemon", action="store_true", help="blijf draaien, elke --interval seconden")
+    parser.add_argument("--interval", type=int, default=DAEMON_INTERVAL, help="daemon-interval in seconden")
+    args = parser.parse_args()
+
+    if not args.daemon:
+        run_once(args.days, args.dry_run, args.vacuum)
+        return 0
+    logger.info("Archiver gestart (retentie %d dagen, interval %ds)", args.days, args.interval)
+    while True:
+        try:
+            run_once(args.days, args.dry_run, args.vacuum)
+        except KeyboardInterrupt:
+            logger.info("Archiver gestopt")
+            return 0
+        except Exception as e:
+            logger.exception("Archiver: %s", e)
+        try:
+            time.sleep(args.interval)
+        except KeyboardInterrupt:
+            logger.info("Archiver gestopt")
+            return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Micro-benchmark: vaste setup-kosten per Telegram-bericht in de Gemini-backend van llm_engine vóór de call
+(.env inlezen, genai.configure, 22 FunctionDeclarations, GenerativeModel, start_chat).
+"voor" = alles per bericht opnieuw (caches geleegd, zoals het oude pad); "na" = gemini_tools-registry + mtime-check op .env.
+Draait tegen een stub google.generativeai (geen netwerk, geen SDK nodig). De stub introspecteert elke tool
+(signature + docstring) zoals FunctionDeclaration.from_function; de echte SDK bouwt daarbij ook nog een schema
+en is dus trager, waardoor de winst in productie groter is dan hier gemeten.
+Draai vanuit projectroot: python scripts/bench_gemini_setup.py [--messages 500]
+"""
+import argparse
+import inspect
+import statistics
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def _stub_genai() -> types.ModuleType:
+    """Minimale google.generativeai met dezelfde oppervlakte als llm_engine.Gemini gebruikt."""
+    genai = types.ModuleType("google.generativeai")
+    gtypes = types.ModuleType("google.generativeai.types")
+
+    class FunctionDeclaration:
+        def __init__(self, name, description, parameters):
+            self.name, self.description, self.parameters = name, description, parameters
+
+        @classmethod
+        def from_function(cls, fn):
+            sig = inspect.signature(fn)
+            params = {
+                name: {"type": getattr(p.annotation, "__name__", str(p.annotation)),
+                       "required": p.default is inspect.Parameter.empty}
+                for name, p in sig.parameters.items()
+            }
+            return cls(fn.__name__, inspect.getdoc(fn) or "", params)
+
+    class Tool:
+        def __init__(self, function_declarations):
+            self.function_declarations = list(function_declarations)
+
+    class GenerationConfig:
+        def __init__(self, **kwargs):
+            self.__dict__.update(kwargs)
+
+    class GenerativeModel:
+        def __init__(self, model_name, tools=None, system_instruction=None, generation_config=None):
+            self.model_name, self.tools = model_name, tools
+            self.system_instruction, self.generation_config = system_instruction, generation_config
+
+        def start_chat(self, history=None, enable_automatic_function_calling=False):
+            return types.SimpleNamespace(model=self, history=[])
+
+    gtypes.FunctionDeclaration, gtypes.Tool, gtypes.GenerationConfig = FunctionDeclaration, Tool, GenerationConfig
+    genai.types, genai.GenerativeModel = gtypes, GenerativeModel
+    genai.configure = lambda api_key=None, **kw: None
+    google = types.ModuleType("google")
+    google.generativeai = genai
+    sys.modules.setdefault("google", google)
+    sys.modules["google.generativeai"] = genai
+    return genai
+
+
+def _run(messages: int, cached: bool, llm_engine, gemini_tools, req) -> list[float]:
+    times = []
+    for _ in range(messages):
+        if not cached:
+            gemini_tools.clear()
+            llm_engine._env_mtime = None
+        t0 = time.perf_counter()
+        llm_engine.ensure_env()
+        llm_engine.GEMINI._chat(req, automatic=True)
+        times.append((time.perf_counter() - t0) * 1000)
+    return times
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--messages", type=int, default=500)
+    args = ap.parse_args()
+
+    _stub_genai()
+    import ai_chat_retries
+    import gemini_tools
+    import llm_engine
+
+    req = ai_chat_retries._request([{"role": "system", "content": ai_chat_retries.SYSTEM},
+                                    {"role": "user", "content": "Hoe staat het ervoor?"}])
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / ".env").write_text((ROOT / ".env.example").read_text(encoding="utf-8"), encoding="utf-8")
+        llm_engine.ROOT = Path(tmp)
+        _run(20, False, llm_engine, gemini_tools, req)  # warm-up (imports, bytecode)
+        print(f"Setup per bericht, {args.messages} berichten ({len(gemini_tools.OMEGA_TOOLS)} tools, stub genai)")
+        for label, cached in (("voor (zonder cache)", False), ("na (registry)", True)):
+            times = sorted(_run(args.messages, cached, llm_engine, gemini_tools, req))
+            p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+            print(f"  {label:<20} gem {statistics.mean(times):8.3f} ms   p50 {times[len(times) // 2]:8.3f} ms   "
+                  f"p95 {p95:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Micro-benchmark omega_http: overhead per LLM-call tegen een lokale stub-server (OpenAI-compatible /chat/completions),
+kale requests.post (nieuwe verbinding per call) vs. omega_http.post (gepoolde keep-alive Session).
+Meet alleen client-overhead: de stub antwoordt direct. Tegen echte providers komt daar per nieuwe verbinding
+nog netwerk-RTT bij (typisch 50-150 ms naar Cerebras/OpenRouter/Groq), die met de pool wegvalt.
+--tls draait de stub over HTTPS met een tijdelijk self-signed certificaat (vereist openssl op PATH).
+Draai vanuit projectroot: python scripts/bench_http_pool.py [--calls 500] [--threads 8] [--tls]
+"""
+import argparse
+import json
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import requests
+
+import omega_http
+
+_RESPONSE = json.dumps({
+    "choices": [{"message": {"role": "assistant", "content": "ok"}}],
+    "usage": {"prompt_tokens": 10, "completion_tokens": 1},
+}).encode()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    wbufsize = 64 * 1024  # headers + body in één write (anders Nagle/delayed-ACK-vertraging bij keep-alive)
+    disable_nagle_algorithm = True
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        with _lock:
+            _StubHandler.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(_RESPONSE)
+
+    def log_message(self, *args):
+        pass
+
+
+_lock = threading.Lock()
+
+
+def _wrap_tls(server: ThreadingHTTPServer, tmp: str) -> None:
+    cert, key = f"{tmp}/stub.crt", f"{tmp}/stub.key"
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                    "-subj", "/CN=127.0.0.1", "-keyout", key, "-out", cert],
+                   check=True, capture_output=True)
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ctx.load_cert_chain(cert, key)
+    server.socket = ctx.wrap_socket(server.socket, server_side=True)
+
+
+def _run(call, url: str, calls: int, threads: int) -> tuple[list[float], float]:
+    body = {"model": "stub", "messages": [{"role": "user", "content": "hallo"}]}
+
+    def one(_):
+        t = time.perf_counter()
+        r = call(url, body)
+        r.raise_for_status()
+        r.json()
+        return time.perf_counter() - t
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        latencies = list(pool.map(one, range(calls)))
+    return latencies, time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--tls", action="store_true", help="stub over HTTPS (self-signed)")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.daemon_threads = True
+    tmp = tempfile.TemporaryDirectory()
+    if args.tls:
+        _wrap_tls(server, tmp.name)
+        requests.packages.urllib3.disable_warnings()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    scheme = "https" if args.tls else "http"
+    url = f"{scheme}://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+    verify = not args.tls
+
+    cases = {
+        "requests.post": lambda u, b: requests.post(u, json=b, timeout=30, verify=verify),
+        "omega_http.post": lambda u, b: omega_http.post(u, read_timeout=30, json=b, verify=verify),
+    }
+    print(f"{args.calls} calls, {args.threads} threads tegen {url}")
+    print(f"{'client':16s} {'p50 ms':>8s} {'p95 ms':>8s} {'calls/s':>9s} {'verbindingen':>13s}")
+    for name, call in cases.items():
+        _run(call, url, 20, 1)  # warm-up (imports, pool vullen)
+        _StubHandler.connections = 0
+        lat, elapsed = _run(call, url, args.calls, args.threads)
+        lat.sort()
+        print(f"{name:16s} {statistics.median(lat) * 1000:8.2f} {lat[int(len(lat) * 0.95) - 1] * 1000:8.2f} "
+              f"{args.calls / elapsed:9.0f} {_StubHandler.connections:13d}")
+    server.shutdown()
+    omega_http.close_all()
+    tmp.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
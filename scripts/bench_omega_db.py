@@ -0,0 +1,70 @@
+"""
+Micro-benchmark omega_db: ops/sec voor state_get, task_list en holding_task_list,
+connect-per-call (OMEGA_DB_POOL_SIZE=0) vs. gepoolde connecties.
+Draait tegen een tijdelijke database; data/omega.db wordt niet aangeraakt.
+Draai vanuit projectroot: python scripts/bench_omega_db.py [--seconds 2]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import omega_db
+
+
+def _seed() -> None:
+    omega_db.init_schema()
+    omega_db.state_set("daily_spend_eur", 1.25)
+    for i in range(200):
+        omega_db.task_insert(f"task_{i:04d}", f"Bench taak {i}", "normaal", "open", f"2026-01-01T00:{i % 60:02d}:00Z")
+    omega_db.tenant_insert("bench", "Bench", "webshop")
+    for i in range(200):
+        omega_db.holding_task_insert(f"ht_{i:04d}", "bench", "product_descriptions", f"Bench holding {i}")
+
+
+def _ops_per_sec(fn, seconds: float) -> float:
+    n = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        fn()
+        n += 1
+    return n / (time.perf_counter() - start)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=2.0, help="meetduur per case")
+    args = parser.parse_args()
+
+    cases = {
+        "state_get": lambda: omega_db.state_get("daily_spend_eur"),
+        "task_list": lambda: omega_db.task_list("open", 50),
+        "holding_task_list": lambda: omega_db.holding_task_list(tenant_id="bench", limit=50),
+    }
+    pool_size = omega_db.POOL_MAX_SIZE or 8
+    with tempfile.TemporaryDirectory() as tmp:
+        omega_db.DATABASE_PATH = Path(tmp) / "bench.db"
+        omega_db.close_pool()
+        _seed()
+        results = {}
+        for label, size in (("connect-per-call", 0), ("pool", pool_size)):
+            omega_db.POOL_MAX_SIZE = size
+            omega_db.close_pool()
+            results[label] = {name: _ops_per_sec(fn, args.seconds) for name, fn in cases.items()}
+        omega_db.close_pool()
+
+    print(f"{'functie':20s} {'connect-per-call':>18s} {'pool':>12s} {'factor':>8s}")
+    for name in cases:
+        before = results["connect-per-call"][name]
+        after = results["pool"][name]
+        print(f"{name:20s} {before:15.0f}/s {after:9.0f}/s {after / before:7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,13 @@
 """
 Eenmalige migratie: mission_control.json, data/tasks/*.json, data/notes/*.txt,
 pending_approvals.json, heartbeat_history.json → data/omega.db.
+Missions, tasks en notes gaan via omega_db.batch() (executemany, één transactie per soort);
+bestaande id's worden overgeslagen, dus opnieuw draaien is veilig. Velden worden vóór het inplannen
+naar tekst omgezet; faalt de batch toch, dan volgt rij-voor-rij, zodat één slechte rij de rest niet tegenhoudt.
 Draai vanuit projectroot: python scripts/migrate_json_to_sqlite.py
 """
 import json
+import sqlite3
 import sys
 from pathlib import Path
 from datetime import date
@@ -11,10 +15,39 @@ from datetime import date
 ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(ROOT))
 
-from omega_db import init_schema, mission_insert, state_set, task_insert, note_insert, approval_set, heartbeat_append
+from omega_db import init_schema, batch, state_set, approval_set, heartbeat_append
 from mission_control import DEFAULT_SPEND_LIMIT_EUR
 
 
+def _text(value, default: str = "") -> str:
+    """JSON-waarde → tekst voor een TEXT-kolom (None → default, dict/list → JSON)."""
+    if value is None or value == "":
+        return default
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def _insert_all(kind: str, method: str, rows: list[tuple]) -> int:
+    """Alle rijen in één batch; faalt die, dan rij voor rij en worden alleen de slechte rijen overgeslagen."""
+    try:
+        with batch(ignore_duplicates=True) as b:
+            for row in rows:
+                getattr(b, method)(*row)
+        return b.written
+    except sqlite3.Error as e:
+        print(f"{kind}: batch mislukt ({e}), rij voor rij")
+    written = 0
+    for row in rows:
+        try:
+            with batch(ignore_duplicates=True) as b:
+                getattr(b, method)(*row)
+            written += b.written
+        except sqlite3.Error as e:
+            print(f"{kind} skip", row[0], e)
+    return written
+
+
 def migrate_mission_control():
     path = ROOT / "data" / "mission_control.json"
     if not path.exists():
@@ -30,22 +63,23 @@ def migrate_mission_control():
     state.setdefault("tunnel_url", "")
     for k, v in state.items():
         state_set(k, v)
+    rows = []
     for m in missions:
-        mid = m.get("id") or ""
-        title = m.get("title") or ""
-        status = (m.get("status") or "QUEUED").upper()
-        specialist = (m.get("assigned_specialist") or m.get("assignee") or "shuri").lower()
-        source = m.get("source") or "telegram"
-        payload = m.get("payload") or {}
-        created = m.get("created_at") or m.get("updated_at") or ""
-        updated = m.get("updated_at") or created
+        if not isinstance(m, dict):
+            continue
+        mid = _text(m.get("id"))
+        title = _text(m.get("title"))
+        status = _text(m.get("status"), "QUEUED").upper()
+        specialist = _text(m.get("assigned_specialist") or m.get("assignee"), "shuri").lower()
+        source = _text(m.get("source"), "telegram")
+        payload = m.get("payload") if isinstance(m.get("payload"), dict) else {}
+        created = _text(m.get("created_at") or m.get("updated_at"))
+        updated = _text(m.get("updated_at")) or created
         if not mid or not created:
             continue
-        try:
-            mission_insert(mid, title, status, specialist, source, payload, created, updated)
-        except Exception as e:
-            print("Mission skip", mid, e)
-    print("mission_control: state +", len(missions), "missions")
+        rows.append((mid, title, status, specialist, source, payload, created, updated))
+    written = _insert_all("Mission", "mission_insert", rows)
+    print("mission_control: state +", written, "van", len(missions), "missions")
 
 
 def migrate_tasks():
@@ -53,23 +87,22 @@ def migrate_tasks():
     if not tasks_dir.exists():
         print("Geen data/tasks; skip.")
         return
-    n = 0
+    rows = []
     for path in sorted(tasks_dir.glob("task_*.json")):
         try:
             d = json.loads(path.read_text(encoding="utf-8"))
-            task_id = d.get("id") or path.stem
-            desc = d.get("description") or ""
-            prio = d.get("prioriteit") or "normaal"
-            status = d.get("status") or "open"
-            created = d.get("created") or ""
+            task_id = _text(d.get("id")) or path.stem
+            desc = _text(d.get("description"))
+            prio = _text(d.get("prioriteit"), "normaal")
+            status = _text(d.get("status"), "open")
+            created = _text(d.get("created"))
             if not created:
                 continue
-            completed = d.get("completed") if status == "done" else None
-            task_insert(task_id, desc, prio, status, created, completed)
-            n += 1
+            completed = (_text(d.get("completed")) or None) if status == "done" else None
+            rows.append((task_id, desc, prio, status, created, completed))
         except Exception as e:
             print("Task skip", path.name, e)
-    print("tasks:", n)
+    print("tasks:", _insert_all("Task", "task_insert", rows))
 
 
 def migrate_notes():
@@ -77,7 +110,8 @@ def migrate_notes():
     if not notes_dir.exists():
         print("Geen data/notes; skip.")
         return
-    n = 0
+    from datetime import datetime, timezone
+    rows = []
     for path in sorted(notes_dir.glob("*.txt"), key=lambda p: p.stat().st_mtime, reverse=True):
         try:
             content = path.read_text(encoding="utf-8")
@@ -90,13 +124,11 @@ def migrate_notes():
                 title = first_line[2:].strip() or title
                 content = rest if rest else content
             created = path.stat().st_mtime
-            from datetime import datetime, timezone
             created_at = datetime.fromtimestamp(created, tz=timezone.utc).isoformat().replace("+00:00", "Z")
-            note_insert(note_id, title, content, created_at)
-            n += 1
+            rows.append((note_id, title, content, created_at))
         except Exception as e:
             print("Note skip", path.name, e)
-    print("notes:", n)
+    print("notes:", _insert_all("Note", "note_insert", rows))
 
 
 def migrate_pending_approvals():
@@ -51,6 +51,12 @@ except ImportError:
     except ImportError:
         get_ai_reply = None  # fallback: alleen echo
 
+try:
+    from ai_chat_retries import stream_ai_reply
+except ImportError:
+    stream_ai_reply = None  # fallback: hele antwoord in één keer (get_ai_reply)
+STREAM_REPLIES = os.environ.get("OMEGA_TG_STREAM", "1").strip().lower() not in ("0", "false", "no")
+
 try:
     from mission_control import add_mission as mc_add_mission, set_tunnel_url as mc_set_tunnel_url
 except ImportError:
@@ -91,10 +97,23 @@ async def cmd_help(update, context):
     if update.message is None:
         return
     await update.message.reply_text(
-        "Help: /start (menu), /task (delegatie), /holding (status|tasks|costs|seed), /panel, /restart, /secure, /tunnel, /lockdown. Of typ een opdracht."
+        "Help: /start (menu), /task (delegatie), /holding (status|tasks|costs|seed), /panel, /restart, /secure, /tunnel, /lockdown, /vergeet (nieuw gesprek). Of typ een opdracht."
     )
 
 
+async def cmd_vergeet(update, context):
+    """Handler voor /vergeet — wis het conversatiegeheugen van deze chat (chat_memory)."""
+    if update.message is None or update.effective_chat is None:
+        return
+    try:
+        import chat_memory
+        removed = chat_memory.forget(update.effective_chat.id)
+        await update.message.reply_text(f"Gesprek vergeten ({removed} berichten). We beginnen opnieuw.")
+    except Exception as e:
+        logger.warning("cmd_vergeet: %s", e)
+        await update.message.reply_text(f"Fout: {e}")
+
+
 DELEGATION_REPLY = (
     "Missie geaccepteerd. Ik heb Shuri en Vision geactiveerd. Volg de voortgang op het dashboard. "
     "Rapport staat klaar in de output-map."
@@ -461,7 +480,18 @@ async def handle_text(update, context):
             except Exception:
                 pass
 
-        if get_ai_reply:
+        if stream_ai_reply and STREAM_REPLIES:
+            # Streamen: eerste token verschijnt meteen, daarna gedoseerde edits van hetzelfde bericht
+            import telegram_stream
+            busy_task = asyncio.create_task(send_busy_after(12))
+            try:
+                reply = await telegram_stream.render(
+                    update.message, stream_ai_reply(msg, 3500, chat_id), on_first=busy_task.cancel)
+                if not reply.strip():
+                    await update.message.reply_text("Geen antwoord van de AI.")
+            finally:
+                busy_task.cancel()
+        elif get_ai_reply:
             busy_task = asyncio.create_task(send_busy_after(12))
             try:
                 reply = await asyncio.to_thread(get_ai_reply, msg, 3500, chat_id)
@@ -550,12 +580,60 @@ async def cmd_holding(update, context):
             if not task_id:
                 await update.message.reply_text("Gebruik: /holding reject <task_id> <feedback>")
                 return
+            from holding.src import llm_scheduler
+            llm_scheduler.cancel(task_id=task_id)
             omega_db.holding_task_update_status(task_id, "rejected")
             omega_db.holding_audit_log("human_rejected", details={"task_id": task_id, "feedback": feedback})
             await update.message.reply_text(f"Taak {task_id} afgekeurd: {feedback}")
 
+        elif sub == "cancel":
+            from holding.src import llm_scheduler
+            if not rest:
+                await update.message.reply_text("Gebruik: /holding cancel <task_id|tenant>")
+                return
+            if omega_db.tenant_get(rest):
+                n = llm_scheduler.cancel(tenant_id=rest)
+            else:
+                n = llm_scheduler.cancel(task_id=rest)
+            await update.message.reply_text(f"{n} wachtende LLM-aanvraag/-aanvragen geannuleerd.")
+
+        elif sub == "providers":
+            import time as _time
+            from holding.src import provider_health
+            rows = await asyncio.to_thread(provider_health.scoreboard)
+            if not rows:
+                await update.message.reply_text("Nog geen provider-metingen.")
+                return
+            now = _time.time()
+            lines = ["LLM providers (p50/p95 laatste 24u):"]
+            for r in sorted(rows, key=lambda r: -(r.get("ewma_success") or 0)):
+                pct = f"{r['success_rate'] * 100:.0f}%" if r.get("success_rate") is not None else "-"
+                lat = f"{r['p50_ms']}/{r['p95_ms']}ms" if r.get("p50_ms") is not None else "-"
+                tps = f"{r['ewma_tokens_per_sec']:.0f} tok/s" if r.get("ewma_tokens_per_sec") else "- tok/s"
+                line = f"  {r['provider']:10s} | {pct:>4s} van {r['calls']} | {lat} | {tps}"
+                if (r.get("cooldown_until") or 0) > now:
+                    line += f" | cooldown {int(r['cooldown_until'] - now)}s"
+                lines.append(line)
+                if r.get("last_error"):
+                    ago = int(now - (r.get("last_error_at") or now))
+                    lines.append(f"      laatste fout ({ago}s geleden): {r['last_error'][:80]}")
+            await update.message.reply_text("\n".join(lines))
+
+        elif sub == "queue":
+            from holding.src import holding_llm, llm_scheduler
+            s = llm_scheduler.stats()
+            h = holding_llm.hedge_stats()
+            lines = [f"LLM wachtrij: {s['in_flight']}/{s['max_in_flight']} actief, {s['queued']} wachtend",
+                     f"  wachttijd gem. {s['wait_avg_ms']}ms, p95 {s['wait_p95_ms']}ms",
+                     f"  gestart {s['dispatched']}, geannuleerd {s['cancelled']}",
+                     f"  hedges: {h['fired']} gestart, {h['won']} gewonnen, {h['denied']} geweigerd (budget)"]
+            for lane, depth in s["depth"].items():
+                if depth:
+                    lines.append(f"  {lane}: " + ", ".join(f"{t}={n}" for t, n in depth.items()))
+            await update.message.reply_text("\n".join(lines))
+
         elif sub == "costs":
-            from holding.src.cost_tracker import summary, total_cost
+            from holding.src.cost_tracker import cache_savings, summary, total_cost
             rows = summary()
             if not rows:
                 await update.message.reply_text("Nog geen kosten gelogd.")
@@ -564,19 +642,33 @@ async def cmd_holding(update, context):
             for r in rows:
                 lines.append(f"  {r['tenant_id']:10s} | {r['agent_id']:12s} | {r.get('call_count', 0)} calls | ${r.get('total_cost', 0):.4f}")
             lines.append(f"\nTotaal: ${total_cost():.4f}")
+            saved = cache_savings()
+            if saved["hits"]:
+                lines.append(f"Cache: {saved['hits']} hits ({(saved['hit_rate'] or 0) * 100:.0f}%), "
+                             f"~{saved['tokens_saved']} tokens bespaard")
             await update.message.reply_text("\n".join(lines))
 
         elif sub == "health":
             import psutil
+            import omega_cache
+            from holding.src import provider_limits
             mem = psutil.virtual_memory()
             disk = psutil.disk_usage("/")
             cpu = psutil.cpu_percent(interval=1)
+            cache_lines = "".join(
+                f"\n  {c['name']}: {c['hits']} hit / {c['misses']} miss ({c['size']} entries)"
+                for c in omega_cache.stats())
+            llm_lines = "".join(
+                f"\n  {p['provider']}: limiet {p['limit']}, {p['in_flight']} actief, {p['backoffs']} backoffs"
+                for p in provider_limits.stats())
             await update.message.reply_text(
                 f"NUC Health:\n"
                 f"  CPU: {cpu}%\n"
                 f"  RAM: {mem.used // (1024**2)}MB / {mem.total // (1024**2)}MB ({mem.percent}%)\n"
                 f"  Disk: {disk.used // (1024**3)}GB / {disk.total // (1024**3)}GB ({disk.percent}%)\n"
-                f"  RAM beschikbaar: {mem.available // (1024**2)}MB")
+                f"  RAM beschikbaar: {mem.available // (1024**2)}MB"
+                + (f"\nCache:{cache_lines}" if cache_lines else "")
+                + (f"\nLLM concurrency:{llm_lines}" if llm_lines else ""))
 
         elif sub == "seed":
             from holding.src.agent_registry import seed_tenants_and_agents
@@ -593,6 +685,9 @@ async def cmd_holding(update, context):
                 "/holding reject <task_id> <feedback> — afkeuren\n"
                 "/holding costs — kosten per tenant\n"
                 "/holding health — NUC CPU/RAM/disk\n"
+                "/holding queue — LLM wachtrij (diepte, wachttijd)\n"
+                "/holding providers — scorebord LLM-providers (latency, succes, cooldown)\n"
+                "/holding cancel <task_id|tenant> — wachtende LLM-aanvragen annuleren\n"
                 "/holding seed — tenants + agents seeden")
 
     except Exception as e:
@@ -630,6 +725,7 @@ def main():
     app.add_handler(CommandHandler("tunnel", cmd_tunnel))
     app.add_handler(CommandHandler("task", cmd_task))
     app.add_handler(CommandHandler("holding", cmd_holding))
+    app.add_handler(CommandHandler("vergeet", cmd_vergeet))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text))
     app.add_handler(MessageHandler(filters.VOICE, handle_voice))
 
@@ -0,0 +1,170 @@
+"""
+Omega AI-Holding — Streamend LLM-antwoord in Telegram als één bericht dat progressief wordt bijgewerkt.
+- Eerste delta → reply_text meteen (time-to-first-token = waargenomen latency)
+- Daarna edit_text hooguit elke EDIT_INTERVAL seconden en alleen als de tekst veranderd is;
+  Telegram staat ongeveer één edit per seconde per chat toe, een 429 (RetryAfter) schuift de volgende edit op
+- Tijdens het streamen staat er een cursor (▌) achter de tekst; de laatste edit haalt die weg
+- Boven MAX_MESSAGE_CHARS wordt het bericht afgerond (bij voorkeur op een regelgrens) en begint een nieuw bericht
+De blokkerende delta-generator (ai_chat_retries.stream_ai_reply) draait in een thread en voedt een asyncio.Queue.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Callable, Iterable, Optional
+
+import llm_stream
+
+logger = logging.getLogger(__name__)
+
+EDIT_INTERVAL = float(os.environ.get("OMEGA_TG_EDIT_INTERVAL", "1.2") or 1.2)
+MAX_MESSAGE_CHARS = 4000  # Telegram-limiet is 4096; marge voor de cursor
+CURSOR = " ▌"
+
+try:
+    from telegram.error import BadRequest, RetryAfter
+    _RETRY_AFTER: tuple = (RetryAfter,)
+    _BAD_REQUEST: tuple = (BadRequest,)
+except ImportError:
+    _RETRY_AFTER = _BAD_REQUEST = ()
+
+
+def _retry_seconds(e: Exception) -> float:
+    value = getattr(e, "retry_after", 1)
+    if isinstance(value, timedelta):
+        value = value.total_seconds()
+    return float(value or 1)
+
+
+class StreamRenderer:
+    """Houdt bij wat er in het huidige Telegram-bericht staat en wanneer de volgende edit mag."""
+
+    def __init__(self, message: Any, interval: float = EDIT_INTERVAL):
+        self.message = message  # het inkomende bericht; antwoorden gaan via reply_text
+        self.interval = interval
+        self.current: Any = None  # het verstuurde bericht dat we bijwerken
+        self.text = ""  # tekst van het huidige bericht (zonder cursor)
+        self.shown = ""  # wat Telegram nu toont
+        self.next_edit = 0.0
+        self.full: list[str] = []  # afgeronde berichten
+        self.edits = 0
+
+    def add(self, delta: Any) -> None:
+        if delta is llm_stream.RESET:
+            self.text = ""
+        else:
+            self.text += delta
+
+    def pending_delay(self) -> Optional[float]:
+        """Seconden tot de volgende edit als er nog iets te tonen is, anders None."""
+        if self.current is None or not self.text.strip() or self.text + CURSOR == self.shown:
+            return None
+        return max(0.0, self.next_edit - time.monotonic())
+
+    async def _show(self, body: str, force: bool = False) -> None:
+        if body == self.shown:
+            return
+        for _ in range(3):
+            try:
+                if self.current is None:
+                    self.current = await self.message.reply_text(body)
+                else:
+                    await self.current.edit_text(body)
+                    self.edits += 1
+                self.shown = body
+                self.next_edit = time.monotonic() + self.interval
+                return
+            except _RETRY_AFTER as e:
+                wait = _retry_seconds(e)
+                self.next_edit = time.monotonic() + wait
+                if not force:
+                    return
+                await asyncio.sleep(wait)
+            except _BAD_REQUEST as e:
+                if "not modified" in str(e).lower():
+                    self.shown = body
+                    return
+                raise
+
+    async def flush(self, final: bool = False) -> None:
+        """Toon de huidige tekst: altijd bij het eerste bericht en bij final, anders alleen als de edit mag."""
+        while len(self.text) > MAX_MESSAGE_CHARS:
+            cut = self.text.rfind("\n", 0, MAX_MESSAGE_CHARS)
+            if cut < MAX_MESSAGE_CHARS // 2:
+                cut = MAX_MESSAGE_CHARS
+            head, self.text = self.text[:cut], self.text[cut:].lstrip("\n")
+            await self._show(head, force=True)
+            self.full.append(head)
+            self.current, self.shown = None, ""
+        if not self.text.strip():
+            return
+        if final:
+            await self._show(self.text, force=True)
+        elif self.current is None or time.monotonic() >= self.next_edit:
+            await self._show(self.text + CURSOR, force=self.current is None)
+
+    def result(self) -> str:
+        return "\n".join(self.full + [self.text])
+
+
+async def render(message: Any, chunks: Iterable, on_first: Optional[Callable[[], Any]] = None,
+                 interval: float = EDIT_INTERVAL) -> str:
+    """
+    Consumeer een blokkerende delta-generator in een thread en toon die progressief als antwoord op message.
+    on_first wordt aangeroepen bij de eerste delta (bijv. de "even geduld"-melding annuleren).
+    Retourneert de volledige tekst ("" als er niets kwam).
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+    stop = threading.Event()
+
+    def pump() -> None:
+        try:
+            for delta in chunks:
+                loop.call_soon_threadsafe(queue.put_nowait, delta)
+                if stop.is_set():
+                    break
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    renderer = StreamRenderer(message, interval)
+    worker = loop.run_in_executor(None, pump)
+    started = time.monotonic()
+    first_at = None
+    try:
+        finished = False
+        while not finished:
+            delay = renderer.pending_delay()
+            try:
+                item = await (asyncio.wait_for(queue.get(), delay) if delay is not None else queue.get())
+            except asyncio.TimeoutError:
+                await renderer.flush()
+                continue
+            items = [item]
+            while not queue.empty():
+                items.append(queue.get_nowait())
+            for it in items:
+                if it is done:
+                    finished = True
+                elif isinstance(it, Exception):
+                    raise it
+                else:
+                    if first_at is None:
+                        first_at = time.monotonic()
+                        if on_first is not None:
+                            on_first()
+                    renderer.add(it)
+            await renderer.flush()
+        await renderer.flush(final=True)
+    finally:
+        stop.set()
+    await worker
+    if first_at is not None:
+        logger.info("Stream: eerste token na %.2fs, klaar na %.2fs, %d edits",
+                    first_at - started, time.monotonic() - started, renderer.edits)
+    return renderer.result()
@@ -0,0 +1,142 @@
+"""
+Tests voor llm_engine: Retry-After/backoff, fallback + pogingen in complete() en RESET bij een stream
+die halverwege wegvalt. Stub-backends, geen netwerk; health en kostenboek worden per test afgeschermd.
+Draaien: python -m pytest -q test_llm_engine.py
+"""
+import email.utils
+import time
+
+import pytest
+
+import llm_engine
+import llm_stream
+
+
+class StubBackend(llm_engine.Backend):
+    """Speelt vooraf opgegeven resultaten af; een Exception in stream_script breekt de stream op die plek af."""
+
+    def __init__(self, name, results=(), stream_script=()):
+        super().__init__(name, "stub", needs_key=False)
+        self.results = list(results)
+        self.stream_script = list(stream_script)
+        self.calls = 0
+
+    def call(self, req):
+        self.calls += 1
+        return self.results.pop(0)
+
+    def stream(self, req):
+        self.calls += 1
+        for item in self.stream_script:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    """Geen gedeeld scorebord, geen wachttijden, kostenboek als lijst."""
+    monkeypatch.setattr(llm_engine.provider_health, "record", lambda *a, **k: None)
+    monkeypatch.setattr(llm_engine.provider_health, "cooldown_remaining", lambda name: 0.0)
+    monkeypatch.setattr(llm_engine, "_local_health", {})
+    sleeps, booked = [], []
+    monkeypatch.setattr(llm_engine.time, "sleep", sleeps.append)
+    monkeypatch.setattr(llm_engine, "ledger", lambda backend, result, *a, **k: booked.append(backend.name))
+    return {"sleeps": sleeps, "booked": booked}
+
+
+def _req():
+    return llm_engine.Request([{"role": "user", "content": "hallo"}])
+
+
+# ——— retry_after_seconds / backoff ———
+
+@pytest.mark.parametrize("value, expected", [
+    (None, None), ("", None), ("3", 3.0), ("1.5", 1.5), (7, 7.0), ("-4", 0.0), ("onzin", None),
+])
+def test_retry_after_seconds(value, expected):
+    assert llm_engine.retry_after_seconds(value) == expected
+
+
+def test_retry_after_seconds_http_date():
+    value = email.utils.formatdate(time.time() + 60, usegmt=True)
+    assert 55 <= llm_engine.retry_after_seconds(value) <= 60
+    past = email.utils.formatdate(time.time() - 60, usegmt=True)
+    assert llm_engine.retry_after_seconds(past) == 0.0
+
+
+def test_backoff_full_jitter_within_cap():
+    for attempt in range(10):
+        cap = min(llm_engine.BACKOFF_MAX, llm_engine.BACKOFF_BASE * 2 ** attempt)
+        assert all(0 <= llm_engine.backoff(attempt) <= cap for _ in range(50))
+
+
+def test_backoff_honours_retry_after_up_to_max():
+    assert llm_engine.backoff(0, retry_after=5) >= 5
+    assert llm_engine.backoff(0, retry_after=3600) == llm_engine.RETRY_AFTER_MAX
+
+
+# ——— complete() ———
+
+def test_complete_falls_back_to_next_backend(isolated):
+    a = StubBackend("a", [llm_engine._fail("HTTP 400", False)])
+    b = StubBackend("b", [llm_engine._ok("antwoord", 1, 1)])
+    out = llm_engine.complete([a, b], _req(), attempts=3)
+    assert out["ok"] and out["content"] == "antwoord" and out["backend"] is b
+    assert a.calls == 1  # niet-retriable: geen tweede poging
+    assert len(out["errors"]) == 1 and out["errors"][0].startswith("a: HTTP 400")
+    assert isolated["booked"] == ["b"]
+    assert isolated["sleeps"] == []
+
+
+def test_complete_retries_retriable_errors_with_backoff(isolated):
+    a = StubBackend("a", [llm_engine._fail("Rate limited (429)", True, retry_after=2),
+                          llm_engine._fail("Server error (503)", True),
+                          llm_engine._ok("eindelijk", 1, 1)])
+    out = llm_engine.complete([a], _req(), attempts=3)
+    assert out["ok"] and a.calls == 3
+    assert len(isolated["sleeps"]) == 2
+    assert isolated["sleeps"][0] >= 2  # Retry-After gaat voor de jitter
+
+
+def test_complete_stops_after_attempts(isolated):
+    a = StubBackend("a", [llm_engine._fail("Server error (503)", True)] * 5)
+    b = StubBackend("b", [llm_engine._fail("Server error (502)", True)] * 5)
+    out = llm_engine.complete([a, b], _req(), attempts=2)
+    assert not out["ok"]
+    assert (a.calls, b.calls) == (2, 2)
+    assert len(out["errors"]) == 4
+    assert isolated["booked"] == []
+
+
+def test_complete_treats_empty_content_as_retriable(isolated):
+    a = StubBackend("a", [llm_engine._ok("", 1, 0), llm_engine._ok("vol", 1, 1)])
+    out = llm_engine.complete([a], _req(), attempts=2)
+    assert out["ok"] and out["content"] == "vol" and a.calls == 2
+
+
+# ——— stream() ———
+
+def test_stream_resets_when_backend_drops_mid_stream(isolated):
+    a = StubBackend("a", stream_script=["Hal", "lo ", ConnectionError("verbroken")])
+    b = StubBackend("b", stream_script=["Hallo ", "wereld"])
+    out = list(llm_engine.stream([a, b], _req(), attempts=3))
+    assert out == ["Hal", "lo ", llm_stream.RESET, "Hallo ", "wereld"]
+    assert a.calls == 1  # na de eerste delta geen retry op dezelfde backend
+    assert isolated["booked"] == ["b"]
+
+
+def test_stream_retries_before_first_delta(isolated):
+    import requests
+
+    a = StubBackend("a", stream_script=[requests.exceptions.ConnectionError("weg")])
+    out = list(llm_engine.stream([a], _req(), attempts=2))
+    assert out == []
+    assert a.calls == 2 and len(isolated["sleeps"]) == 1
+
+
+def test_stream_tool_call_falls_back_to_call(isolated):
+    a = StubBackend("a", results=[llm_engine._ok("via call", 1, 1)],
+                    stream_script=["deel", llm_stream.ToolCallRequired()])
+    out = list(llm_engine.stream([a], _req()))
+    assert out == ["deel", llm_stream.RESET, "via call"]
@@ -0,0 +1,110 @@
+"""
+Tests voor de migraties van omega_db, vanaf een bestaande v0-database (van vóór schema_version)
+met mission_state zoals de oude state_set die schreef: strings ongecodeerd, de rest als JSON.
+Draaien: python -m pytest -q test_omega_db.py
+"""
+import sqlite3
+
+import pytest
+
+import omega_db
+
+LEGACY_STATE = [
+    ("daily_spend_eur", "0.021"),
+    ("spend_limit_eur", "10.0"),
+    ("last_reset_date", "2026-02-24"),  # ongecodeerd, zonder quotes
+    ("circuit_breaker_tripped", "false"),
+    ("tunnel_url", "https://example.trycloudflare.com"),
+]
+
+
+@pytest.fixture
+def v0_db(tmp_path, monkeypatch):
+    """Alleen de kerntabellen (000), zonder schema_version, met legacy state."""
+    path = tmp_path / "omega.db"
+    conn = sqlite3.connect(path)
+    conn.executescript((omega_db.MIGRATIONS_DIR / "000_core_tables.sql").read_text(encoding="utf-8"))
+    conn.executemany("INSERT INTO mission_state (key, value) VALUES (?, ?)", LEGACY_STATE)
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(omega_db, "DATABASE_PATH", path)
+    yield path
+    omega_db.close_pool()
+
+
+def test_v0_database_migrates_to_latest(v0_db):
+    omega_db.init_schema()
+    latest = max(v for v, _, _ in omega_db._list_migrations())
+    assert omega_db.schema_version() == latest
+    with omega_db.get_connection() as conn:
+        versions = [r[0] for r in conn.execute("SELECT version FROM schema_version ORDER BY version")]
+    assert versions == list(range(latest + 1))
+
+
+def test_legacy_spend_state_carried_over(v0_db):
+    omega_db.init_schema()
+    spend, tripped = omega_db.spend_get("2026-02-24")
+    assert spend == pytest.approx(0.021)
+    assert tripped is False
+    total, tripped_now = omega_db.spend_record("2026-02-24", 0.5, 10.0)
+    assert total == pytest.approx(0.521) and not tripped_now
+
+
+def test_json_encoded_reset_date_also_accepted(v0_db):
+    with sqlite3.connect(v0_db) as conn:
+        conn.execute("UPDATE mission_state SET value = ? WHERE key = 'last_reset_date'", ('"2026-02-25"',))
+    omega_db.init_schema()
+    assert omega_db.spend_get("2026-02-25")[0] == pytest.approx(0.021)
+
+
+def test_circuit_breaker_survives_missing_spend_tables(v0_db, monkeypatch):
+    """Zonder spend_daily (migratie niet gelukt) mag een chatbericht niet crashen."""
+    import mission_control
+
+    def broken(*_a, **_k):
+        raise sqlite3.OperationalError("no such table: spend_daily")
+
+    monkeypatch.setattr(mission_control, "_spend_cache", {})
+    monkeypatch.setattr(mission_control, "_ensure_db", lambda: None)
+    monkeypatch.setattr(omega_db, "spend_get", broken)
+    monkeypatch.setattr(omega_db, "spend_record", broken)
+    assert mission_control.circuit_breaker_ok() is True
+    mission_control.record_spend(0.25, "test")
+    assert mission_control.get_daily_spend()[0] == pytest.approx(0.25)
+
+
+@pytest.fixture
+def broken_migrations(tmp_path, monkeypatch):
+    """000 en 002 in orde, 001 faalt."""
+    mig = tmp_path / "migrations"
+    mig.mkdir()
+    (mig / "000_a.sql").write_text("CREATE TABLE a (id INTEGER);")
+    (mig / "001_b.sql").write_text("CREATE TABLE b (id INTEGER);\nINSERT INTO nope VALUES (1);")
+    (mig / "002_c.sql").write_text("CREATE TABLE c (id INTEGER);")
+    monkeypatch.setattr(omega_db, "MIGRATIONS_DIR", mig)
+    monkeypatch.setattr(omega_db, "DATABASE_PATH", tmp_path / "broken.db")
+    yield
+    omega_db._schema_failed.clear()
+    omega_db.close_pool()
+
+
+def test_failed_migration_stops_and_is_remembered(broken_migrations, monkeypatch):
+    runs = []
+    real_run = omega_db._run_migrations
+    monkeypatch.setattr(omega_db, "_run_migrations", lambda conn: runs.append(1) or real_run(conn))
+    with pytest.raises(omega_db.MigrationError):
+        omega_db.init_schema()
+    with omega_db.get_connection() as conn:
+        tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert "a" in tables and "b" not in tables and "c" not in tables  # 001 teruggedraaid, 002 niet gestart
+    assert omega_db.schema_version() == 0
+    with pytest.raises(omega_db.MigrationError):
+        omega_db.init_schema()
+    assert len(runs) == 1  # tweede aanroep: onthouden fout, geen nieuwe poging
+
+
+def test_schema_version_is_highest_contiguous(broken_migrations):
+    with omega_db.get_connection() as conn:
+        conn.execute("CREATE TABLE schema_version (version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied_at TEXT)")
+        conn.executemany("INSERT INTO schema_version (version, name) VALUES (?, ?)", [(0, "a"), (2, "c")])
+    assert omega_db.schema_version() == 0